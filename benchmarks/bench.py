@@ -0,0 +1,331 @@
+# MIT License
+#
+# Copyright (c) 2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Benchmark suite.
+#
+# Measures:
+#
+# * The cold load time of each category, and of all of them.
+# * The names per second of `NameGenerator.random_full_name()` and
+#   `NameGenerator.iter_formatted_names()` for each combination of
+#   double surname, middle name, and gender.
+# * The throughput of `format_name()` for each format.
+# * The names per second of a `ThreadSafeNameGenerator` used by 1, 2,
+#   4, and 8 threads (up to the number of CPUs): the throughput only
+#   scales with the threads on a free-threaded interpreter.
+# * The peak memory after loading all the categories.
+# * The end-to-end CLI wall time (see `startup.py`).
+#
+# Usage:
+#
+#     python benchmarks/bench.py run [--quick] [--output FILE]
+#     python benchmarks/bench.py compare BASELINE CURRENT [--threshold PCT]
+#
+# `run` prints the results and, with `--output`, saves them as JSON.
+# `compare` flags the metrics of CURRENT which are worse than the ones
+# of BASELINE by more than the threshold (10 % by default) and exits
+# with status 1 if there's any.
+#
+# `run` uses a fresh user cache (see `qngng._cache`) in a temporary
+# directory, for itself and the CLI processes, so that the results
+# don't depend on the state of the real one.
+#
+# `baseline.json` in this directory is the tracked baseline: timings
+# depend on the machine, so compare results from the same one and
+# refresh the baseline when a change is expected to move the numbers.
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import typing
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import qngng.qngng as q  # noqa: E402
+import startup  # noqa: E402
+
+_LOWER_IS_BETTER = 'lower'
+_HIGHER_IS_BETTER = 'higher'
+
+
+class _Metric(typing.NamedTuple):
+    value: float
+    unit: str
+    better: str
+
+
+class _Config(typing.NamedTuple):
+    repeats: int
+    name_count: int
+    cli_runs: int
+
+
+_FULL_CONFIG = _Config(repeats=5, name_count=20_000, cli_runs=10)
+_QUICK_CONFIG = _Config(repeats=3, name_count=5_000, cli_runs=3)
+
+
+def _clear_caches() -> None:
+    q._open_pack.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    q._cached_columns.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    q._cat_pool.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    q._std_pool.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    q._std_surname_pool.cache_clear()  # pyright: ignore[reportPrivateUsage]
+
+
+def _best_seconds(func: typing.Callable[[], object], repeats: int,
+                  setup: typing.Callable[[], object] | None = None) -> float:
+    times: list[float] = []
+
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+
+        gc.collect()
+        begin = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - begin)
+
+    return min(times)
+
+
+def _bench_load(config: _Config) -> dict[str, _Metric]:
+    metrics: dict[str, _Metric] = {}
+    cat_sets = {cat.value: frozenset({cat}) for cat in sorted(q._UNIQUE_CATS)}  # pyright: ignore[reportPrivateUsage]
+    cat_sets['all'] = frozenset(q._UNIQUE_CATS)  # pyright: ignore[reportPrivateUsage]
+
+    for name, cats in cat_sets.items():
+        seconds = _best_seconds(lambda: q.NameGenerator(categories=cats).preload(False),
+                                config.repeats, _clear_caches)
+        metrics[f'load/{name}'] = _Metric(seconds * 1000, 'ms', _LOWER_IS_BETTER)
+
+    return metrics
+
+
+def _bench_generate(config: _Config) -> dict[str, _Metric]:
+    metrics: dict[str, _Metric] = {}
+    count = config.name_count
+
+    for surname_count, with_middle_name, gender in itertools.product(
+            (1, 2), (False, True), (None, q.Gender.MALE, q.Gender.FEMALE)):
+        gen = q.NameGenerator(surname_count, with_middle_name, gender, seed=1)
+        gen.preload()
+        key = (f'surnames={surname_count},middle-name={int(with_middle_name)},'
+               f'gender={gender or "any"}')
+        seconds = _best_seconds(lambda: [gen.random_full_name() for _ in range(count)],
+                                config.repeats)
+        metrics[f'generate/full-name/{key}'] = _Metric(count / seconds, 'names/s',
+                                                       _HIGHER_IS_BETTER)
+        seconds = _best_seconds(lambda: list(gen.iter_formatted_names(count)), config.repeats)
+        metrics[f'generate/formatted/{key}'] = _Metric(count / seconds, 'names/s',
+                                                       _HIGHER_IS_BETTER)
+
+    return metrics
+
+
+def _bench_format(config: _Config) -> dict[str, _Metric]:
+    metrics: dict[str, _Metric] = {}
+    gen = q.NameGenerator(2, True, categories=frozenset(q._UNIQUE_CATS), seed=1)  # pyright: ignore[reportPrivateUsage]
+    gen.preload()
+    name_tuples = gen.random_name_tuples(config.name_count)
+
+    for fmt in q.Format:
+        seconds = _best_seconds(lambda: [q.format_name(name_tuple, fmt) for name_tuple in name_tuples],
+                                config.repeats)
+        metrics[f'format/{fmt.value}'] = _Metric(len(name_tuples) / seconds, 'names/s',
+                                                 _HIGHER_IS_BETTER)
+
+    return metrics
+
+
+# Each thread generates `config.name_count` formatted names.
+def _bench_threads(config: _Config) -> dict[str, _Metric]:
+    metrics: dict[str, _Metric] = {}
+    cpu_count = os.cpu_count() or 1
+    count = config.name_count
+
+    for thread_count in (1, 2, 4, 8):
+        if thread_count > 1 and thread_count > cpu_count:
+            break
+
+        gen = q.ThreadSafeNameGenerator(q.NameGenerator(2, True, seed=1))
+
+        def run() -> None:
+            barrier = threading.Barrier(thread_count)
+
+            def target() -> None:
+                barrier.wait()
+                gen.random_formatted_names(count, q.Format.SNAKE)
+
+            threads = [threading.Thread(target=target) for _ in range(thread_count)]
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+        seconds = _best_seconds(run, config.repeats)
+        metrics[f'threads/{thread_count}'] = _Metric(thread_count * count / seconds, 'names/s',
+                                                     _HIGHER_IS_BETTER)
+
+    return metrics
+
+
+# Measures the peak memory in a fresh interpreter so that this process
+# doesn't count.
+#
+# On Linux, `ru_maxrss` survives `exec()`, so the peak resident set
+# size comes from `VmHWM` instead.
+def _bench_memory() -> dict[str, _Metric]:
+    code = '\n'.join([
+        'import pathlib, re, resource, sys, tracemalloc',
+        'tracemalloc.start()',
+        'import qngng.qngng as q',
+        'q.NameGenerator(categories=frozenset(q._UNIQUE_CATS)).preload()',
+        'peak = tracemalloc.get_traced_memory()[1]',
+        'status = pathlib.Path("/proc/self/status")',
+        'if status.exists():',
+        '    rss = int(re.search(r"VmHWM:\\s+(\\d+)", status.read_text()).group(1)) * 1024',
+        'else:',
+        '    scale = 1 if sys.platform == "darwin" else 1024',
+        '    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale',
+        'print(peak, rss)',
+    ])
+    result = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                            text=True, cwd=startup.ROOT_DIR)
+    traced, rss = (int(value) for value in result.stdout.split())
+    return {
+        'memory/traced-peak': _Metric(traced / 2**20, 'MiB', _LOWER_IS_BETTER),
+        'memory/max-rss': _Metric(rss / 2**20, 'MiB', _LOWER_IS_BETTER),
+    }
+
+
+def _bench_cli(config: _Config) -> dict[str, _Metric]:
+    metrics: dict[str, _Metric] = {}
+
+    for name, (args, _, _) in startup.SCENARIOS.items():
+        startup.wall_time_ms(args)
+        median = statistics.median(startup.wall_time_ms(args) for _ in range(config.cli_runs))
+        metrics[f'cli/{name}'] = _Metric(median, 'ms', _LOWER_IS_BETTER)
+
+    return metrics
+
+
+def _run(config: _Config) -> dict[str, _Metric]:
+    metrics: dict[str, _Metric] = {}
+
+    for bench in (_bench_load, _bench_generate, _bench_format, _bench_threads):
+        metrics.update(bench(config))
+
+    metrics.update(_bench_memory())
+    metrics.update(_bench_cli(config))
+    return metrics
+
+
+def _load(path: pathlib.Path) -> dict[str, _Metric]:
+    return {name: _Metric(**metric) for name, metric in json.loads(path.read_text())['metrics'].items()}
+
+
+# Returns the relative regression (positive means worse) of `current`
+# compared to `baseline`.
+def _regression(baseline: _Metric, current: _Metric) -> float:
+    if baseline.value == 0:
+        return 0
+
+    change = (current.value - baseline.value) / baseline.value
+    return change if baseline.better == _LOWER_IS_BETTER else -change
+
+
+def _compare(baseline: dict[str, _Metric], current: dict[str, _Metric], threshold: float) -> bool:
+    ok = True
+
+    for name in sorted(baseline.keys() | current.keys()):
+        if name not in current:
+            print(f'  {name}: missing')
+            continue
+
+        if name not in baseline:
+            print(f'  {name}: {current[name].value:.2f} {current[name].unit} (new)')
+            continue
+
+        regression = _regression(baseline[name], current[name])
+        flag = ''
+
+        if regression > threshold:
+            flag = '  REGRESSION'
+            ok = False
+
+        change = current[name].value / baseline[name].value - 1 if baseline[name].value else 0
+        print(f'  {name}: {baseline[name].value:.2f} -> {current[name].value:.2f} '
+              f'{current[name].unit} ({change:+.1%}){flag}')
+
+    return ok
+
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(description='qngng benchmark suite.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--quick', action='store_true', help='fewer and smaller runs')
+    run_parser.add_argument('--output', type=pathlib.Path, help='save the results as JSON')
+    compare_parser = subparsers.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline', type=pathlib.Path)
+    compare_parser.add_argument('current', type=pathlib.Path)
+    compare_parser.add_argument('--threshold', type=float, default=10,
+                                help='regression threshold (%%)')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        if not _compare(_load(args.baseline), _load(args.current), args.threshold / 100):
+            sys.exit(1)
+
+        return
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ['QNGNG_CACHE_DIR'] = cache_dir
+        metrics = _run(_QUICK_CONFIG if args.quick else _FULL_CONFIG)
+
+    for name, metric in metrics.items():
+        print(f'{name}: {metric.value:.2f} {metric.unit}')
+
+    if args.output is not None:
+        record = {
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'gil': getattr(sys, '_is_gil_enabled', lambda: True)(),
+            'metrics': {name: metric._asdict() for name, metric in metrics.items()},
+        }
+        args.output.write_text(json.dumps(record, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,142 @@
+# MIT License
+#
+# Copyright (c) 2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# CLI startup budget.
+#
+# Runs a few `qngng` invocations in fresh interpreters, checks that
+# their median wall time stays within budget and that they don't import
+# modules they don't need, and reports the slowest imports according to
+# `python -X importtime`.
+#
+# Usage:
+#
+#     python benchmarks/startup.py [--runs N] [--write FILE]
+#
+# Build the category pack first (`python qngng/_pack.py`): without it,
+# qngng falls back to decoding JSON with msgspec.
+#
+# With `--write`, the results are saved as JSON (`startup.json` in this
+# directory is the tracked record: refresh it when the startup path
+# changes).
+
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+import typing
+
+# scenario name to (CLI arguments, budget (ms), forbidden modules)
+SCENARIOS: dict[str, tuple[list[str], float, frozenset[str]]] = {
+    'version': (['--version'], 80, frozenset({'typer', 'pydantic', 'msgspec', 'qngng.qngng'})),
+    'single': ([], 250, frozenset({'pydantic', 'msgspec', 'concurrent.futures', 'numpy'})),
+    'bulk': (['-n', '1000', '--cat', 'all'], 400,
+             frozenset({'pydantic', 'msgspec', 'concurrent.futures'})),
+}
+_TOP_IMPORT_COUNT = 15
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+
+def _command(args: list[str], importtime: bool = False) -> list[str]:
+    return [sys.executable, *(['-X', 'importtime'] if importtime else []), '-m', 'qngng', *args]
+
+
+def wall_time_ms(args: list[str]) -> float:
+    begin = time.perf_counter()
+    subprocess.run(_command(args), check=True, stdout=subprocess.DEVNULL, cwd=ROOT_DIR)
+    return (time.perf_counter() - begin) * 1000
+
+
+# Returns the cumulative import time (µs) of each imported module.
+def _import_times(args: list[str]) -> dict[str, int]:
+    result = subprocess.run(_command(args, True), check=True, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, cwd=ROOT_DIR,
+                            env=os.environ | {'PYTHONDONTWRITEBYTECODE': ''})
+    times: dict[str, int] = {}
+
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, module = line.split('|')
+        times[module.strip()] = int(cumulative)
+
+    return times
+
+
+def _run_scenario(args: list[str], runs: int) -> dict[str, typing.Any]:
+    # warm up the bytecode cache first
+    wall_time_ms(args)
+    median = statistics.median(wall_time_ms(args) for _ in range(runs))
+    times = _import_times(args)
+    top = sorted(times.items(), key=lambda item: item[1], reverse=True)[:_TOP_IMPORT_COUNT]
+    return {
+        'median_ms': round(median, 2),
+        'modules': sorted(times),
+        'top_imports_us': dict(top),
+    }
+
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(description='Check the qngng CLI startup budget.')
+    parser.add_argument('--runs', type=int, default=10, help='runs per scenario')
+    parser.add_argument('--write', type=pathlib.Path, help='save the results as JSON to this file')
+    args = parser.parse_args()
+    results: dict[str, typing.Any] = {}
+    failures: list[str] = []
+
+    for name, (cli_args, budget, forbidden) in SCENARIOS.items():
+        result = _run_scenario(cli_args, args.runs)
+        results[name] = result
+        print(f'{name}: {result["median_ms"]:.1f} ms (budget: {budget} ms)')
+
+        for module, us in result['top_imports_us'].items():
+            print(f'  {us / 1000:8.2f} ms  {module}')
+
+        if result['median_ms'] > budget:
+            failures.append(f'{name}: over budget ({result["median_ms"]:.1f} ms > {budget} ms)')
+
+        for module in sorted(forbidden & set(result['modules'])):
+            failures.append(f'{name}: imports `{module}`')
+
+    if args.write is not None:
+        record = {
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'scenarios': {name: {key: value for key, value in result.items() if key != 'modules'}
+                          for name, result in results.items()},
+        }
+        args.write.write_text(json.dumps(record, indent=2) + '\n')
+
+    for failure in failures:
+        print(f'FAIL: {failure}', file=sys.stderr)
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    _main()
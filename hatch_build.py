@@ -0,0 +1,45 @@
+# MIT License
+#
+# Copyright (c) 2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import importlib.util
+import pathlib
+import typing
+
+from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+
+
+# Compiles `qngng/cats/*.json` into `qngng/cats.pack` within the wheel.
+class CustomBuildHook(BuildHookInterface[typing.Any]):
+    def initialize(self, version: str, build_data: dict[str, typing.Any]) -> None:
+        root = pathlib.Path(self.root)
+
+        # load the module by path: the package dependencies aren't available here
+        spec = importlib.util.spec_from_file_location('_qngng_pack', root / 'qngng' / '_pack.py')
+        assert spec is not None and spec.loader is not None
+        pack_mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(pack_mod)
+        out_dir = pathlib.Path(self.directory) / '.qngng-pack'
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_path = out_dir / pack_mod.FILENAME
+        pack_mod.write_pack(root / 'qngng' / 'cats', self.metadata.version, out_path)
+        build_data['force_include'][str(out_path)] = f'qngng/{pack_mod.FILENAME}'
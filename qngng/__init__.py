@@ -25,4 +25,26 @@
 __version__ = '2.1.1'
 __description__ = 'The Queb name generator: next generation'
 
-from qngng.qngng import Category, Format, FullName, Gender, NameGenerator, PartialName, format_name
+__all__ = ['Backend', 'Category', 'CategoryFile', 'Constraints', 'Format', 'FullName', 'Gender',
+           'Ledger', 'NameGenerator', 'NameTuple', 'OutputFormat', 'PartialName', 'Stats',
+           'ThreadSafeNameGenerator', 'disable_stats', 'enable_stats', 'format_name',
+           'generate_parallel', 'generate_parallel_records', 'get_stats']
+
+# `typing` itself isn't imported to keep `qngng --version` fast
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from qngng.qngng import (Backend, Category, CategoryFile, Constraints, Format, FullName,
+                             Gender, Ledger, NameGenerator, NameTuple, OutputFormat, PartialName,
+                             Stats, ThreadSafeNameGenerator, disable_stats, enable_stats,
+                             format_name, generate_parallel, generate_parallel_records, get_stats)
+
+
+# The public names are imported on first access so that importing
+# `qngng` (for example, to run the CLI) stays cheap.
+def __getattr__(name: str) -> object:
+    if name in __all__:
+        import qngng.qngng
+        return getattr(qngng.qngng, name)
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,39 @@
+# MIT License
+#
+# Copyright (c) 2018 Antoine Busque
+# Copyright (c) 2018-2020 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+
+import sys
+import qngng
+
+
+def main() -> None:
+    # answer `--version` without importing the CLI framework
+    if sys.argv[1:] in (['--version'], ['-V']):
+        print(f'qngng {qngng.__version__}')
+        return
+
+    from qngng import _cli
+    _cli._app(prog_name='qngng')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+# MIT License
+#
+# Copyright (c) 2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Persistent user cache of prepared categories.
+#
+# The cache is a single `marshal` file which maps each category
+# resource stem to its name, surname, and weight columns as tuples of
+# interned strings and integers: loading it is faster than decoding the
+# JSON resources or reading a pack column by column, and doesn't import
+# anything.
+#
+# The file name contains the package version and a CRC-32 of each
+# resource (`hashlib` is slower to import than reading the whole cache)
+# so that an upgrade or a modified resource selects another file
+# instead of a stale one. Writers replace the file atomically,
+# therefore concurrent processes may share the cache directory.
+
+import marshal
+import os
+import pathlib
+import time
+import typing
+import zlib
+
+# name, surname, and weight columns
+CachedColumns = tuple[tuple[str, ...] | None, tuple[str, ...] | None, tuple[int, ...] | None]
+
+_PREFIX = 'cats-'
+_SUFFIX = '.marshal'
+
+
+# Returns the cache directory: `$QNGNG_CACHE_DIR` or
+# `$XDG_CACHE_HOME/qngng`, or `None` if `QNGNG_CACHE_DIR` is empty
+# (disabled cache).
+def cache_dir() -> pathlib.Path | None:
+    path = os.environ.get('QNGNG_CACHE_DIR')
+
+    if path is not None:
+        return pathlib.Path(path) if path else None
+
+    # the XDG specification says to ignore a relative path
+    base = os.environ.get('XDG_CACHE_HOME', '')
+
+    if not os.path.isabs(base):
+        try:
+            base = pathlib.Path.home() / '.cache'
+        except RuntimeError:
+            return None
+
+    return pathlib.Path(base) / 'qngng'
+
+
+# Returns the path of the cache file for the `*.json` resources of
+# `cats_dir` and the package version `version` within `dir_path`.
+def cache_path(dir_path: pathlib.Path, cats_dir: pathlib.Path, version: str) -> pathlib.Path:
+    crc = 0
+
+    for path in sorted(cats_dir.glob('*.json')):
+        content = path.read_bytes()
+        crc = zlib.crc32(f'{path.stem}:{len(content)}:'.encode(), crc)
+        crc = zlib.crc32(content, crc)
+
+    return dir_path / f'{_PREFIX}{version}-{crc:08x}{_SUFFIX}'
+
+
+def _is_str_column(column: object) -> bool:
+    return column is None or (isinstance(column, tuple) and
+                              all(type(item) is str for item in column))
+
+
+def _read(path: pathlib.Path) -> object:
+    try:
+        return marshal.loads(path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _write(path: pathlib.Path, data: object) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}-{os.urandom(4).hex()}.tmp')
+
+    try:
+        tmp_path.write_bytes(marshal.dumps(data))
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def load(path: pathlib.Path) -> dict[str, CachedColumns] | None:
+    data = _read(path)
+
+    # reject anything unexpected, like a truncated or foreign file
+    if not isinstance(data, dict):
+        return None
+
+    for stem, columns in typing.cast(dict[object, object], data).items():
+        if not isinstance(stem, str) or not isinstance(columns, tuple):
+            return None
+
+        columns = typing.cast(tuple[object, ...], columns)
+
+        if len(columns) != 3 or not _is_str_column(columns[0]) or not _is_str_column(columns[1]):
+            return None
+
+        if columns[2] is not None and not isinstance(columns[2], tuple):
+            return None
+
+    return typing.cast(dict[str, CachedColumns], data)
+
+
+# Writes `cats` to `path` atomically, then removes the other cache
+# files of its directory.
+def store(path: pathlib.Path, cats: dict[str, CachedColumns]) -> None:
+    _write(path, cats)
+
+    for other_path in path.parent.glob(f'{_PREFIX}*{_SUFFIX}'):
+        if other_path != path:
+            try:
+                other_path.unlink()
+            except OSError:
+                pass
+
+
+# Category file indexes (see `qngng._catfile`).
+#
+# The index of a category file is kept in a file named after its path,
+# with a key (path, size, modification time, and index format version)
+# of which any change makes the cached index stale.
+#
+# Loading an index updates the modification time of its file: storing
+# an index removes the least recently used ones beyond
+# `_MAX_INDEX_COUNT` and the ones unused for `_MAX_INDEX_AGE` seconds,
+# for example the indexes of deleted temporary files.
+_INDEX_PREFIX = 'index-'
+_MAX_INDEX_COUNT = 32
+_MAX_INDEX_AGE = 30 * 24 * 3600
+
+
+def index_path(dir_path: pathlib.Path, source_path: pathlib.Path) -> pathlib.Path:
+    return dir_path / f'{_INDEX_PREFIX}{zlib.crc32(str(source_path).encode()):08x}{_SUFFIX}'
+
+
+def load_index(path: pathlib.Path, key: tuple[object, ...]) -> tuple[object, ...] | None:
+    data = _read(path)
+
+    if not isinstance(data, tuple) or len(typing.cast(tuple[object, ...], data)) != 2:
+        return None
+
+    data_key, index = typing.cast(tuple[object, object], data)
+
+    if data_key != key or not isinstance(index, tuple):
+        return None
+
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    return typing.cast(tuple[object, ...], index)
+
+
+def store_index(path: pathlib.Path, key: tuple[object, ...], index: tuple[object, ...]) -> None:
+    _write(path, (key, index))
+    index_paths: list[tuple[float, pathlib.Path]] = []
+
+    for other_path in path.parent.glob(f'{_INDEX_PREFIX}*{_SUFFIX}'):
+        try:
+            index_paths.append((other_path.stat().st_mtime, other_path))
+        except OSError:
+            pass
+
+    index_paths.sort(reverse=True)
+    now = time.time()
+
+    for i, (mtime, other_path) in enumerate(index_paths):
+        if other_path != path and (i >= _MAX_INDEX_COUNT or now - mtime > _MAX_INDEX_AGE):
+            try:
+                other_path.unlink()
+            except OSError:
+                pass
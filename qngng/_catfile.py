@@ -0,0 +1,455 @@
+# MIT License
+#
+# Copyright (c) 2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# External category files.
+#
+# A category file holds entries with `name`, `surname`, `gender`
+# (`male`/`m` or `female`/`f`), and optional `weight` fields in one of
+# the following formats, depending on its extension:
+#
+# `.jsonl`, `.ndjson`:
+#     One JSON object per line, like what
+#     `qngng --output-format=jsonl` writes.
+#
+# `.csv`:
+#     A header row naming the columns, then one row per line (quoted
+#     fields may not contain line breaks).
+#
+# `.pack`:
+#     A category pack (see `qngng._pack`) of which the `*-m` and `*-f`
+#     tables hold the male and female entries.
+#
+# Incomplete entries are skipped: an entry with a name needs a surname
+# and a gender, as a name tuple always has a gender. A file without any
+# name is a surname file: its entries only need a surname, and the name
+# generator pairs them with the first names of the std category.
+#
+# Nothing is decoded up front: the file is memory-mapped, and a single
+# pass builds an index of the rows (byte offsets, or pack rows) of the
+# usable entries, by gender, with their weights. The columns of a
+# `CatFile` then decode an entry on access, so that a huge file is
+# sampled without keeping all its entries in memory. The index is kept
+# in the user cache (see `qngng._cache`) until the file changes.
+
+import abc
+import array
+import bisect
+import collections.abc
+import csv
+import mmap
+import os
+import pathlib
+import qngng._cache
+import qngng._pack
+import typing
+from qngng.qngng import Gender
+
+# version of the cached index format
+_INDEX_VERSION = 1
+
+_GENDERS = {
+    'male': Gender.MALE,
+    'm': Gender.MALE,
+    'female': Gender.FEMALE,
+    'f': Gender.FEMALE,
+}
+
+# name, surname, gender, and weight of an entry, as found in the file
+_RawEntry = tuple[str | None, str | None, str | None, int | None]
+
+
+# Reader of the entries of a category file.
+#
+# `rows()` yields each row with its entry, and `entry()` returns the
+# name and surname of a row. The last read entry is kept so that
+# getting the name, then the surname, of an entry only decodes it once.
+class _Reader(abc.ABC):
+    def __init__(self) -> None:
+        self._last: tuple[int, tuple[str, str]] = (-1, ('', ''))
+
+    @abc.abstractmethod
+    def rows(self) -> typing.Iterator[tuple[int, _RawEntry]]:
+        ...
+
+    @abc.abstractmethod
+    def _decode(self, row: int) -> tuple[str, str]:
+        ...
+
+    def entry(self, row: int) -> tuple[str, str]:
+        last_row, last_entry = self._last
+
+        if row == last_row:
+            return last_entry
+
+        entry = self._decode(row)
+        self._last = row, entry
+        return entry
+
+
+# Yields the byte offset and contents of each non-blank line of `data`
+# from `begin`.
+def _lines(data: mmap.mmap, begin: int = 0) -> typing.Iterator[tuple[int, bytes]]:
+    size = len(data)
+
+    while begin < size:
+        end = data.find(b'\n', begin)
+
+        if end < 0:
+            end = size
+
+        line = data[begin:end]
+
+        if line.strip():
+            yield begin, line
+
+        begin = end + 1
+
+
+def _line_at(data: mmap.mmap, begin: int) -> bytes:
+    end = data.find(b'\n', begin)
+    return data[begin:end if end >= 0 else len(data)]
+
+
+class _JsonlReader(_Reader):
+    def __init__(self, data: mmap.mmap) -> None:
+        import msgspec
+        from qngng._json import JsonEntry
+
+        super().__init__()
+        self._data = data
+        self._decoder = msgspec.json.Decoder(JsonEntry)
+
+    def _decode_line(self, line: bytes, begin: int) -> typing.Any:
+        try:
+            return self._decoder.decode(line)
+        except ValueError as exc:
+            raise ValueError(f'Invalid JSON entry at byte {begin}: {exc}') from None
+
+    def rows(self) -> typing.Iterator[tuple[int, _RawEntry]]:
+        for begin, line in _lines(self._data):
+            entry = self._decode_line(line, begin)
+            yield begin, (entry.name, entry.surname, entry.gender, entry.weight)
+
+    def _decode(self, row: int) -> tuple[str, str]:
+        entry = self._decode_line(_line_at(self._data, row), row)
+        return entry.name or '', entry.surname or ''
+
+
+def _split_csv_line(line: bytes) -> list[str]:
+    text = line.decode().rstrip('\r')
+
+    # most lines don't need an actual CSV parser
+    if '"' not in text:
+        return text.split(',')
+
+    return next(csv.reader((text,)))
+
+
+class _CsvReader(_Reader):
+    def __init__(self, data: mmap.mmap) -> None:
+        super().__init__()
+        self._data = data
+        header = _line_at(data, 0)
+        self._body_begin = len(header) + 1
+        columns = [column.strip().lower() for column in _split_csv_line(header)]
+
+        if 'surname' not in columns:
+            raise ValueError('The CSV header has no `surname` column')
+
+        def column_index(name: str) -> int:
+            return columns.index(name) if name in columns else -1
+
+        self._name_index = column_index('name')
+        self._surname_index = column_index('surname')
+        self._gender_index = column_index('gender')
+        self._weight_index = column_index('weight')
+
+    def _field(self, fields: list[str], index: int) -> str | None:
+        return fields[index] if 0 <= index < len(fields) else None
+
+    def rows(self) -> typing.Iterator[tuple[int, _RawEntry]]:
+        for begin, line in _lines(self._data, self._body_begin):
+            fields = _split_csv_line(line)
+            weight = self._field(fields, self._weight_index)
+
+            try:
+                int_weight = int(weight) if weight else None
+            except ValueError:
+                raise ValueError(f'Invalid weight `{weight}` at byte {begin}') from None
+
+            yield begin, (self._field(fields, self._name_index),
+                          self._field(fields, self._surname_index),
+                          self._field(fields, self._gender_index), int_weight)
+
+    def _decode(self, row: int) -> tuple[str, str]:
+        fields = _split_csv_line(_line_at(self._data, row))
+        return (self._field(fields, self._name_index) or '',
+                self._field(fields, self._surname_index) or '')
+
+
+# A pack row is a row of the concatenation of its tables.
+class _PackReader(_Reader):
+    def __init__(self, data: mmap.mmap) -> None:
+        super().__init__()
+        pack = qngng._pack.Pack(data)
+        self._tables: list[tuple[qngng._pack.Columns, str | None]] = []
+        self._begins: list[int] = []
+        begin = 0
+
+        for stem in pack.stems():
+            columns = pack.columns(stem)
+            assert columns is not None
+            gender = stem.rsplit('-', 1)[-1] if '-' in stem else None
+            self._tables.append((columns, gender))
+            self._begins.append(begin)
+            begin += len(columns.name or columns.surname or ())
+
+    def rows(self) -> typing.Iterator[tuple[int, _RawEntry]]:
+        for begin, (columns, gender) in zip(self._begins, self._tables):
+            names = columns.name
+            surnames = columns.surname
+            weights = columns.weight
+
+            for index in range(len(names or surnames or ())):
+                yield begin + index, (names[index] if names is not None else None,
+                                      surnames[index] if surnames is not None else None, gender,
+                                      weights[index] if weights is not None else None)
+
+    def _decode(self, row: int) -> tuple[str, str]:
+        table_index = bisect.bisect_right(self._begins, row) - 1
+        columns = self._tables[table_index][0]
+        index = row - self._begins[table_index]
+        return (columns.name[index] if columns.name is not None else '',
+                columns.surname[index] if columns.surname is not None else '')
+
+
+_READERS: dict[str, typing.Callable[[mmap.mmap], _Reader]] = {
+    '.jsonl': _JsonlReader,
+    '.ndjson': _JsonlReader,
+    '.csv': _CsvReader,
+    '.pack': _PackReader,
+}
+
+
+# Column of category file entries: `part` is 0 for the names and 1 for
+# the surnames.
+class EntryColumn(collections.abc.Sequence[str]):
+    def __init__(self, reader: _Reader, rows: 'array.array[int]', part: int) -> None:
+        self._reader = reader
+        self._rows = rows
+        self._part = part
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @typing.overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @typing.overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        return self._reader.entry(self._rows[index])[self._part]
+
+
+# Rows and weights (`None` without any weight in the file) of the male
+# entries, of the female entries, and of the surnames.
+class _Index(typing.NamedTuple):
+    has_names: bool
+    male_rows: 'array.array[int]'
+    male_weights: 'array.array[int] | None'
+    female_rows: 'array.array[int]'
+    female_weights: 'array.array[int] | None'
+    surname_rows: 'array.array[int]'
+    surname_weights: 'array.array[int] | None'
+
+    def to_data(self) -> tuple[object, ...]:
+        return (self.has_names,) + tuple(None if arr is None else (arr.typecode, arr.tobytes())
+                                         for arr in self[1:])
+
+    @staticmethod
+    def from_data(data: tuple[object, ...]) -> '_Index | None':
+        try:
+            has_names = data[0]
+            arrays: list[array.array[int] | None] = []
+
+            for item in data[1:]:
+                if item is None:
+                    arrays.append(None)
+                else:
+                    typecode, raw = typing.cast(tuple[str, bytes], item)
+                    arr = array.array(typecode)
+                    arr.frombytes(raw)
+                    arrays.append(arr)
+
+            index = _Index(bool(has_names), *arrays)  # pyright: ignore[reportArgumentType]
+        except (TypeError, ValueError):
+            return None
+
+        if None in (index.male_rows, index.female_rows, index.surname_rows):
+            return None
+
+        return index
+
+
+def _build_index(reader: _Reader, row_typecode: str) -> _Index:
+    rows = {Gender.MALE: array.array(row_typecode), Gender.FEMALE: array.array(row_typecode)}
+    weights = {Gender.MALE: array.array('I'), Gender.FEMALE: array.array('I')}
+    surname_rows = array.array(row_typecode)
+    surname_weights = array.array('I')
+    has_names = has_weights = False
+
+    for row, (name, surname, gender, weight) in reader.rows():
+        if not surname:
+            continue
+
+        if weight is None:
+            weight = 1
+        elif weight < 0:
+            raise ValueError(f'Negative weight {weight}')
+        else:
+            has_weights = True
+
+        surname_rows.append(row)
+        surname_weights.append(weight)
+
+        if name:
+            has_names = True
+            entry_gender = _GENDERS.get((gender or '').strip().lower())
+
+            if entry_gender is not None:
+                rows[entry_gender].append(row)
+                weights[entry_gender].append(weight)
+
+    def final_weights(arr: 'array.array[int]') -> 'array.array[int] | None':
+        return arr if has_weights else None
+
+    if has_names:
+        # the surname rows are only needed for a surname file
+        surname_rows = array.array(row_typecode)
+        surname_weights = array.array('I')
+
+    return _Index(has_names, rows[Gender.MALE], final_weights(weights[Gender.MALE]),
+                  rows[Gender.FEMALE], final_weights(weights[Gender.FEMALE]), surname_rows,
+                  final_weights(surname_weights))
+
+
+def _load_index(path: pathlib.Path, reader: _Reader, size: int) -> _Index:
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns, _INDEX_VERSION)
+    cache_dir = qngng._cache.cache_dir()
+    index_path = None
+
+    if cache_dir is not None:
+        index_path = qngng._cache.index_path(cache_dir, path)
+        data = qngng._cache.load_index(index_path, key)
+
+        if data is not None:
+            index = _Index.from_data(data)
+
+            if index is not None:
+                return index
+
+    # row offsets fit in 32 bits for most files
+    index = _build_index(reader, 'I' if size < 1 << 32 else 'Q')
+
+    if index_path is not None:
+        try:
+            qngng._cache.store_index(index_path, key, index.to_data())
+        except OSError:
+            pass
+
+    return index
+
+
+class CatFile:
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._path = pathlib.Path(path).resolve()
+        make_reader = _READERS.get(self._path.suffix.lower())
+
+        if make_reader is None:
+            raise ValueError(f'Unknown category file format: `{self._path}` (expecting '
+                             'a `.jsonl`, `.ndjson`, `.csv`, or `.pack` file)')
+
+        with open(self._path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+
+            if size == 0:
+                raise ValueError(f'Empty category file `{self._path}`')
+
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._reader = make_reader(data)
+
+        try:
+            self._index = _load_index(self._path, self._reader, size)
+        except ValueError as exc:
+            raise ValueError(f'`{self._path}`: {exc}') from None
+
+        index = self._index
+
+        if len(index.male_rows) + len(index.female_rows) + len(index.surname_rows) == 0:
+            if index.has_names:
+                raise ValueError(f'No complete entry in `{self._path}`: an entry with a name '
+                                 'needs a surname and a gender (`male` or `female`)')
+
+            raise ValueError(f'No complete entry in `{self._path}`')
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self._path
+
+    # whether the entries are complete names, not only surnames
+    @property
+    def has_names(self) -> bool:
+        return self._index.has_names
+
+    # Returns the names, the surnames, the number of male entries (which
+    # come first), and the weights of the entries of gender `gender`
+    # (any gender if `None`).
+    def entries(self, gender: Gender | None) -> tuple[EntryColumn, EntryColumn, int,
+                                                      'array.array[int] | None']:
+        index = self._index
+
+        if gender == Gender.MALE:
+            rows, weights = index.male_rows, index.male_weights
+        elif gender == Gender.FEMALE:
+            rows, weights = index.female_rows, index.female_weights
+        else:
+            rows = index.male_rows + index.female_rows
+            weights = None
+
+            if index.male_weights is not None and index.female_weights is not None:
+                weights = index.male_weights + index.female_weights
+
+        male_count = 0 if gender == Gender.FEMALE else len(index.male_rows)
+        return (EntryColumn(self._reader, rows, 0), EntryColumn(self._reader, rows, 1),
+                male_count, weights)
+
+    # Returns the surnames and weights of a surname file.
+    def surnames(self) -> tuple[EntryColumn, 'array.array[int] | None']:
+        return (EntryColumn(self._reader, self._index.surname_rows, 1),
+                self._index.surname_weights)
@@ -0,0 +1,532 @@
+# MIT License
+#
+# Copyright (c) 2018 Antoine Busque
+# Copyright (c) 2018-2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import itertools
+import os
+import pathlib
+import qngng
+import random
+import sys
+import time
+import typer
+import typing
+from qngng.qngng import (Backend, Category, CategoryFile, Constraints, Format, Gender,
+                         InputFormat, NameGenerator, OutputFormat,
+                         _batch_sizes, _expand_categories, disable_stats, enable_stats,
+                         format_name, generate_parallel, generate_parallel_records)
+
+
+def _spin_wheel(generator: NameGenerator, fmt: Format, middle_initial: bool) -> None:
+    x = 0.0
+    prev_name_len = 0
+
+    while True:
+        name = format_name(generator.random_name_tuple(), fmt, middle_initial)
+        sys.stdout.write('\r')
+        sys.stdout.write(' ' * prev_name_len)
+        sys.stdout.write('\r')
+        prev_name_len = len(name)
+        sys.stdout.write(name)
+        sys.stdout.flush()
+        dur = x**10 + 0.05
+        x += 0.02
+
+        if x <= 1.05:
+            time.sleep(dur)
+        else:
+            break
+
+    print()
+
+
+_WRITE_BATCH_SIZE = 4096
+
+
+def _batch_names(names: typing.Iterator[str]) -> typing.Iterator[str]:
+    while True:
+        batch = list(itertools.islice(names, _WRITE_BATCH_SIZE))
+
+        if not batch:
+            break
+
+        batch.append('')
+        yield '\n'.join(batch)
+
+
+def _write_chunks(chunks: typing.Iterator[str] | typing.Iterator[bytes],
+                  binary: bool = False) -> None:
+    out: typing.IO[typing.Any] = sys.stdout.buffer if binary else sys.stdout
+
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+
+        out.flush()
+    except BrokenPipeError:
+        # downstream reader is gone (for example, `qngng -n 0 | head`)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, out.fileno())
+        raise typer.Exit(1)
+
+
+# Writes the records of `count` names (`0` means unbounded) with the
+# output format `output_format`, with the parallel engine if `parallel`
+# is true.
+def _write_records(generator: NameGenerator, output_format: OutputFormat, count: int,
+                   unique: bool, parallel: bool, jobs: int, ordered: bool,
+                   backend: Backend) -> None:
+    from qngng import _output
+
+    writer = _output.RecordWriter(output_format)
+    chunks: typing.Iterator[bytes]
+
+    if parallel:
+        chunks = generate_parallel_records(generator, count or None, jobs, output_format, unique,
+                                           ordered, backend=backend)
+    elif unique:
+        name_tuples = generator.iter_unique_name_tuples()
+        chunks = (writer.encode(itertools.islice(name_tuples, batch_size))
+                  for batch_size in _batch_sizes(count or generator.space_size(),
+                                                 _WRITE_BATCH_SIZE))
+    else:
+        chunks = (writer.encode(generator.random_name_tuples(batch_size, backend))
+                  for batch_size in _batch_sizes(count or None, _WRITE_BATCH_SIZE))
+
+    _write_chunks(itertools.chain((writer.header(),), chunks), True)
+
+
+def _format(snake_case: bool, kebab_case: bool, camel_case: bool, cap_camel_case: bool) -> Format:
+    if sum([snake_case, kebab_case, camel_case, cap_camel_case]) > 1:
+        raise typer.BadParameter('Cannot specify more than one format option.')
+
+    if snake_case:
+        return Format.SNAKE
+
+    if kebab_case:
+        return Format.KEBAB
+
+    if camel_case:
+        return Format.CAMEL
+
+    if cap_camel_case:
+        return Format.CAP_CAMEL
+
+    return Format.DEFAULT
+
+
+# Writes `count` names (`0` means unbounded) which the ledger file
+# `path` doesn't hold, adding them to it.
+def _write_ledger_names(generator: NameGenerator, path: pathlib.Path, count: int, fmt: Format,
+                        middle_initial: bool, backend: Backend) -> None:
+    from qngng._ledger import Ledger
+
+    error: Exception | None = None
+
+    # the ledger holds the names of a failed run too: write them
+    def names(ledger: Ledger) -> typing.Iterator[str]:
+        nonlocal error
+
+        try:
+            yield from generator.iter_ledger_names(ledger, count or None, fmt, middle_initial,
+                                                   backend)
+        except ValueError as exc:
+            error = exc
+
+    try:
+        with Ledger(path) as ledger:
+            _write_chunks(_batch_names(names(ledger)))
+    except OSError as exc:
+        error = exc
+
+    if error is not None:
+        print(f'Error: {error}.', file=sys.stderr)
+        raise typer.Exit(1)
+
+
+_app = typer.Typer(
+    name='qngng',
+    help=qngng.__description__,
+    add_completion=True,
+    pretty_exceptions_enable=False,
+)
+
+
+def _version_callback(value: bool) -> None:
+    if value:
+        print(f'qngng {qngng.__version__}')
+        raise typer.Exit()
+
+
+@_app.callback(invoke_without_command=True)
+def _main(  # pyright: ignore[reportUnusedFunction]
+    ctx: typer.Context,
+    gender: typing.Annotated[
+        Gender | None, typer.Option('--gender', '-g', help='Generate a male or female name'),
+    ] = None,
+    male: typing.Annotated[
+        bool, typer.Option('--male', '-m', help='Shorthand for `--gender=male`'),
+    ] = False,
+    female: typing.Annotated[
+        bool, typer.Option('--female', '-f', help='Shorthand for `--gender=female`'),
+    ] = False,
+    snake_case: typing.Annotated[
+        bool, typer.Option('--snake-case', '-s', help='Print name in `snake_case` format'),
+    ] = False,
+    kebab_case: typing.Annotated[
+        bool, typer.Option('--kebab-case', '-k', help='Print name in `kebab-case` format'),
+    ] = False,
+    camel_case: typing.Annotated[
+        bool, typer.Option('--camel-case', '-C', help='Print name in `camelCase` format'),
+    ] = False,
+    cap_camel_case: typing.Annotated[
+        bool, typer.Option('--cap-camel-case', help='Print name in `CapitalizedCamelCase` format'),
+    ] = False,
+    cat: typing.Annotated[
+        list[Category] | None, typer.Option('--cat', '-c', help='Category name (can be repeated)'),
+    ] = None,
+    cat_file: typing.Annotated[
+        list[pathlib.Path] | None,
+        typer.Option('--cat-file', exists=True, dir_okay=False,
+                     help='JSON Lines, CSV, or pack file of a custom category (can be repeated)'),
+    ] = None,
+    double_surname: typing.Annotated[
+        bool, typer.Option('--double-surname', '-d',
+                           help='Create a double-barrelled surname (only for the `std` category)'),
+    ] = False,
+    middle_initial: typing.Annotated[
+        bool, typer.Option('--middle-initial', '-I',
+                           help='Generate a middle initial (only for `std` category)'),
+    ] = False,
+    middle_name: typing.Annotated[
+        bool, typer.Option('--middle-name', '-M',
+                           help='Generate a middle name (only for `std` category)'),
+    ] = False,
+    count: typing.Annotated[
+        int, typer.Option('--count', '-n', min=0,
+                          help='Number of names to generate (0 means unbounded)'),
+    ] = 1,
+    weighted: typing.Annotated[
+        bool, typer.Option('--weighted',
+                           help='Pick popular names more often (only for the `std` category)'),
+    ] = False,
+    unique: typing.Annotated[
+        bool, typer.Option('--unique', '-u',
+                           help='Never generate the same name twice (with `--count`)'),
+    ] = False,
+    seed: typing.Annotated[
+        int | None, typer.Option('--seed', help='Seed of the random number generator'),
+    ] = None,
+    jobs: typing.Annotated[
+        int, typer.Option('--jobs', '-j', min=0,
+                          help='Number of worker processes (with `--count`; 0 means one per CPU)'),
+    ] = 1,
+    unordered: typing.Annotated[
+        bool, typer.Option('--unordered',
+                           help='With `--jobs`, write chunks as soon as they are ready'),
+    ] = False,
+    backend: typing.Annotated[
+        Backend, typer.Option('--backend', help='Batch generation backend (with `--count`)'),
+    ] = Backend.PYTHON,
+    initial: typing.Annotated[
+        str | None, typer.Option('--initial', help='First letter of the name'),
+    ] = None,
+    surname_prefix: typing.Annotated[
+        str | None, typer.Option('--surname-prefix', help='Prefix of the surname'),
+    ] = None,
+    alliterative: typing.Annotated[
+        bool, typer.Option('--alliterative',
+                           help='Generate a name and a surname starting with the same letter'),
+    ] = False,
+    max_length: typing.Annotated[
+        int | None, typer.Option('--max-length', min=1,
+                                 help='Maximum length of the printed name'),
+    ] = None,
+    output_format: typing.Annotated[
+        OutputFormat, typer.Option('--output-format',
+                                   help='Output format: formatted names or records with the '
+                                        'name, middle name, surname, gender, and category'),
+    ] = OutputFormat.TEXT,
+    ledger: typing.Annotated[
+        pathlib.Path | None,
+        typer.Option('--ledger', dir_okay=False,
+                     help='Never generate a name which this file holds, and add the generated '
+                          'ones to it'),
+    ] = None,
+    stats: typing.Annotated[
+        bool, typer.Option('--stats',
+                           help='Print call counts, loaded entries, and time per phase to the '
+                                'standard error (worker processes excluded)'),
+    ] = False,
+    wheel: typing.Annotated[
+        bool, typer.Option('--wheel', '-w',
+                           help='Spin a wheel to find a name (interactive use only)'),
+    ] = False,
+    version: typing.Annotated[
+        bool, typer.Option('--version', '-V', callback=_version_callback, is_eager=True,
+                           help='Show version and exit'),
+    ] = False,
+) -> None:
+    if ctx.invoked_subcommand is not None:
+        return
+
+    gender_opts = sum([gender is not None, male, female])
+
+    if gender_opts > 1:
+        raise typer.BadParameter('Cannot specify more than one option amongst `--gender`, `--male`, and `--female`.')
+
+    if middle_name and middle_initial:
+        raise typer.BadParameter('Cannot specify both `--middle-initial` and `--middle-name`.')
+
+    if wheel and count != 1:
+        raise typer.BadParameter('Cannot specify both `--wheel` and `--count`.')
+
+    if unique and middle_initial:
+        raise typer.BadParameter('Cannot specify both `--unique` and `--middle-initial`.')
+
+    if unique and weighted:
+        raise typer.BadParameter('Cannot specify both `--unique` and `--weighted`.')
+
+    fmt = _format(snake_case, kebab_case, camel_case, cap_camel_case)
+
+    if output_format != OutputFormat.TEXT:
+        if fmt != Format.DEFAULT or middle_initial:
+            raise typer.BadParameter('Cannot specify a format option or `--middle-initial` with `--output-format`.')
+
+        if wheel:
+            raise typer.BadParameter('Cannot specify both `--wheel` and `--output-format`.')
+
+    constrained = (initial is not None or surname_prefix is not None or alliterative or
+                   max_length is not None)
+
+    if unique and constrained:
+        raise typer.BadParameter('Cannot specify both `--unique` and a constraint option.')
+
+    if ledger is not None:
+        if unique or wheel or output_format != OutputFormat.TEXT or jobs != 1:
+            raise typer.BadParameter('Cannot specify `--ledger` with `--unique`, `--wheel`, `--output-format`, or `--jobs`.')
+
+    rng = random.Random(seed)
+    resolved_gender: Gender | None = gender
+
+    if male:
+        resolved_gender = Gender.MALE
+    elif female:
+        resolved_gender = Gender.FEMALE
+    elif resolved_gender is None and count == 1 and not constrained:
+        resolved_gender = rng.choice([Gender.MALE, Gender.FEMALE])
+
+    categories: frozenset[Category | CategoryFile] = frozenset()
+
+    # `std` is the default category without category files
+    if cat or not cat_file:
+        categories = _expand_categories(cat)
+
+    categories |= {CategoryFile(str(path)) for path in cat_file or ()}
+
+    # a surname file also supports those options
+    if not cat_file:
+        if double_surname and Category.STD not in categories:
+            raise typer.BadParameter('Cannot specify `--double-surname` without the `std` category.')
+
+        if middle_name and Category.STD not in categories:
+            raise typer.BadParameter('Cannot specify `--middle-name` without the `std` category.')
+
+        if middle_initial and Category.STD not in categories:
+            raise typer.BadParameter('Cannot specify `--middle-initial` without the `std` category.')
+
+    if stats:
+        enable_stats()
+
+    constraints = None
+
+    if constrained:
+        constraints = Constraints(initial, surname_prefix, alliterative, max_length, fmt,
+                                  middle_initial)
+
+    try:
+        generator = NameGenerator(2 if double_surname else 1, middle_name or middle_initial,
+                                  resolved_gender, categories, weighted, rng=rng,
+                                  constraints=constraints)
+
+        # report category file errors now
+        if cat_file:
+            generator.preload(with_formatting=False)
+    except ValueError as exc:
+        raise typer.BadParameter(f'{exc}.') from None
+
+    if unique:
+        space_size = generator.space_size()
+
+        if count > space_size:
+            raise typer.BadParameter(f'Cannot generate {count} unique names: only {space_size} exist.')
+
+    # a seeded run always goes through the chunks of the parallel
+    # engine so that its output doesn't depend on `--jobs`
+    parallel = count != 1 and (jobs != 1 or seed is not None)
+
+    try:
+        if wheel:
+            _spin_wheel(generator, fmt, middle_initial)
+        elif ledger is not None:
+            _write_ledger_names(generator, ledger, count, fmt, middle_initial, backend)
+        elif output_format != OutputFormat.TEXT:
+            _write_records(generator, output_format, count, unique, parallel, jobs,
+                           not unordered, backend)
+        elif parallel:
+            _write_chunks(generate_parallel(generator, count or None, jobs, fmt, middle_initial,
+                                            unique, not unordered, backend=backend))
+        elif unique:
+            name_tuples = itertools.islice(generator.iter_unique_name_tuples(), count or None)
+            _write_chunks(_batch_names(format_name(name_tuple, fmt, middle_initial)
+                                       for name_tuple in name_tuples))
+        elif count == 1:
+            print(format_name(generator.random_name_tuple(), fmt,
+                              with_middle_initial=middle_initial))
+        else:
+            _write_chunks(_batch_names(generator.iter_formatted_names(count or None, fmt,
+                                                                      middle_initial, backend)))
+    finally:
+        collected = disable_stats()
+
+        if collected is not None:
+            print(collected.format(), file=sys.stderr)
+
+
+@_app.command('serve', help='Serve names over HTTP, over TCP or a Unix domain socket')
+def _serve(  # pyright: ignore[reportUnusedFunction]
+    host: typing.Annotated[
+        str, typer.Option('--host', help='Address of the HTTP server'),
+    ] = '127.0.0.1',
+    port: typing.Annotated[
+        int, typer.Option('--port', '-p', min=0, max=65535,
+                          help='Port of the HTTP server (0 means any free port)'),
+    ] = 8363,
+    unix: typing.Annotated[
+        pathlib.Path | None, typer.Option('--unix', help='Listen on this Unix domain socket instead'),
+    ] = None,
+    seed: typing.Annotated[
+        int | None, typer.Option('--seed', help='Seed of the random number generators'),
+    ] = None,
+    max_count: typing.Annotated[
+        int, typer.Option('--max-count', min=1, help='Maximum number of names per request'),
+    ] = 100_000,
+) -> None:
+    import asyncio
+    from qngng import _server
+
+    server = _server.NameServer(seed, max_count)
+    server.preload()
+
+    def on_ready(address: str) -> None:
+        print(f'Listening on {address}', file=sys.stderr)
+
+    try:
+        asyncio.run(_server.serve(server, host, port, unix, on_ready))
+    except KeyboardInterrupt:
+        pass
+
+
+@_app.command('pseudonymize',
+              help='Replace names in CSV or JSON Lines records, from the standard input to the standard output')
+def _pseudonymize(  # pyright: ignore[reportUnusedFunction]
+    column: typing.Annotated[
+        list[str], typer.Option('--column', help='Name of a column to rewrite (can be repeated)'),
+    ],
+    key: typing.Annotated[
+        str, typer.Option('--key', envvar='QNGNG_PSEUDONYMIZE_KEY',
+                          help='Secret key of the mapping of values to names'),
+    ],
+    input_format: typing.Annotated[
+        InputFormat | None, typer.Option('--input-format',
+                                         help='Input format (default: detected)'),
+    ] = None,
+    gender: typing.Annotated[
+        Gender | None, typer.Option('--gender', '-g', help='Generate male or female names'),
+    ] = None,
+    snake_case: typing.Annotated[
+        bool, typer.Option('--snake-case', '-s', help='Write names in `snake_case` format'),
+    ] = False,
+    kebab_case: typing.Annotated[
+        bool, typer.Option('--kebab-case', '-k', help='Write names in `kebab-case` format'),
+    ] = False,
+    camel_case: typing.Annotated[
+        bool, typer.Option('--camel-case', '-C', help='Write names in `camelCase` format'),
+    ] = False,
+    cap_camel_case: typing.Annotated[
+        bool, typer.Option('--cap-camel-case', help='Write names in `CapitalizedCamelCase` format'),
+    ] = False,
+    cat: typing.Annotated[
+        list[Category] | None, typer.Option('--cat', '-c', help='Category name (can be repeated)'),
+    ] = None,
+    cat_file: typing.Annotated[
+        list[pathlib.Path] | None,
+        typer.Option('--cat-file', exists=True, dir_okay=False,
+                     help='JSON Lines, CSV, or pack file of a custom category (can be repeated)'),
+    ] = None,
+    double_surname: typing.Annotated[
+        bool, typer.Option('--double-surname', '-d',
+                           help='Create double-barrelled surnames (only for the `std` category)'),
+    ] = False,
+    middle_initial: typing.Annotated[
+        bool, typer.Option('--middle-initial', '-I',
+                           help='Generate middle initials (only for `std` category)'),
+    ] = False,
+    middle_name: typing.Annotated[
+        bool, typer.Option('--middle-name', '-M',
+                           help='Generate middle names (only for `std` category)'),
+    ] = False,
+    jobs: typing.Annotated[
+        int, typer.Option('--jobs', '-j', min=0,
+                          help='Number of worker processes (0 means one per CPU)'),
+    ] = 1,
+) -> None:
+    from qngng import _pseudo
+
+    if middle_name and middle_initial:
+        raise typer.BadParameter('Cannot specify both `--middle-initial` and `--middle-name`.')
+
+    if not key:
+        raise typer.BadParameter('The key must not be empty.')
+
+    categories: frozenset[Category | CategoryFile] = frozenset()
+
+    if cat or not cat_file:
+        categories = _expand_categories(cat)
+
+    categories |= {CategoryFile(str(path)) for path in cat_file or ()}
+    options = _pseudo.Options(key.encode(), tuple(column),
+                              _format(snake_case, kebab_case, camel_case, cap_camel_case),
+                              middle_initial, 2 if double_surname else 1, middle_name, gender,
+                              categories)
+
+    try:
+        _pseudo.pseudonymize(sys.stdin.buffer, sys.stdout.buffer, options, input_format, jobs)
+        sys.stdout.buffer.flush()
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        raise typer.Exit(1)
+    except ValueError as exc:
+        print(f'Error: {exc}.', file=sys.stderr)
+        raise typer.Exit(1)
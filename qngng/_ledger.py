@@ -0,0 +1,409 @@
+# MIT License
+#
+# Copyright (c) 2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+# Persistent ledger of issued names.
+#
+# A ledger is two files:
+#
+# `PATH`:
+#     The names log: one issued name per line (UTF-8), appended to.
+#     This is the source of truth.
+#
+# `PATH.index`:
+#     A memory-mapped index of the log, rebuilt from it when it's
+#     missing, invalid, or behind:
+#
+#     * Header (see `_HEADER`).
+#     * Bloom filter (one byte per slot, `_HASH_COUNT` bits per name)
+#       which rules out most new names without touching the table.
+#     * Open addressing table of 64-bit slots (linear probing): a
+#       24-bit tag of the name hash and 40-bit log offset plus one,
+#       zero meaning empty. Comparing the name at the offset makes the
+#       lookup exact.
+#
+#     The table is rebuilt twice as large when its load would exceed
+#     `_MAX_LOAD`, so that a lookup stays O(1). The index takes 13 to
+#     26 bytes per issued name.
+#
+# Each operation holds an exclusive lock on the log file so that many
+# processes may share a ledger. Appending to the log before updating
+# the index makes an interrupted operation harmless: the next one
+# indexes the lines which the index doesn't cover, and drops an
+# incomplete last line.
+#
+# A `Ledger` object isn't thread-safe.
+
+import contextlib
+import hashlib
+import mmap
+import os
+import pathlib
+import struct
+import sys
+import typing
+
+# magic, byte order, version, slot count, hash count, covered log
+# length, name count
+_HEADER = struct.Struct('<4s1sxxIQQQQ')
+_HEADER_SIZE = 64
+_MAGIC = b'QNGL'
+_VERSION = 1
+_BYTE_ORDER = sys.byteorder[0].encode()
+_HASH_COUNT = 7
+_MIN_SLOT_COUNT = 1 << 12
+_MAX_LOAD = 0.7
+_OFFSET_BITS = 40
+_OFFSET_MASK = (1 << _OFFSET_BITS) - 1
+
+
+def _hash(name: str) -> tuple[int, int]:
+    digest = hashlib.blake2b(name.encode(), digest_size=16, person=b'qngng-ledger').digest()
+
+    # an odd step visits distinct Bloom filter bits
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+def _slot_count(name_count: int) -> int:
+    slot_count = _MIN_SLOT_COUNT
+
+    while name_count > slot_count * _MAX_LOAD:
+        slot_count *= 2
+
+    return slot_count
+
+
+class _Index:
+    def __init__(self, path: pathlib.Path) -> None:
+        with open(path, 'r+b') as f:
+            self.ino = os.fstat(f.fileno()).st_ino
+            self._mmap = mmap.mmap(f.fileno(), 0)
+
+        try:
+            (magic, byte_order, version, self.slot_count, hash_count, self.log_len,
+             self.count) = _HEADER.unpack_from(self._mmap)
+
+            if (magic != _MAGIC or byte_order != _BYTE_ORDER or version != _VERSION or
+                    hash_count != _HASH_COUNT or self.slot_count < _MIN_SLOT_COUNT or
+                    self.slot_count & (self.slot_count - 1) or
+                    len(self._mmap) != _HEADER_SIZE + self.slot_count * 9):
+                raise ValueError('Invalid ledger index')
+        except (ValueError, struct.error):
+            self._mmap.close()
+            raise ValueError('Invalid ledger index') from None
+
+        view = memoryview(self._mmap)
+        self._bits = view[_HEADER_SIZE:_HEADER_SIZE + self.slot_count]
+        self._slots = view[_HEADER_SIZE + self.slot_count:].cast('Q')
+        self._bit_count = self.slot_count * 8
+        self._mask = self.slot_count - 1
+
+    @staticmethod
+    def create(path: pathlib.Path, slot_count: int) -> None:
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _BYTE_ORDER, _VERSION, slot_count, _HASH_COUNT, 0, 0))
+            f.truncate(_HEADER_SIZE + slot_count * 9)
+
+    def close(self) -> None:
+        self._bits.release()
+        self._slots.release()
+        self._mmap.close()
+
+    def full(self, extra_count: int) -> bool:
+        return self.count + extra_count > self.slot_count * _MAX_LOAD
+
+    def set_log_len(self, log_len: int) -> None:
+        self.log_len = log_len
+        self._mmap[:_HEADER.size] = _HEADER.pack(_MAGIC, _BYTE_ORDER, _VERSION, self.slot_count,
+                                                 _HASH_COUNT, log_len, self.count)
+
+    # Returns whether the index holds `name`, of which the hash is
+    # `name_hash`, reading the names of `log` to compare.
+    def find(self, name: bytes, name_hash: tuple[int, int], log: typing.BinaryIO) -> bool:
+        h1, h2 = name_hash
+        bits = self._bits
+        bit_count = self._bit_count
+
+        for i in range(_HASH_COUNT):
+            bit = (h1 + i * h2) % bit_count
+
+            if not bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+
+        slots = self._slots
+        mask = self._mask
+        tag = h2 >> _OFFSET_BITS
+        i = h1 & mask
+
+        while slots[i]:
+            if slots[i] >> _OFFSET_BITS == tag:
+                log.seek((slots[i] & _OFFSET_MASK) - 1)
+
+                if log.readline()[:-1] == name:
+                    return True
+
+            i = (i + 1) & mask
+
+        return False
+
+    def add(self, name_hash: tuple[int, int], offset: int) -> None:
+        h1, h2 = name_hash
+        bits = self._bits
+        bit_count = self._bit_count
+
+        for i in range(_HASH_COUNT):
+            bit = (h1 + i * h2) % bit_count
+            bits[bit >> 3] |= 1 << (bit & 7)
+
+        slots = self._slots
+        mask = self._mask
+        i = h1 & mask
+
+        while slots[i]:
+            i = (i + 1) & mask
+
+        slots[i] = (h2 >> _OFFSET_BITS << _OFFSET_BITS) | (offset + 1)
+        self.count += 1
+
+
+class Ledger:
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._path = pathlib.Path(path)
+        self._index_path = self._path.with_name(f'{self._path.name}.index')
+        self._log = open(self._path, 'a+b')
+        self._index: _Index | None = None
+
+    def close(self) -> None:
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+        self._log.close()
+
+    def __enter__(self) -> typing.Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._locked():
+            return self._sync().count
+
+    def __contains__(self, name: str) -> bool:
+        with self._locked():
+            return self._sync().find(name.encode(), _hash(name), self._log)
+
+    # Records the names of `names` which this ledger doesn't hold yet.
+    #
+    # Returns, for each name of `names`, whether it's new (recorded by
+    # this call): a name which appears more than once is only new the
+    # first time.
+    def claim(self, names: typing.Iterable[str]) -> list[bool]:
+        with self._locked():
+            index = self._sync()
+            new_flags: list[bool] = []
+            new_names: list[tuple[bytes, tuple[int, int]]] = []
+            seen: set[bytes] = set()
+
+            for name in names:
+                if '\n' in name:
+                    raise ValueError('A name must not contain a newline')
+
+                encoded = name.encode()
+                name_hash = _hash(name)
+                new = encoded not in seen and not index.find(encoded, name_hash, self._log)
+                new_flags.append(new)
+
+                if new:
+                    seen.add(encoded)
+                    new_names.append((encoded, name_hash))
+
+            if not new_names:
+                return new_flags
+
+            # the log first (see the comment at the top of this module)
+            offset = index.log_len
+            self._log.write(b''.join(name + b'\n' for name, _ in new_names))
+            self._log.flush()
+
+            if index.full(len(new_names)):
+                # indexes the names just appended too
+                self._rebuild(index.count + len(new_names))
+            else:
+                for name, name_hash in new_names:
+                    index.add(name_hash, offset)
+                    offset += len(name) + 1
+
+                index.set_log_len(offset)
+
+            return new_flags
+
+    @contextlib.contextmanager
+    def _locked(self) -> typing.Iterator[None]:
+        fd = self._log.fileno()
+
+        if sys.platform == 'win32':
+            import msvcrt
+
+            # locks the first byte, even beyond the end of the file
+            self._log.seek(0)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+            try:
+                yield
+            finally:
+                self._log.seek(0)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    # Returns the log length after dropping an incomplete last line.
+    def _log_len(self) -> int:
+        log_len = self._log.seek(0, os.SEEK_END)
+
+        if log_len == 0:
+            return 0
+
+        self._log.seek(log_len - 1)
+
+        if self._log.read(1) == b'\n':
+            return log_len
+
+        # search the last newline backwards
+        end = log_len
+
+        while end > 0:
+            begin = max(0, end - 4096)
+            self._log.seek(begin)
+            newline_pos = self._log.read(end - begin).rfind(b'\n')
+
+            if newline_pos >= 0:
+                end = begin + newline_pos + 1
+                break
+
+            end = begin
+
+        self._log.truncate(end)
+        return end
+
+    # Returns an index which covers the whole log, with the lock held.
+    def _sync(self) -> _Index:
+        log_len = self._log_len()
+        index = self._index
+
+        # another process may have replaced the index file
+        try:
+            ino = os.stat(self._index_path).st_ino
+        except FileNotFoundError:
+            ino = None
+
+        if index is not None and index.ino != ino:
+            index.close()
+            index = self._index = None
+
+        if index is None and ino is not None:
+            try:
+                index = self._index = _Index(self._index_path)
+            except (OSError, ValueError):
+                index = None
+
+        if index is None or index.log_len > log_len:
+            return self._rebuild(self._line_count())
+
+        if index.log_len < log_len:
+            lines = self._lines(index.log_len, log_len)
+
+            if index.full(len(lines)):
+                return self._rebuild(index.count + len(lines))
+
+            for offset, name in lines:
+                name_hash = _hash(name.decode())
+
+                if not index.find(name, name_hash, self._log):
+                    index.add(name_hash, offset)
+
+            index.set_log_len(log_len)
+
+        return index
+
+    def _lines(self, begin: int, end: int) -> list[tuple[int, bytes]]:
+        self._log.seek(begin)
+        lines: list[tuple[int, bytes]] = []
+        offset = begin
+
+        while offset < end:
+            line = self._log.readline()
+            lines.append((offset, line[:-1]))
+            offset += len(line)
+
+        return lines
+
+    def _line_count(self) -> int:
+        self._log.seek(0)
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: self._log.read(1 << 20), b''))
+
+    # Builds a new index of the whole log for at least `name_count`
+    # names (twice as many slots as needed), then replaces the current
+    # index file atomically.
+    def _rebuild(self, name_count: int) -> _Index:
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+        tmp_path = self._index_path.with_name(f'.{self._index_path.name}.{os.getpid()}.tmp')
+        log_len = self._log_len()
+
+        try:
+            _Index.create(tmp_path, _slot_count(name_count * 2))
+            index = _Index(tmp_path)
+            offset = 0
+
+            while offset < log_len:
+                self._log.seek(offset)
+                line = self._log.readline()
+                name = line[:-1]
+                name_hash = _hash(name.decode())
+
+                # the log may hold a name twice after an interruption
+                if not index.find(name, name_hash, self._log):
+                    index.add(name_hash, offset)
+
+                offset += len(line)
+
+            index.set_log_len(log_len)
+            index.close()
+            tmp_path.replace(self._index_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        self._index = _Index(self._index_path)
+        return self._index
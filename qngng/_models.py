@@ -0,0 +1,50 @@
+# MIT License
+#
+# Copyright (c) 2018 Antoine Busque
+# Copyright (c) 2018-2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# The pydantic models, which `qngng.qngng` only imports when needed.
+
+import pydantic
+from qngng.qngng import Category, Gender
+
+
+class PartialName(pydantic.BaseModel, frozen=True):
+    name: str
+    gender: Gender | None = None
+
+
+class FullName(pydantic.BaseModel, frozen=True):
+    name: str
+    surname: str
+    gender: Gender
+    middle_name: str | None = None
+
+    # a `str` for a `qngng.CategoryFile`
+    category: Category | str | None = None
+
+    @property
+    def middle_initial(self) -> str:
+        if self.middle_name is None:
+            raise ValueError('No middle name')
+
+        return self.middle_name[0].upper()
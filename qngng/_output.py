@@ -0,0 +1,105 @@
+# MIT License
+#
+# Copyright (c) 2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Structured output.
+#
+# A `RecordWriter` encodes batches of name tuples as records with the
+# name, middle name, surname, gender, and source category fields:
+#
+# `OutputFormat.JSONL`:
+#     One JSON object per line.
+#
+# `OutputFormat.CSV`:
+#     CSV rows, after the header row of `RecordWriter.header()`.
+#
+# `OutputFormat.MSGPACK`:
+#     A stream of concatenated MessagePack maps.
+#
+# Each call to `RecordWriter.encode()` returns a whole batch so that the
+# caller writes many records at once.
+
+import csv
+import io
+import msgspec
+import typing
+from qngng.qngng import Category, Gender, NameTuple, OutputFormat
+
+
+class Record(msgspec.Struct):
+    name: str
+    middle_name: str | None
+    surname: str
+    gender: Gender
+    category: Category | str | None
+
+
+_FIELDS = Record.__struct_fields__
+
+
+class RecordWriter:
+    def __init__(self, output_format: OutputFormat) -> None:
+        if output_format == OutputFormat.TEXT:
+            raise ValueError('Text output has no records')
+
+        self._output_format = output_format
+        self._json_encoder = msgspec.json.Encoder()
+        self._msgpack_encoder = msgspec.msgpack.Encoder()
+
+        # reused from batch to batch
+        self._buf = bytearray()
+        self._text_buf = io.StringIO()
+        self._csv_writer = csv.writer(self._text_buf, lineterminator='\n')
+
+    def header(self) -> bytes:
+        if self._output_format != OutputFormat.CSV:
+            return b''
+
+        return (','.join(_FIELDS) + '\n').encode()
+
+    def encode(self, name_tuples: typing.Iterable[NameTuple]) -> bytes:
+        match self._output_format:
+            case OutputFormat.JSONL:
+                return self._json_encoder.encode_lines([
+                    Record(name_tuple.name, name_tuple.middle_name, name_tuple.surname,
+                           name_tuple.gender, name_tuple.category)
+                    for name_tuple in name_tuples
+                ])
+            case OutputFormat.CSV:
+                self._text_buf.seek(0)
+                self._text_buf.truncate()
+                self._csv_writer.writerows((name_tuple.name, name_tuple.middle_name or '',
+                                            name_tuple.surname, name_tuple.gender,
+                                            name_tuple.category or '')
+                                           for name_tuple in name_tuples)
+                return self._text_buf.getvalue().encode()
+            case _:
+                buf = self._buf
+                del buf[:]
+                encode_into = self._msgpack_encoder.encode_into
+
+                for name_tuple in name_tuples:
+                    encode_into(Record(name_tuple.name, name_tuple.middle_name,
+                                       name_tuple.surname, name_tuple.gender,
+                                       name_tuple.category), buf, -1)
+
+                return bytes(buf)
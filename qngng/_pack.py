@@ -0,0 +1,255 @@
+# MIT License
+#
+# Copyright (c) 2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Compiled category pack.
+#
+# A pack is a single file holding all the `cats/*.json` resources:
+#
+# * Magic (`QNGP`) and a 32-bit little-endian header length.
+# * UTF-8 JSON header: package version, size and CRC-32 of each source
+#   JSON file (to detect a stale pack), and, for each source and column,
+#   the location of its array within the data section.
+# * Data section: a string table of unique UTF-8 strings with its array
+#   of M + 1 offsets, followed by one 32-bit little-endian array per
+#   column. A string column holds string table indexes; an integer
+#   column holds the values themselves.
+#
+# This module only depends on the standard library so that the build
+# hook (`hatch_build.py`) may use it without the package dependencies.
+
+import array
+import collections.abc
+import json
+import mmap
+import pathlib
+import re
+import struct
+import sys
+import typing
+import zlib
+
+MAGIC = b'QNGP'
+FILENAME = 'cats.pack'
+_HEADER_LEN_STRUCT = struct.Struct('<I')
+_STR_COLUMNS = ('name', 'surname')
+# integer column name to value of an entry without it
+_INT_COLUMNS = {'weight': 1}
+
+
+class StrColumn(collections.abc.Sequence[str]):
+    def __init__(self, strings: memoryview, offsets: memoryview, indexes: memoryview) -> None:
+        self._strings = strings
+        self._offsets = offsets
+        self._indexes = indexes
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    @typing.overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @typing.overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        str_index = self._indexes[index]
+        return str(self._strings[self._offsets[str_index]:self._offsets[str_index + 1]], 'utf-8')
+
+
+class Columns(typing.NamedTuple):
+    name: collections.abc.Sequence[str] | None = None
+    surname: collections.abc.Sequence[str] | None = None
+    weight: collections.abc.Sequence[int] | None = None
+
+
+class Pack:
+    def __init__(self, data: typing.Any) -> None:
+        view = memoryview(data)
+
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError('Not a category pack')
+
+        data_begin = len(MAGIC) + _HEADER_LEN_STRUCT.size
+        header_len = _HEADER_LEN_STRUCT.unpack_from(view, len(MAGIC))[0]
+        header = json.loads(bytes(view[data_begin:data_begin + header_len]))
+        self._view = view[data_begin + header_len:]
+        self._version: str = header['version']
+        self._sources: dict[str, list[int]] = header['sources']
+        self._tables: dict[str, dict[str, list[int]]] = header['tables']
+        begin, end = header['strings']
+        self._strings = self._view[begin:end]
+        self._str_offsets = self._array(header['string_offsets'])
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    def stems(self) -> list[str]:
+        return sorted(self._tables)
+
+    # Returns the size and the CRC-32 of the source JSON file `stem`.
+    def source_digest(self, stem: str) -> tuple[int, int] | None:
+        digest = self._sources.get(stem)
+
+        # a pack of an older format only has the size
+        if not isinstance(digest, list) or len(digest) != 2:
+            return None
+
+        return digest[0], digest[1]
+
+    def _array(self, loc: list[int]) -> memoryview:
+        begin, end = loc
+        return self._view[begin:end].cast('I')
+
+    def columns(self, stem: str) -> Columns | None:
+        table = self._tables.get(stem)
+
+        if table is None:
+            return None
+
+        kwargs: dict[str, typing.Any] = {}
+
+        for col_name, loc in table.items():
+            if col_name in _STR_COLUMNS:
+                kwargs[col_name] = StrColumn(self._strings, self._str_offsets, self._array(loc))
+            else:
+                kwargs[col_name] = self._array(loc)
+
+        return Columns(**kwargs)
+
+
+def open_pack(path: pathlib.Path) -> Pack | None:
+    # arrays are stored little-endian and read in place
+    if sys.byteorder != 'little':
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        return Pack(data)
+    except (ValueError, KeyError, struct.error):
+        return None
+
+
+def build_pack(cats_dir: pathlib.Path, version: str) -> bytes:
+    strings = bytearray()
+    str_offsets = array.array('I', [0])
+    str_indexes: dict[str, int] = {}
+    arrays: list[tuple[str, str, array.array[int]]] = []
+    sources: dict[str, list[int]] = {}
+
+    def str_index(s: str) -> int:
+        index = str_indexes.get(s)
+
+        if index is None:
+            index = len(str_offsets) - 1
+            strings.extend(s.encode())
+            str_offsets.append(len(strings))
+            str_indexes[s] = index
+
+        return index
+
+    for path in sorted(cats_dir.glob('*.json')):
+        raw = path.read_bytes()
+        sources[path.stem] = [len(raw), zlib.crc32(raw)]
+        entries: list[dict[str, typing.Any]] = json.loads(raw)
+        col_names = {key for entry in entries for key in entry}
+
+        for col_name in _STR_COLUMNS:
+            if col_name in col_names:
+                arrays.append((path.stem, col_name,
+                               array.array('I', (str_index(entry.get(col_name) or '')
+                                                 for entry in entries))))
+
+        for col_name, default in _INT_COLUMNS.items():
+            if col_name in col_names:
+                arrays.append((path.stem, col_name,
+                               array.array('I', (int(entry.get(col_name, default))
+                                                 for entry in entries))))
+
+    # the string table comes first; arrays follow, 4-byte aligned
+    data = bytearray(strings)
+    data.extend(bytes(-len(data) % 4))
+
+    def append_array(arr: 'array.array[int]') -> list[int]:
+        begin = len(data)
+
+        if sys.byteorder != 'little':
+            arr = array.array('I', arr)
+            arr.byteswap()
+
+        data.extend(arr.tobytes())
+        return [begin, len(data)]
+
+    tables: dict[str, dict[str, list[int]]] = {}
+    header: dict[str, typing.Any] = {
+        'version': version,
+        'sources': sources,
+        'strings': [0, len(strings)],
+        'string_offsets': append_array(str_offsets),
+        'tables': tables,
+    }
+
+    for stem, col_name, arr in arrays:
+        tables.setdefault(stem, {})[col_name] = append_array(arr)
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode()
+
+    # keep the data section 4-byte aligned within the file
+    header_bytes += b' ' * (-(len(MAGIC) + _HEADER_LEN_STRUCT.size + len(header_bytes)) % 4)
+    return MAGIC + _HEADER_LEN_STRUCT.pack(len(header_bytes)) + header_bytes + bytes(data)
+
+
+def write_pack(cats_dir: pathlib.Path, version: str, path: pathlib.Path) -> None:
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_bytes(build_pack(cats_dir, version))
+    tmp_path.replace(path)
+
+
+def _main() -> None:
+    # `python qngng/_pack.py [OUTPUT [DIR]]`: compiles `DIR` (default:
+    # `cats/` next to this file)
+    pkg_dir = pathlib.Path(__file__).parent
+    output = pathlib.Path(sys.argv[1]) if len(sys.argv) > 1 else pkg_dir / FILENAME
+    cats_dir = pathlib.Path(sys.argv[2]) if len(sys.argv) > 2 else pkg_dir / 'cats'
+    version = re.search(r"^__version__ = '(.+)'$", (pkg_dir / '__init__.py').read_text(),
+                        re.MULTILINE)
+    assert version is not None
+    write_pack(cats_dir, version.group(1), output)
+
+
+if __name__ == '__main__':
+    _main()
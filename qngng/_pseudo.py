@@ -0,0 +1,351 @@
+# MIT License
+#
+# Copyright (c) 2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+# Pseudonymization of CSV and JSON Lines records.
+#
+# A `Pseudonymizer` replaces a value with the name at index
+# `H(value) mod N` of the combination space of a generator (see
+# `NameGenerator.name_tuple_at()`), where `H` is BLAKE2b keyed with a
+# secret key and `N` is the size of the space: the same value, key,
+# options, and category data always give the same name, without any
+# mapping table. Distinct values may give the same name; the larger the
+# space (for example, with a double surname and a middle name), the
+# rarer.
+#
+# `pseudonymize()` reads an input stream by blocks of whole records and
+# rewrites them in order, optionally with worker processes: the memory
+# usage depends on the block size and on the number of jobs, not on the
+# input size.
+#
+# `InputFormat.CSV`:
+#     A header row which names the columns, followed by records. A
+#     quoted field may contain newlines. Empty fields stay empty. The
+#     rewritten records end with the line terminator of the header row.
+#
+# `InputFormat.JSONL`:
+#     One JSON object per line. Only nonempty string values are
+#     replaced; the other lines are copied as is.
+
+import collections
+import csv
+import functools
+import io
+import os
+import typing
+from qngng.qngng import (Category, CategoryFile, Format, Gender, InputFormat, NameGenerator,
+                         format_name)
+
+BLOCK_SIZE = 1 << 20
+
+# number of the last pseudonyms to remember
+_CACHE_SIZE = 1 << 16
+
+
+# Picklable pseudonymization options.
+class Options(typing.NamedTuple):
+    key: bytes
+    columns: tuple[str, ...]
+    fmt: Format = Format.DEFAULT
+    with_middle_initial: bool = False
+    surname_count: typing.Literal[1, 2] = 1
+    with_middle_name: bool = False
+    gender: Gender | None = None
+    categories: frozenset[Category | CategoryFile] = frozenset({Category.STD})
+
+
+class Pseudonymizer:
+    def __init__(self, options: Options) -> None:
+        import hashlib
+
+        generator = NameGenerator(options.surname_count,
+                                  options.with_middle_name or options.with_middle_initial,
+                                  options.gender, options.categories)
+        self._space_size = generator.space_size()
+
+        if self._space_size == 0:
+            raise ValueError('No names to pseudonymize with')
+
+        self._name_tuple_at = generator.name_tuple_at
+        self._fmt = options.fmt
+        self._with_middle_initial = options.with_middle_initial
+
+        # BLAKE2b keys are at most 64 bytes long
+        key = hashlib.blake2b(options.key, digest_size=32, person=b'qngng-key').digest()
+
+        # copying a keyed hash is cheaper than keying a new one
+        self._hash = hashlib.blake2b(digest_size=16, key=key, person=b'qngng-pseudonym')
+        self.pseudonym = functools.lru_cache(_CACHE_SIZE)(self._pseudonym)
+
+    def _pseudonym(self, value: str) -> str:
+        hasher = self._hash.copy()
+        hasher.update(value.encode())
+        index = int.from_bytes(hasher.digest(), 'little') % self._space_size
+        return format_name(self._name_tuple_at(index), self._fmt, self._with_middle_initial)
+
+
+# Rewrites blocks of whole CSV records (after the header row) or JSON
+# Lines records.
+class _BlockRewriter:
+    def __init__(self, options: Options, input_format: InputFormat,
+                 header: list[str] | None, line_terminator: str = '\n') -> None:
+        self._pseudonym = Pseudonymizer(options).pseudonym
+        self._input_format = input_format
+        self._columns = options.columns
+        self._line_terminator = line_terminator
+
+        if input_format == InputFormat.CSV:
+            assert header is not None
+            missing = [column for column in options.columns if column not in header]
+
+            if missing:
+                raise ValueError(f'No column `{missing[0]}` in the CSV header')
+
+            self._indexes = sorted({index for index, column in enumerate(header)
+                                    if column in options.columns})
+        else:
+            import msgspec
+
+            self._decoder = msgspec.json.Decoder(dict[str, typing.Any])
+            self._encoder = msgspec.json.Encoder()
+            self._decode_error = msgspec.MsgspecError
+
+            # a line without any of those nor any `\u` escape can't have
+            # the columns
+            self._column_needles = [column.encode() for column in options.columns]
+
+    def rewrite(self, block: bytes) -> bytes:
+        if self._input_format == InputFormat.CSV:
+            return self._rewrite_csv(block)
+
+        return self._rewrite_jsonl(block)
+
+    def _rewrite_csv(self, block: bytes) -> bytes:
+        pseudonym = self._pseudonym
+        indexes = self._indexes
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator=self._line_terminator)
+
+        for row in csv.reader(io.StringIO(block.decode(), newline='')):
+            for index in indexes:
+                if index < len(row) and row[index]:
+                    row[index] = pseudonym(row[index])
+
+            writer.writerow(row)
+
+        return out.getvalue().encode()
+
+    def _rewrite_jsonl(self, block: bytes) -> bytes:
+        pseudonym = self._pseudonym
+        needles = self._column_needles
+        out = bytearray()
+
+        for line in block.splitlines(keepends=True):
+            if b'\\u' not in line and not any(needle in line for needle in needles):
+                out += line
+                continue
+
+            try:
+                record = self._decoder.decode(line)
+            except self._decode_error as exc:
+                raise ValueError(f'Invalid JSON Lines record: {exc}') from None
+
+            changed = False
+
+            for column in self._columns:
+                value = record.get(column)
+
+                if isinstance(value, str) and value:
+                    record[column] = pseudonym(value)
+                    changed = True
+
+            if not changed:
+                out += line
+                continue
+
+            out += self._encoder.encode(record)
+            out += line[len(line.rstrip(b'\r\n')):]
+
+        return bytes(out)
+
+
+# Returns the offset following the last whole record of `data`.
+def _records_end(data: bytes, input_format: InputFormat) -> int:
+    end = data.rfind(b'\n')
+
+    if input_format == InputFormat.JSONL or end < 0:
+        return end + 1
+
+    # a newline ends a CSV record when it follows an even number of
+    # quotes (an escaped quote is two quotes)
+    quote_count = data.count(b'"', 0, end)
+
+    while quote_count % 2:
+        prev_end = data.rfind(b'\n', 0, end)
+
+        if prev_end < 0:
+            return 0
+
+        quote_count -= data.count(b'"', prev_end, end)
+        end = prev_end
+
+    return end + 1
+
+
+# Returns the offset following the first whole CSV record of `data`, or
+# 0 if there's none.
+def _csv_first_record_end(data: bytes) -> int:
+    begin = 0
+    quote_count = 0
+
+    while True:
+        end = data.find(b'\n', begin)
+
+        if end < 0:
+            return 0
+
+        quote_count += data.count(b'"', begin, end)
+
+        if quote_count % 2 == 0:
+            return end + 1
+
+        begin = end + 1
+
+
+# Yields blocks of whole records of `data` followed by the contents of
+# `stream`.
+def _blocks(stream: typing.BinaryIO, input_format: InputFormat, data: bytes,
+            block_size: int) -> typing.Iterator[bytes]:
+    while True:
+        chunk = stream.read(block_size)
+
+        if not chunk:
+            if data:
+                yield data
+
+            return
+
+        data += chunk
+        end = _records_end(data, input_format)
+
+        # keep reading a record longer than a block
+        if end > 0:
+            yield data[:end]
+            data = data[end:]
+
+
+def _detect_input_format(data: bytes) -> InputFormat:
+    return InputFormat.JSONL if data.lstrip().startswith(b'{') else InputFormat.CSV
+
+
+_worker_rewriter: _BlockRewriter | None = None
+
+
+def _init_worker(options: Options, input_format: InputFormat, header: list[str] | None,
+                 line_terminator: str) -> None:
+    global _worker_rewriter
+    _worker_rewriter = _BlockRewriter(options, input_format, header, line_terminator)
+
+
+def _rewrite_block(block: bytes) -> bytes:
+    assert _worker_rewriter is not None
+    return _worker_rewriter.rewrite(block)
+
+
+# Rewrites the `options.columns` columns of the records of
+# `input_stream` to `output_stream`, with `jobs` worker processes (in this process if 1; one
+# per CPU if 0).
+#
+# `input_format` is detected from the first byte (`{` for JSON Lines) if
+# `None`.
+def pseudonymize(input_stream: typing.BinaryIO, output_stream: typing.BinaryIO, options: Options,
+                 input_format: InputFormat | None = None, jobs: int = 1,
+                 block_size: int = BLOCK_SIZE) -> None:
+    data = input_stream.read(block_size)
+
+    if input_format is None:
+        input_format = _detect_input_format(data)
+
+    header = None
+    line_terminator = '\n'
+
+    if input_format == InputFormat.CSV:
+        # the header row may be longer than a block
+        while True:
+            end = _csv_first_record_end(data)
+
+            if end > 0:
+                break
+
+            chunk = input_stream.read(block_size)
+
+            if not chunk:
+                end = len(data)
+                break
+
+            data += chunk
+
+        header = next(csv.reader(io.StringIO(data[:end].decode('utf-8-sig'), newline='')), [])
+
+        if data[:end].endswith(b'\r\n'):
+            line_terminator = '\r\n'
+
+        output_stream.write(data[:end])
+        data = data[end:]
+
+    blocks = _blocks(input_stream, input_format, data, block_size)
+    jobs = jobs or os.cpu_count() or 1
+
+    if jobs == 1:
+        rewriter = _BlockRewriter(options, input_format, header, line_terminator)
+
+        for block in blocks:
+            output_stream.write(rewriter.rewrite(block))
+
+        return
+
+    # check the options before starting the workers
+    _BlockRewriter(options, input_format, header, line_terminator)
+
+    import concurrent.futures
+
+    # bounding the in-flight blocks keeps the memory constant
+    max_pending = jobs * 2
+
+    with concurrent.futures.ProcessPoolExecutor(jobs, initializer=_init_worker,
+                                                initargs=(options, input_format, header,
+                                                          line_terminator)) as executor:
+        pending: collections.deque[concurrent.futures.Future[bytes]] = collections.deque()
+
+        try:
+            for block in blocks:
+                pending.append(executor.submit(_rewrite_block, block))
+
+                while len(pending) >= max_pending:
+                    output_stream.write(pending.popleft().result())
+
+            while pending:
+                output_stream.write(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
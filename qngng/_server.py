@@ -0,0 +1,391 @@
+# MIT License
+#
+# Copyright (c) 2025 Philippe Proulx
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Long-running name server.
+#
+# `NameServer` keeps one ready generator per set of options and answers
+# HTTP/1.1 requests, over TCP or over a Unix domain socket, with
+# asyncio:
+#
+# `GET /names?count=N&cat=CAT&format=FMT&...`:
+#     Generates names. Query parameters:
+#
+#     `count`:
+#         Number of names (default: 1).
+#
+#     `cat`:
+#         Category (can be repeated or comma-separated; default: `std`).
+#
+#     `format`:
+#         `default`, `snake`, `kebab`, `camel`, or `cap-camel`.
+#
+#     `gender`:
+#         `male` or `female` (default: both).
+#
+#     `double-surname`, `middle-name`, `middle-initial`, `weighted`:
+#         Booleans (`1`/`true`/`yes` or `0`/`false`/`no`; no value
+#         means true), like the corresponding CLI options.
+#
+#     `output`:
+#         `json` (`{"names": [...]}`, default) or `text` (one name per
+#         line).
+#
+# `GET /health`:
+#     Returns `{"status": "ok", "version": "..."}`.
+#
+# Connections are kept alive (HTTP/1.1) unless the client asks
+# otherwise, so that a client may send many requests without
+# reconnecting.
+
+import asyncio
+import json
+import os
+import pathlib
+import qngng
+import random
+import signal
+import stat
+import sys
+import typing
+import urllib.parse
+from qngng.qngng import (Category, Format, Gender, NameGenerator, _UNIQUE_CATS,
+                         _expand_categories)
+
+# default maximum `count` of a single request
+MAX_COUNT = 100_000
+
+# names generated between two yields to the event loop
+_BATCH_SIZE = 4096
+_TRUE_VALUES = frozenset({'', '1', 'true', 'yes'})
+_FALSE_VALUES = frozenset({'0', 'false', 'no'})
+_STATUS_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    431: 'Request Header Fields Too Large',
+}
+_MAX_HEADER_COUNT = 100
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+# generator options
+class _GeneratorKey(typing.NamedTuple):
+    categories: frozenset[Category]
+    gender: Gender | None
+    surname_count: typing.Literal[1, 2]
+    with_middle_name: bool
+    weighted: bool
+
+
+class _Query(typing.NamedTuple):
+    key: _GeneratorKey
+    count: int
+    fmt: Format
+    with_middle_initial: bool
+    text: bool
+
+
+def _parse_bool(params: dict[str, list[str]], name: str) -> bool:
+    values = params.get(name)
+
+    if values is None:
+        return False
+
+    value = values[-1].lower()
+
+    if value in _TRUE_VALUES:
+        return True
+
+    if value in _FALSE_VALUES:
+        return False
+
+    raise _HttpError(400, f'Invalid boolean value for `{name}`: `{value}`')
+
+
+_E = typing.TypeVar('_E', Category, Format, Gender)
+
+
+def _parse_enum(enum_type: type[_E], name: str, value: str) -> _E:
+    try:
+        return enum_type(value)
+    except ValueError:
+        raise _HttpError(400, f'Invalid value for `{name}`: `{value}`') from None
+
+
+def _parse_query(query: str, max_count: int) -> _Query:
+    params = urllib.parse.parse_qs(query, keep_blank_values=True)
+    unknown = params.keys() - {'count', 'cat', 'format', 'gender', 'double-surname', 'middle-name',
+                               'middle-initial', 'weighted', 'output'}
+
+    if unknown:
+        raise _HttpError(400, f'Unknown parameter `{min(unknown)}`')
+
+    count = 1
+
+    if 'count' in params:
+        try:
+            count = int(params['count'][-1])
+        except ValueError:
+            raise _HttpError(400, 'Invalid value for `count`') from None
+
+        if not 0 <= count <= max_count:
+            raise _HttpError(400, f'`count` must be between 0 and {max_count}')
+
+    cats = [_parse_enum(Category, 'cat', cat.strip())
+            for value in params.get('cat', []) for cat in value.split(',') if cat.strip()]
+    categories = _expand_categories(cats)
+    fmt = _parse_enum(Format, 'format', params.get('format', ['default'])[-1])
+    gender = None
+
+    if 'gender' in params:
+        gender = _parse_enum(Gender, 'gender', params['gender'][-1])
+
+    double_surname = _parse_bool(params, 'double-surname')
+    middle_name = _parse_bool(params, 'middle-name')
+    middle_initial = _parse_bool(params, 'middle-initial')
+    weighted = _parse_bool(params, 'weighted')
+
+    if middle_name and middle_initial:
+        raise _HttpError(400, 'Cannot specify both `middle-initial` and `middle-name`')
+
+    if (double_surname or middle_name or middle_initial) and Category.STD not in categories:
+        raise _HttpError(400, '`double-surname`, `middle-name`, and `middle-initial` '
+                              'require the `std` category')
+
+    output = params.get('output', ['json'])[-1]
+
+    if output not in ('json', 'text'):
+        raise _HttpError(400, f'Invalid value for `output`: `{output}`')
+
+    key = _GeneratorKey(categories, gender, 2 if double_surname else 1,
+                        middle_name or middle_initial, weighted)
+    return _Query(key, count, fmt, middle_initial, output == 'text')
+
+
+class NameServer:
+    def __init__(self, seed: int | None = None, max_count: int = MAX_COUNT) -> None:
+        self._rng = random.Random(seed)
+        self._max_count = max_count
+        self._generators: dict[_GeneratorKey, NameGenerator] = {}
+
+    def _generator(self, key: _GeneratorKey) -> NameGenerator:
+        generator = self._generators.get(key)
+
+        if generator is None:
+            try:
+                generator = NameGenerator(key.surname_count, key.with_middle_name, key.gender,
+                                          key.categories, key.weighted,
+                                          seed=self._rng.getrandbits(128))
+                generator.preload()
+            except ValueError as exc:
+                raise _HttpError(400, str(exc)) from None
+
+            self._generators[key] = generator
+
+        return generator
+
+    # Creates a ready generator for each category and gender.
+    def preload(self) -> None:
+        for cat in sorted(_UNIQUE_CATS):
+            for gender in (None, Gender.MALE, Gender.FEMALE):
+                self._generator(_GeneratorKey(frozenset({cat}), gender, 1, False, False))
+
+    async def names(self, query: str) -> tuple[list[str], bool]:
+        parsed = _parse_query(query, self._max_count)
+        generator = self._generator(parsed.key)
+        names: list[str] = []
+        remaining = parsed.count
+
+        # yield to the event loop between batches so that a large
+        # request doesn't stall the other clients
+        while True:
+            batch_size = min(remaining, _BATCH_SIZE)
+
+            try:
+                names.extend(generator.iter_formatted_names(batch_size, parsed.fmt,
+                                                            parsed.with_middle_initial))
+            except ValueError as exc:
+                raise _HttpError(400, str(exc)) from None
+
+            remaining -= batch_size
+
+            if remaining == 0:
+                break
+
+            await asyncio.sleep(0)
+
+        return names, parsed.text
+
+    async def _respond(self, method: str, target: str) -> tuple[int, str, bytes]:
+        path, _, query = target.partition('?')
+
+        if path not in ('/names', '/health'):
+            raise _HttpError(404, f'No such resource `{path}`')
+
+        if method != 'GET':
+            raise _HttpError(405, f'Unsupported method `{method}`')
+
+        if path == '/health':
+            return 200, 'application/json', json.dumps({
+                'status': 'ok',
+                'version': qngng.__version__,
+            }).encode()
+
+        names, text = await self.names(query)
+
+        if text:
+            return 200, 'text/plain; charset=utf-8', ''.join(f'{name}\n' for name in names).encode()
+
+        return 200, 'application/json', json.dumps({'names': names}, ensure_ascii=False).encode()
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # Handles a single request, returning whether or not to keep the
+    # connection alive.
+    async def _handle_request(self, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter) -> bool:
+        request_line = await reader.readline()
+
+        if not request_line:
+            return False
+
+        headers: dict[str, str] = {}
+
+        while True:
+            line = await reader.readline()
+
+            if line in (b'\r\n', b'\n', b''):
+                break
+
+            if len(headers) == _MAX_HEADER_COUNT:
+                await self._write_response(writer, 431, 'application/json',
+                                           b'{"error": "Too many headers"}', False)
+                return False
+
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        parts = request_line.decode('latin-1').split()
+
+        if len(parts) != 3:
+            await self._write_response(writer, 400, 'application/json',
+                                       b'{"error": "Malformed request line"}', False)
+            return False
+
+        method, target, version = parts
+
+        content_length = headers.get('content-length', '0')
+
+        if not (content_length.isascii() and content_length.isdigit()):
+            await self._write_response(writer, 400, 'application/json',
+                                       b'{"error": "Invalid `Content-Length` header"}', False)
+            return False
+
+        # discard any request body, without buffering it
+        remaining = int(content_length)
+
+        while remaining > 0:
+            remaining -= len(await reader.readexactly(min(remaining, 1 << 16)))
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        try:
+            status, content_type, body = await self._respond(method, target)
+        except _HttpError as exc:
+            status = exc.status
+            content_type = 'application/json'
+            body = json.dumps({'error': str(exc)}).encode()
+
+        await self._write_response(writer, status, content_type, body, keep_alive)
+        return keep_alive
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, status: int, content_type: str,
+                              body: bytes, keep_alive: bool) -> None:
+        head = (f'HTTP/1.1 {status} {_STATUS_REASONS[status]}\r\n'
+                f'Content-Type: {content_type}\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def start_tcp(self, host: str = '127.0.0.1', port: int = 0) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def start_unix(self, path: pathlib.Path) -> asyncio.Server:
+        # replace a stale socket left by a previous server
+        try:
+            if stat.S_ISSOCK(path.lstat().st_mode):
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+        return await asyncio.start_unix_server(self.handle_connection, os.fspath(path))
+
+
+async def serve(server: NameServer, host: str = '127.0.0.1', port: int = 0,
+                unix_path: pathlib.Path | None = None,
+                on_ready: typing.Callable[[str], None] | None = None) -> None:
+    if unix_path is None:
+        aio_server = await server.start_tcp(host, port)
+        sock_host, sock_port = aio_server.sockets[0].getsockname()[:2]
+        address = f'http://{sock_host}:{sock_port}'
+    else:
+        aio_server = await server.start_unix(unix_path)
+        address = f'unix:{unix_path}'
+
+    # stop gracefully on `SIGTERM` too
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    if sys.platform != 'win32':
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+
+    try:
+        async with aio_server:
+            if on_ready is not None:
+                on_ready(address)
+
+            await stop.wait()
+    finally:
+        if sys.platform != 'win32':
+            loop.remove_signal_handler(signal.SIGTERM)
+
+        if unix_path is not None:
+            unix_path.unlink(missing_ok=True)
@@ -22,17 +22,47 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import array
+import bisect
+import collections
 import enum
-import importlib.resources
-import msgspec
-import pydantic
+import functools
+import importlib.util
+import itertools
+import os
+import pathlib
 import qngng
+import qngng._pack
 import random
 import sys
 import time
-import typer
+import types
 import typing
-import unicodedata
+import zlib
+
+# Heavy modules are only imported when needed: see `__getattr__()` for
+# the pydantic models and the ledger.
+if typing.TYPE_CHECKING:
+    import concurrent.futures
+    import importlib.resources.abc
+    import numpy
+    import numpy.typing
+    import qngng._catfile
+    import qngng._output
+    from qngng._ledger import Ledger
+    from qngng._models import FullName, PartialName
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name in ('FullName', 'PartialName'):
+        import qngng._models
+        return getattr(qngng._models, name)
+
+    if name == 'Ledger':
+        import qngng._ledger
+        return qngng._ledger.Ledger
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 @enum.unique
@@ -78,22 +108,201 @@ _UNIQUE_CATS: frozenset[Category] = frozenset({
 })
 
 
-class JsonEntry(msgspec.Struct, frozen=True):
-    name: str | None = None
-    surname: str | None = None
+# External category: the entries of a JSON Lines, CSV, or pack file
+# (see `qngng._catfile`).
+#
+# The category of the generated names is the file name without its
+# extension.
+class CategoryFile(typing.NamedTuple):
+    path: str
 
+    @property
+    def name(self) -> str:
+        return pathlib.Path(self.path).stem
+
+
+def _category_sort_key(cat: 'Category | CategoryFile') -> tuple[int, str]:
+    return (0, cat) if isinstance(cat, Category) else (1, cat.path)
+
+
+@enum.unique
+class OutputFormat(enum.StrEnum):
+    TEXT = 'text'
+    JSONL = 'jsonl'
+    CSV = 'csv'
+    MSGPACK = 'msgpack'
+
+
+# Input format of `qngng pseudonymize` (see `qngng._pseudo`).
+@enum.unique
+class InputFormat(enum.StrEnum):
+    CSV = 'csv'
+    JSONL = 'jsonl'
+
+
+@enum.unique
+class Backend(enum.StrEnum):
+    PYTHON = 'python'
+    NUMPY = 'numpy'
+    AUTO = 'auto'
+
+
+# Expands the `uda` and `all` aliases of `cats`.
+def _expand_categories(cats: list[Category] | None) -> frozenset[Category]:
+    if not cats:
+        return frozenset({Category.STD})
+
+    result: set[Category] = set()
+
+    for cat in cats:
+        match cat:
+            case Category.ALL:
+                result |= set(_UNIQUE_CATS)
+            case Category.UDA:
+                result |= {Category.UDA_ACTORS, Category.UDA_HOSTS, Category.UDA_SINGERS}
+            case _:
+                result.add(cat)
+
+    return frozenset(result)
+
+
+def _import_numpy() -> types.ModuleType:
+    try:
+        import numpy
+    except ImportError as exc:
+        raise ImportError('The NumPy backend requires NumPy: install `qngng[numpy]`') from exc
+
+    return numpy
 
-class PartialName(pydantic.BaseModel, frozen=True):
-    name: str
-    gender: Gender | None = None
 
+def _resolve_backend(backend: Backend) -> Backend:
+    if backend == Backend.AUTO:
+        return Backend.PYTHON if importlib.util.find_spec('numpy') is None else Backend.NUMPY
 
-class FullName(pydantic.BaseModel, frozen=True):
+    return backend
+
+
+# Instrumentation.
+#
+# While enabled (see `enable_stats()`), the registry counts API calls,
+# the entries loaded from each category resource, and the cumulative
+# time of each phase:
+#
+# `read`:
+#     Reading category resources (compiled pack or JSON files).
+#
+# `decode`:
+#     Decoding JSON category resources.
+#
+# `build`:
+#     Building name pools and formatting tables.
+#
+# `sample`:
+#     Drawing random names.
+#
+# `construct`:
+#     Building `FullName` objects.
+#
+# `format`:
+#     Formatting names.
+#
+# When disabled, the instrumented functions only check a global; the
+# fast formatted name path of `NameGenerator.iter_formatted_names()`
+# falls back to `NameGenerator.random_name_tuple()` and `format_name()`
+# while enabled to measure sampling and formatting separately.
+#
+# `callback`, if set, receives each record as a kind (`call`,
+# `entries`, or `ns`), a key (call name, resource name, or phase), and
+# a value.
+StatsCallback = typing.Callable[[str, str, int], None]
+
+
+class Stats:
+    def __init__(self, callback: StatsCallback | None = None) -> None:
+        self.calls: collections.Counter[str] = collections.Counter()
+        self.entries: collections.Counter[str] = collections.Counter()
+        self.phase_ns: collections.Counter[str] = collections.Counter()
+        self._callback = callback
+        self._recorded_ns = 0
+
+    # Returns the current time (ns) minus all the recorded time so that
+    # a phase excludes the nested ones: for example, the `sample` phase
+    # of the first draw doesn't include loading the categories.
+    def clock(self) -> int:
+        return time.perf_counter_ns() - self._recorded_ns
+
+    # Records a call to `call` which started at `begin_ns` (`clock()`)
+    # and which belongs to `phase`.
+    def record(self, call: str, phase: str, begin_ns: int) -> None:
+        self.calls[call] += 1
+
+        if self._callback is not None:
+            self._callback('call', call, 1)
+
+        self.record_time(phase, begin_ns)
+
+    def record_time(self, phase: str, begin_ns: int) -> None:
+        elapsed_ns = self.clock() - begin_ns
+        self.phase_ns[phase] += elapsed_ns
+        self._recorded_ns += elapsed_ns
+
+        if self._callback is not None:
+            self._callback('ns', phase, elapsed_ns)
+
+    def record_entries(self, resource: str, count: int) -> None:
+        self.entries[resource] += count
+
+        if self._callback is not None:
+            self._callback('entries', resource, count)
+
+    def to_dict(self) -> dict[str, dict[str, int | float]]:
+        return {
+            'calls': dict(self.calls),
+            'entries': dict(self.entries),
+            'seconds': {phase: ns / 1e9 for phase, ns in self.phase_ns.items()},
+        }
+
+    def format(self) -> str:
+        lines = ['Calls:']
+        lines += [f'  {call}: {count}' for call, count in sorted(self.calls.items())]
+        lines.append('Entries loaded:')
+        lines += [f'  {resource}: {count}' for resource, count in sorted(self.entries.items())]
+        lines.append('Time per phase:')
+        lines += [f'  {phase}: {ns / 1e6:.3f} ms' for phase, ns in sorted(self.phase_ns.items())]
+        return '\n'.join(lines)
+
+
+_stats: Stats | None = None
+
+
+def enable_stats(callback: StatsCallback | None = None) -> Stats:
+    global _stats
+    _stats = Stats(callback)
+    return _stats
+
+
+# Stops collecting, returning the registry which was active, if any.
+def disable_stats() -> Stats | None:
+    global _stats
+    stats = _stats
+    _stats = None
+    return stats
+
+
+def get_stats() -> Stats | None:
+    return _stats
+
+
+# Lightweight, unvalidated counterpart of `FullName`.
+class NameTuple(typing.NamedTuple):
     name: str
     surname: str
     gender: Gender
     middle_name: str | None = None
 
+    # a `str` for a `CategoryFile`
+    category: Category | str | None = None
+
     @property
     def middle_initial(self) -> str:
         if self.middle_name is None:
@@ -101,90 +310,1639 @@ class FullName(pydantic.BaseModel, frozen=True):
 
         return self.middle_name[0].upper()
 
+    def to_full_name(self) -> 'FullName':
+        from qngng._models import FullName
+
+        stats = _stats
+        begin_ns = stats.clock() if stats is not None else 0
+
+        # fields come from trusted category data: skip validation
+        fullname = FullName.model_construct(name=self.name, surname=self.surname,
+                                            gender=self.gender, middle_name=self.middle_name,
+                                            category=self.category)
+
+        if stats is not None:
+            stats.record('to_full_name', 'construct', begin_ns)
+
+        return fullname
+
+
+# Returns the package resource `name`, avoiding `importlib.resources`
+# for a regular installation.
+def _resource(name: str) -> 'importlib.resources.abc.Traversable':
+    path = pathlib.Path(__file__).parent / name
+
+    if path.exists():
+        return path
+
+    import importlib.resources
+    return importlib.resources.files('qngng').joinpath(name)
+
+
+@functools.cache
+def _open_pack() -> qngng._pack.Pack | None:
+    ref = _resource(qngng._pack.FILENAME)
+
+    # memory-mapping requires an actual file
+    if not isinstance(ref, pathlib.Path):
+        return None
+
+    pack = qngng._pack.open_pack(ref)
+
+    if pack is None or pack.version != qngng.__version__:
+        return None
+
+    return pack
+
+
+def _is_pack_stale(pack: qngng._pack.Pack, cat_filename: str,
+                   resource: 'importlib.resources.abc.Traversable') -> bool:
+    if not isinstance(resource, pathlib.Path):
+        return False
+
+    try:
+        size = resource.stat().st_size
+    except FileNotFoundError:
+        return False
+
+    digest = pack.source_digest(cat_filename)
+
+    # a different size avoids reading the source
+    if digest is None or size != digest[0]:
+        return True
+
+    return zlib.crc32(resource.read_bytes()) != digest[1]
+
+
+def _load_json_columns(resource: 'importlib.resources.abc.Traversable') -> qngng._pack.Columns:
+    try:
+        content = resource.read_bytes()
+    except (FileNotFoundError, TypeError):
+        return qngng._pack.Columns()
+
+    import msgspec
+    from qngng._json import JsonEntry
+
+    stats = _stats
+    begin_ns = stats.clock() if stats is not None else 0
+    entries = msgspec.json.decode(content, type=list[JsonEntry])
+
+    if stats is not None:
+        stats.record_time('decode', begin_ns)
+    weights = None
+
+    if any(entry.weight is not None for entry in entries):
+        weights = [1 if entry.weight is None else entry.weight for entry in entries]
+
+    return qngng._pack.Columns(name=[entry.name or '' for entry in entries],
+                               surname=[entry.surname or '' for entry in entries],
+                               weight=weights)
+
+
+def _load_columns(cat_filename: str) -> qngng._pack.Columns:
+    stats = _stats
+
+    if stats is None:
+        return _load_columns_impl(cat_filename)
+
+    begin_ns = stats.clock()
+    columns = _load_columns_impl(cat_filename)
+    stats.record('load_category', 'read', begin_ns)
+    stats.record_entries(cat_filename, len(columns.name or columns.surname or ()))
+    return columns
+
+
+def _load_columns_impl(cat_filename: str) -> qngng._pack.Columns:
+    cached = _cached_columns()
+
+    if cached is not None:
+        return cached.get(cat_filename) or qngng._pack.Columns()
+
+    return _load_source_columns(cat_filename)
+
+
+def _load_source_columns(cat_filename: str) -> qngng._pack.Columns:
+    resource = _resource(f'cats/{cat_filename}.json')
+    pack = _open_pack()
+
+    if pack is not None:
+        columns = pack.columns(cat_filename)
+
+        if columns is not None and not _is_pack_stale(pack, cat_filename, resource):
+            return columns
+
+    return _load_json_columns(resource)
+
+
+_T = typing.TypeVar('_T')
+
+
+def _column_tuple(column: typing.Sequence[_T] | None) -> tuple[_T, ...] | None:
+    return None if column is None else tuple(column)
+
+
+# Returns the columns of all the category resources from the user cache
+# (see `qngng._cache`), writing it first if needed, or `None` without a
+# usable cache.
+@functools.cache
+def _cached_columns() -> dict[str, qngng._pack.Columns] | None:
+    import qngng._cache
+
+    cache_dir = qngng._cache.cache_dir()
+    cats_dir = _resource('cats')
+
+    if cache_dir is None or not isinstance(cats_dir, pathlib.Path):
+        return None
+
+    try:
+        path = qngng._cache.cache_path(cache_dir, cats_dir, qngng.__version__)
+    except OSError:
+        return None
+
+    cats = qngng._cache.load(path)
+
+    if cats is None:
+        cats = {}
+
+        for resource in cats_dir.glob('*.json'):
+            columns = _load_source_columns(resource.stem)
+            cats[resource.stem] = (_column_tuple(columns.name), _column_tuple(columns.surname),
+                                   _column_tuple(columns.weight))
+
+        try:
+            qngng._cache.store(path, cats)
+        except OSError:
+            pass
+
+    return {stem: qngng._pack.Columns(*columns) for stem, columns in cats.items()}
+
+
+def _gender_suffix(gender: Gender) -> str:
+    return 'm' if gender == Gender.MALE else 'f'
+
+
+# Walker/Vose alias table: O(1) weighted sampling within
+# `range(len(weights))`.
+class _AliasTable:
+    __slots__ = ('_probs', '_aliases', '_count', '_np_arrays')
+
+    def __init__(self, weights: typing.Sequence[float]) -> None:
+        count = len(weights)
+        total = sum(weights)
+
+        if count == 0 or total <= 0 or any(weight < 0 for weight in weights):
+            raise ValueError('Weights must be non-negative with a positive sum')
+
+        scaled = [weight * count / total for weight in weights]
+        probs = [1.0] * count
+        aliases = list(range(count))
+        small = [index for index, prob in enumerate(scaled) if prob < 1]
+        large = [index for index, prob in enumerate(scaled) if prob >= 1]
+
+        while small and large:
+            small_index = small.pop()
+            large_index = large.pop()
+            probs[small_index] = scaled[small_index]
+            aliases[small_index] = large_index
+            scaled[large_index] -= 1 - scaled[small_index]
+
+            if scaled[large_index] < 1:
+                small.append(large_index)
+            else:
+                large.append(large_index)
+
+        self._probs = tuple(probs)
+        self._aliases = tuple(aliases)
+        self._count = count
+        self._np_arrays: tuple[typing.Any, typing.Any] | None = None
+
+    def sample(self, rng: random.Random) -> int:
+        # a single draw gives both the column and the biased coin
+        u = rng.random() * self._count
+        index = int(u)
+        return index if u - index < self._probs[index] else self._aliases[index]
+
+    def sample_many(self, np_rng: 'numpy.random.Generator',
+                    count: int) -> 'numpy.typing.NDArray[numpy.intp]':
+        np = _import_numpy()
+
+        if self._np_arrays is None:
+            self._np_arrays = (np.array(self._probs), np.array(self._aliases, dtype=np.intp))
+
+        probs, aliases = self._np_arrays
+        u = np_rng.random(count) * self._count
+        indexes = u.astype(np.intp)
+        return np.where(u - indexes < probs[indexes], indexes, aliases[indexes])
+
+
+# Cumulative weight table: O(log n) weighted sampling within
+# `range(len(weights))`.
+#
+# Compared to `_AliasTable`, it's built in a single C-level pass and
+# takes 8 bytes per weight, which suits the millions of entries of a
+# category file.
+class _CumulativeTable:
+    __slots__ = ('_cumulative', '_total')
+
+    def __init__(self, weights: typing.Iterable[int]) -> None:
+        self._cumulative = array.array('Q', itertools.accumulate(weights))
+        self._total = self._cumulative[-1] if self._cumulative else 0
+
+        if self._total <= 0:
+            raise ValueError('Weights must be non-negative with a positive sum')
+
+    def sample(self, rng: random.Random) -> int:
+        return bisect.bisect_right(self._cumulative, rng.randrange(self._total))
+
+    def sample_many(self, np_rng: 'numpy.random.Generator',
+                    count: int) -> 'numpy.typing.NDArray[numpy.intp]':
+        np = _import_numpy()
+        cumulative = np.frombuffer(self._cumulative, dtype=np.uint64)
+        points = np_rng.integers(0, self._total, count, dtype=np.uint64)
+        return np.searchsorted(cumulative, points, side='right').astype(np.intp)
+
+
+_WeightTable = _AliasTable | _CumulativeTable
+
+
+def _concat_weights(first: typing.Sequence[int] | None, first_len: int,
+                    second: typing.Sequence[int] | None,
+                    second_len: int) -> tuple[int, ...] | None:
+    if first is None and second is None:
+        return None
+
+    return tuple(first or (1,) * first_len) + tuple(second or (1,) * second_len)
+
+
+def _pool_weights(weights: typing.Sequence[int] | None,
+                  keep: typing.Sequence[bool]) -> tuple[int, ...] | None:
+    if weights is None:
+        return None
+
+    return tuple(weight for weight, kept in zip(weights, keep) if kept)
+
+
+# Columnar name pool.
+#
+# For a paired pool (non-std category), `names[i]` and `surnames[i]`
+# form the entry `i`, and `weights[i]` is its optional weight.
+# Otherwise (std category or surname file), `names` and `surnames` are
+# independent lists with their own optional weights (`weights` and
+# `surname_weights`).
+#
+# In both cases, the male entries come first, so that the gender of
+# `names[i]` is male when `i < male_count`.
+#
+# `category` is the source category of all the entries.
+#
+# Pools of which the surnames come from `surname_pool` share its
+# surname weight table and prefix index.
+#
+# The columns of a lazy pool (category file) decode their entries on
+# access: the pool never builds per-entry formatting tables.
+class _Pool:
+    __slots__ = ('category', 'names', 'surnames', 'male_count', 'weights', 'surname_weights',
+                 'paired', 'lazy', '_surname_pool', '_alias', '_surname_alias', '_has_part_forms',
+                 '_form_columns', '_name_prefix_index', '_surname_prefix_index', '_letters',
+                 '_part_lengths')
+
+    def __init__(self, category: Category | str, names: typing.Sequence[str],
+                 surnames: typing.Sequence[str], male_count: int,
+                 weights: typing.Sequence[int] | None = None,
+                 surname_weights: typing.Sequence[int] | None = None, paired: bool = True,
+                 lazy: bool = False, surname_pool: '_Pool | None' = None) -> None:
+        self.category = category
+        self.names = names
+        self.surnames = surnames
+        self.male_count = male_count
+        self.weights = weights
+        self.surname_weights = surname_weights
+        self.paired = paired
+        self.lazy = lazy
+        self._surname_pool = surname_pool
+        self._alias: _WeightTable | None = None
+        self._surname_alias: _WeightTable | None = None
+        self._has_part_forms = False
+        self._form_columns: dict[int, tuple[tuple[str, ...], tuple[str, ...],
+                                            tuple[str, ...]]] = {}
+        self._name_prefix_index: _PrefixIndex | None = None
+        self._surname_prefix_index: _PrefixIndex | None = None
+        self._letters: tuple[tuple[str, ...], tuple[str, ...]] | None = None
+        self._part_lengths: dict[tuple[Format, bool], tuple[tuple[int, ...], tuple[int, ...],
+                                                            tuple[int, ...]]] = {}
+
+    def gender_at(self, index: int) -> Gender:
+        return Gender.MALE if index < self.male_count else Gender.FEMALE
+
+    # weight tables are built on first use, then shared like the pool
+    def _weight_table(self, weights: typing.Sequence[int]) -> _WeightTable:
+        return _CumulativeTable(weights) if self.lazy else _AliasTable(weights)
+
+    def alias(self) -> _WeightTable | None:
+        if self._alias is None and self.weights is not None:
+            self._alias = self._weight_table(self.weights)
+
+        return self._alias
+
+    def surname_alias(self) -> _WeightTable | None:
+        if self._surname_pool is not None:
+            return self._surname_pool.surname_alias()
+
+        if self._surname_alias is None and self.surname_weights is not None:
+            self._surname_alias = self._weight_table(self.surname_weights)
+
+        return self._surname_alias
+
+    def add_part_forms(self) -> None:
+        if not self._has_part_forms and not self.lazy:
+            stats = _stats
+            begin_ns = stats.clock() if stats is not None else 0
+            _add_part_forms(itertools.chain(self.names, self.surnames,
+                                            {name[0].upper() for name in self.names}))
+            self._has_part_forms = True
+
+            if stats is not None:
+                stats.record_time('build', begin_ns)
+
+    # Returns the forms of index `form_index` (see `_PartForms`) of the
+    # names, of the surnames, and of the initials of the names.
+    def form_columns(self, form_index: int) -> tuple[tuple[str, ...], tuple[str, ...],
+                                                     tuple[str, ...]]:
+        columns = self._form_columns.get(form_index)
+
+        if columns is None:
+            self.add_part_forms()
+            columns = (tuple(_part_forms(name)[form_index] for name in self.names),
+                       tuple(_part_forms(surname)[form_index] for surname in self.surnames),
+                       tuple(_part_forms(name[0].upper())[form_index] for name in self.names))
+            self._form_columns[form_index] = columns
+
+        return columns
+
+    # Constrained generation indexes (see `Constraints`), built on first
+    # use, then shared like the pool.
+    def name_prefix_index(self) -> '_PrefixIndex':
+        if self._name_prefix_index is None:
+            self._name_prefix_index = _PrefixIndex(self.names)
+
+        return self._name_prefix_index
+
+    def surname_prefix_index(self) -> '_PrefixIndex':
+        if self._surname_pool is not None:
+            return self._surname_pool.surname_prefix_index()
+
+        if self._surname_prefix_index is None:
+            self._surname_prefix_index = _PrefixIndex(self.surnames)
+
+        return self._surname_prefix_index
+
+    def _initials(self) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        if self._letters is None:
+            self._letters = (tuple(_search_key(name)[:1] for name in self.names),
+                             tuple(_search_key(surname)[:1] for surname in self.surnames))
+
+        return self._letters
+
+    def name_letters(self) -> tuple[str, ...]:
+        return self._initials()[0]
+
+    def surname_letters(self) -> tuple[str, ...]:
+        return self._initials()[1]
+
+    # Returns the lengths, once formatted with `fmt`, of the names, of
+    # the surnames, and of the names as middle names.
+    def part_lengths(self, fmt: Format,
+                     with_middle_initial: bool) -> tuple[tuple[int, ...], tuple[int, ...],
+                                                         tuple[int, ...]]:
+        lengths = self._part_lengths.get((fmt, with_middle_initial))
+
+        if lengths is None:
+            if fmt == Format.DEFAULT:
+                name_lengths = tuple(map(len, self.names))
+                surname_lengths = tuple(map(len, self.surnames))
+
+                # `X.`
+                initial_lengths = (2,) * len(self.names)
+            else:
+                name_forms, surname_forms, initial_forms = self.form_columns(
+                    _FORMAT_SPECS[fmt][0])
+                name_lengths = tuple(map(len, name_forms))
+                surname_lengths = tuple(map(len, surname_forms))
+                initial_lengths = tuple(map(len, initial_forms))
+
+            lengths = (name_lengths, surname_lengths,
+                       initial_lengths if with_middle_initial else name_lengths)
+            self._part_lengths[fmt, with_middle_initial] = lengths
+
+        return lengths
+
+    @staticmethod
+    def concat(male: '_Pool', female: '_Pool') -> '_Pool':
+        return _Pool(male.category, tuple(male.names) + tuple(female.names),
+                     tuple(male.surnames) + tuple(female.surnames), len(male.names),
+                     _concat_weights(male.weights, len(male.names), female.weights,
+                                     len(female.names)))
+
+
+# The functions below make up the process-wide category cache: each
+# category is loaded once, on first use, and shared as an immutable
+# pool by all the name generators. Identical strings are interned.
+@functools.cache
+def _cat_pool(cat: Category, gender: Gender | None) -> _Pool:
+    if gender is None:
+        return _Pool.concat(_cat_pool(cat, Gender.MALE), _cat_pool(cat, Gender.FEMALE))
+
+    columns = _load_columns(f'{cat}-{_gender_suffix(gender)}')
+    stats = _stats
+    begin_ns = stats.clock() if stats is not None else 0
+    entries = list(zip(columns.name or (), columns.surname or ()))
+    keep = [bool(name and surname) for name, surname in entries]
+    names = tuple(sys.intern(name) for (name, _), kept in zip(entries, keep) if kept)
+    surnames = tuple(sys.intern(surname) for (_, surname), kept in zip(entries, keep) if kept)
+    pool = _Pool(cat, names, surnames, len(names) if gender == Gender.MALE else 0,
+                 _pool_weights(columns.weight, keep))
+
+    if stats is not None:
+        stats.record_time('build', begin_ns)
+
+    return pool
+
+
+# The std surnames don't depend on the gender: all the std pools share
+# this surname pool.
+@functools.cache
+def _std_surname_pool() -> _Pool:
+    surname_columns = _load_columns('std-surnames')
+    stats = _stats
+    begin_ns = stats.clock() if stats is not None else 0
+    surname_keep = [bool(surname) for surname in surname_columns.surname or ()]
+    surnames = tuple(sys.intern(surname) for surname in surname_columns.surname or () if surname)
+    pool = _Pool(Category.STD, (), surnames, 0,
+                 surname_weights=_pool_weights(surname_columns.weight, surname_keep),
+                 paired=False)
+
+    if stats is not None:
+        stats.record_time('build', begin_ns)
+
+    return pool
+
+
+@functools.cache
+def _std_pool(gender: Gender | None) -> _Pool:
+    surname_pool = _std_surname_pool()
+
+    if gender is None:
+        male = _std_pool(Gender.MALE)
+        female = _std_pool(Gender.FEMALE)
+        return _Pool(Category.STD, tuple(male.names) + tuple(female.names), surname_pool.surnames,
+                     len(male.names),
+                     _concat_weights(male.weights, len(male.names), female.weights,
+                                     len(female.names)),
+                     surname_pool.surname_weights, paired=False, surname_pool=surname_pool)
+
+    name_columns = _load_columns(f'std-names-{_gender_suffix(gender)}')
+    stats = _stats
+    begin_ns = stats.clock() if stats is not None else 0
+    name_keep = [bool(name) for name in name_columns.name or ()]
+    names = tuple(sys.intern(name) for name in name_columns.name or () if name)
+    pool = _Pool(Category.STD, names, surname_pool.surnames,
+                 len(names) if gender == Gender.MALE else 0,
+                 _pool_weights(name_columns.weight, name_keep), surname_pool.surname_weights,
+                 paired=False, surname_pool=surname_pool)
+
+    if stats is not None:
+        stats.record_time('build', begin_ns)
+
+    return pool
+
+
+@functools.cache
+def _cat_file(path: str) -> 'qngng._catfile.CatFile':
+    import qngng._catfile
+
+    return qngng._catfile.CatFile(path)
+
+
+@functools.cache
+def _file_pool(cat_file: CategoryFile, gender: Gender | None) -> _Pool:
+    stats = _stats
+    begin_ns = stats.clock() if stats is not None else 0
+    source = _cat_file(cat_file.path)
+
+    if stats is not None:
+        stats.record('load_category_file', 'read', begin_ns)
+
+    # a surname file takes its first names from the std category
+    if not source.has_names:
+        std_pool = _std_pool(gender)
+        surnames, surname_weights = source.surnames()
+        pool = _Pool(cat_file.name, std_pool.names, surnames, std_pool.male_count,
+                     std_pool.weights, surname_weights, paired=False, lazy=True)
+    else:
+        names, surnames, male_count, weights = source.entries(gender)
+        pool = _Pool(cat_file.name, names, surnames, male_count, weights, lazy=True)
+
+    if stats is not None:
+        stats.record_entries(cat_file.name, len(pool.surnames))
+
+    return pool
+
+
+def _randrange_except(rng: random.Random, n: int, excluded: int) -> int:
+    # uniform within `range(n)`, minus `excluded`
+    index = rng.randrange(n - 1)
+    return index + 1 if index >= excluded else index
+
+
+def _draw(rng: random.Random, n: int, alias: _WeightTable | None) -> int:
+    return rng.randrange(n) if alias is None else alias.sample(rng)
+
+
+def _draw_except(rng: random.Random, n: int, alias: _WeightTable | None, excluded: int) -> int:
+    if alias is None:
+        return _randrange_except(rng, n, excluded)
+
+    # weighted sampling without replacement: redrawing is exact and
+    # takes 1 / (1 - p) draws on average, where `p` is the probability
+    # of `excluded`
+    while True:
+        index = alias.sample(rng)
+
+        if index != excluded:
+            return index
+
+
+# NumPy counterparts of `_draw()` and `_draw_except()`, drawing `count`
+# indexes, or `len(excluded)` indexes, at once.
+def _np_draw(np_rng: 'numpy.random.Generator', n: int, alias: _WeightTable | None,
+             count: int) -> 'numpy.typing.NDArray[numpy.intp]':
+    if alias is None:
+        return np_rng.integers(0, n, count)
+
+    return alias.sample_many(np_rng, count)
+
+
+def _np_draw_except(np_rng: 'numpy.random.Generator', n: int, alias: _WeightTable | None,
+                    excluded: 'numpy.typing.NDArray[numpy.intp]') -> 'numpy.typing.NDArray[numpy.intp]':
+    np = _import_numpy()
+
+    if alias is None:
+        indexes = np_rng.integers(0, n - 1, len(excluded))
+        return indexes + (indexes >= excluded)
+
+    indexes = alias.sample_many(np_rng, len(excluded))
+
+    while True:
+        redraw = np.flatnonzero(indexes == excluded)
+
+        if redraw.size == 0:
+            return indexes
+
+        indexes[redraw] = alias.sample_many(np_rng, redraw.size)
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(x: int) -> int:
+    # SplitMix64 finalizer
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & _MASK64
+    return x ^ (x >> 31)
+
+
+# Keyed pseudo-random permutation of `range(size)`.
+#
+# This is a four-round balanced Feistel network over the smallest
+# even-width bit domain containing `size`, with cycle walking to stay
+# within `range(size)`. The domain is less than four times `size`, so
+# that a lookup takes less than four network passes on average.
+class _FeistelPermutation:
+    _ROUND_COUNT = 4
+
+    def __init__(self, size: int, key: int) -> None:
+        self._size = size
+        self._half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self._half_mask = (1 << self._half_bits) - 1
+        self._round_keys = tuple(_mix64((key + i * 0x9e3779b97f4a7c15) & _MASK64)
+                                 for i in range(self._ROUND_COUNT))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> int:
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+
+        half_bits = self._half_bits
+        half_mask = self._half_mask
+
+        while True:
+            left = index >> half_bits
+            right = index & half_mask
+
+            for round_key in self._round_keys:
+                left, right = right, left ^ (_mix64(right ^ round_key) & half_mask)
+
+            index = (left << half_bits) | right
+
+            if index < self._size:
+                return index
+
+
+def _derive_seed(seed: int, index: int) -> int:
+    import hashlib
+
+    # hashing decorrelates the seeds of neighbouring indexes
+    digest = hashlib.blake2b(f'{seed}:{index}'.encode(), digest_size=32,
+                             person=b'qngng-substream').digest()
+    return int.from_bytes(digest, 'little')
+
+
+# A drawn name: pool, name index, middle name index, surname index, and
+# second surname index, where -1 means none. The name and surname
+# indexes are the same for a non-std category pool.
+_Draw = tuple[_Pool, int, int, int, int]
+
+_NP_BATCH_SIZE = 65536
+_LEDGER_BATCH_SIZE = 1024
+_LEDGER_MAX_REJECTED_COUNT = 100_000
+
+
+def _batch_sizes(count: int | None, batch_size: int) -> typing.Iterator[int]:
+    if count is None:
+        yield from itertools.repeat(batch_size)
+        return
+
+    while count > 0:
+        yield min(count, batch_size)
+        count -= batch_size
+
+
+# Constrained generation.
+#
+# `Constraints` restricts the generated names:
+#
+# `initial`:
+#     First letter of the name.
+#
+# `surname_prefix`:
+#     Prefix of the (first) surname.
+#
+# `alliterative`:
+#     Whether or not the name and the surname must start with the same
+#     letter.
+#
+# `max_length`:
+#     Maximum length of the name formatted with `fmt` and
+#     `with_middle_initial` (see `format_name()`).
+#
+# Comparisons ignore case and diacritics.
+#
+# Instead of drawing names until one matches, a constrained generator
+# only draws amongst eligible combinations: the candidate parts come
+# from the prefix indexes of the pools, and the combinations are grouped
+# by initial and by length so that each group is drawn with a
+# probability proportional to its total weight. The result has the same
+# distribution as rejecting unconstrained draws, except that weighted
+# draws of distinct parts (name and middle name, two surnames) use the
+# product of their weights.
+class Constraints(typing.NamedTuple):
+    initial: str | None = None
+    surname_prefix: str | None = None
+    alliterative: bool = False
+    max_length: int | None = None
+    fmt: Format = Format.DEFAULT
+    with_middle_initial: bool = True
+
+
+def _search_key(s: str) -> str:
+    return _strip_diacritics(s).casefold()
+
+
+# Sorted search keys of parts: `lookup()` finds the indexes of the parts
+# starting with some prefix with two binary searches.
+class _PrefixIndex:
+    __slots__ = ('_keys', '_indexes')
+
+    def __init__(self, parts: typing.Sequence[str]) -> None:
+        pairs = sorted((_search_key(part), index) for index, part in enumerate(parts))
+        self._keys = [key for key, _ in pairs]
+        self._indexes = [index for _, index in pairs]
+
+    def lookup(self, prefix: str) -> list[int]:
+        key = _search_key(prefix)
+        begin = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_left(self._keys, key + '\U0010ffff', begin)
+        return sorted(self._indexes[begin:end])
+
+
+# Length of the separator between two parts of a name formatted with
+# `fmt`, including the one between two surnames.
+def _separator_length(fmt: Format) -> int:
+    return 0 if fmt in (Format.CAMEL, Format.CAP_CAMEL) else 1
+
+
+# Entries of which `draw()` returns an index with a probability
+# proportional to its weight.
+class _Bucket:
+    __slots__ = ('indexes', 'weights', 'total', '_alias')
+
+    def __init__(self) -> None:
+        self.indexes: list[int] = []
+        self.weights: list[int] = []
+        self.total = 0
+        self._alias: _AliasTable | None = None
+
+    def add(self, index: int, weight: int) -> None:
+        self.indexes.append(index)
+        self.weights.append(weight)
+        self.total += weight
+
+    def draw(self, rng: random.Random) -> int:
+        if self.total == len(self.indexes):
+            # all the weights are 1
+            return self.indexes[rng.randrange(len(self.indexes))]
+
+        if self._alias is None:
+            self._alias = _AliasTable(self.weights)
+
+        return self.indexes[self._alias.sample(rng)]
+
+
+# Items of which `draw()` returns one with a probability proportional to
+# its weight; items without weight are dropped.
+class _Choice(typing.Generic[_T]):
+    __slots__ = ('items', 'total', '_alias')
+
+    def __init__(self, weighted_items: typing.Iterable[tuple[_T, float]]) -> None:
+        weighted_items = [(item, weight) for item, weight in weighted_items if weight > 0]
+        self.items = [item for item, _ in weighted_items]
+        weights = [weight for _, weight in weighted_items]
+        self.total = sum(weights)
+        self._alias = _AliasTable(weights) if weights else None
+
+    def draw(self, rng: random.Random) -> _T:
+        assert self._alias is not None
+        return self.items[self._alias.sample(rng)]
+
+
+# Draws a first part amongst candidates and, if `with_second` is true,
+# a distinct second part amongst all the parts.
+#
+# The pairs are grouped by key: the initial of the first part (or an
+# empty string if `letters` is `None`) and the total length of both
+# parts (or 0 if `lengths` is `None`). `groups` maps each key to a
+# choice of a bucket of first parts (same initial and length) and of a
+# length of second parts.
+class _PairSampler:
+    __slots__ = ('groups', '_firsts', '_seconds')
+
+    def __init__(self, candidates: typing.Iterable[int], letters: typing.Sequence[str] | None,
+                 lengths: typing.Sequence[int] | None, with_second: bool,
+                 second_lengths: typing.Sequence[int] | None,
+                 weights: typing.Sequence[int] | None, count: int) -> None:
+        def weight(index: int) -> int:
+            return 1 if weights is None else weights[index]
+
+        def length(lengths: typing.Sequence[int] | None, index: int) -> int:
+            return 0 if lengths is None else lengths[index]
+
+        self._firsts: dict[tuple[str, int], _Bucket] = {}
+        self._seconds: dict[int, _Bucket] = {}
+
+        # sum of the squared weights of the first parts by first bucket
+        # and second part length: a part can't be its own second part
+        squares: collections.Counter[tuple[tuple[str, int], int]] = collections.Counter()
+
+        for index in candidates:
+            key = ('' if letters is None else letters[index], length(lengths, index))
+            self._firsts.setdefault(key, _Bucket()).add(index, weight(index))
+
+            if with_second:
+                squares[key, length(second_lengths, index)] += weight(index) ** 2
+
+        group_items: dict[tuple[str, int],
+                          list[tuple[tuple[tuple[str, int], int], float]]] = {}
+
+        if not with_second:
+            for key, bucket in self._firsts.items():
+                group_items.setdefault(key, []).append(((key, -1), bucket.total))
+        else:
+            for index in range(count):
+                self._seconds.setdefault(length(second_lengths, index),
+                                         _Bucket()).add(index, weight(index))
+
+            for key, bucket in self._firsts.items():
+                letter, first_length = key
+
+                for second_length, second_bucket in self._seconds.items():
+                    pair_weight = (bucket.total * second_bucket.total -
+                                   squares[key, second_length])
+                    group_items.setdefault((letter, first_length + second_length), []).append(
+                        ((key, second_length), pair_weight))
+
+        self.groups = {key: choice for key, items in group_items.items()
+                       if (choice := _Choice(items)).total > 0}
+
+    def draw(self, rng: random.Random, key: tuple[str, int]) -> tuple[int, int]:
+        first_key, second_length = self.groups[key].draw(rng)
+        first_bucket = self._firsts[first_key]
+
+        if second_length < 0:
+            return first_bucket.draw(rng), -1
+
+        second_bucket = self._seconds[second_length]
+
+        # distinct parts: redrawing both is exact for the product of the
+        # weights, and the group excludes the pairs of a single part
+        while True:
+            first = first_bucket.draw(rng)
+            second = second_bucket.draw(rng)
+
+            if first != second:
+                return first, second
+
+
+# Constrained sampler of a std category pool.
+class _StdSampler:
+    __slots__ = ('total', 'fraction', '_pool', '_names', '_surnames', '_groups')
+
+    def __init__(self, pool: _Pool, constraints: Constraints, weighted: bool,
+                 with_middle_name: bool, surname_count: int) -> None:
+        self._pool = pool
+        name_weights = pool.weights if weighted else None
+        surname_weights = pool.surname_weights if weighted else None
+        name_lengths = surname_lengths = middle_lengths = None
+        name_letters = surname_letters = None
+        budget = 0
+
+        if constraints.max_length is not None:
+            name_lengths, surname_lengths, middle_lengths = pool.part_lengths(
+                constraints.fmt, constraints.with_middle_initial)
+            part_count = 2 + with_middle_name + (surname_count == 2)
+            budget = (constraints.max_length -
+                      (part_count - 1) * _separator_length(constraints.fmt))
+
+        if constraints.alliterative:
+            name_letters = pool.name_letters()
+            surname_letters = pool.surname_letters()
+
+        name_candidates = (range(len(pool.names)) if constraints.initial is None
+                           else pool.name_prefix_index().lookup(constraints.initial))
+        surname_candidates = (range(len(pool.surnames)) if constraints.surname_prefix is None
+                              else pool.surname_prefix_index().lookup(constraints.surname_prefix))
+        self._names = _PairSampler(name_candidates, name_letters, name_lengths, with_middle_name,
+                                   middle_lengths, name_weights, len(pool.names))
+        self._surnames = _PairSampler(surname_candidates, surname_letters, surname_lengths,
+                                      surname_count == 2, surname_lengths, surname_weights,
+                                      len(pool.surnames))
+        self._groups = _Choice(
+            ((name_key, surname_key), name_choice.total * surname_choice.total)
+            for name_key, name_choice in self._names.groups.items()
+            for surname_key, surname_choice in self._surnames.groups.items()
+            if name_key[0] == surname_key[0] and
+            (constraints.max_length is None or name_key[1] + surname_key[1] <= budget)
+        )
+        self.total = self._groups.total
+
+        # fraction of the weight of all the combinations
+        all_total = (self._all_total(name_weights, len(pool.names), with_middle_name) *
+                     self._all_total(surname_weights, len(pool.surnames), surname_count == 2))
+        self.fraction = self.total / all_total if all_total else 0
+
+    @staticmethod
+    def _all_total(weights: typing.Sequence[int] | None, count: int, distinct_pair: bool) -> int:
+        total = count if weights is None else sum(weights)
+
+        if not distinct_pair:
+            return total
+
+        return total * total - (count if weights is None else sum(w * w for w in weights))
+
+    def draw(self, rng: random.Random) -> _Draw:
+        name_key, surname_key = self._groups.draw(rng)
+        name_index, middle_index = self._names.draw(rng, name_key)
+        surname_index, second_index = self._surnames.draw(rng, surname_key)
+        return self._pool, name_index, middle_index, surname_index, second_index
+
+
+# Constrained sampler of a non-std category pool: its entries are
+# filtered once.
+class _CatSampler:
+    __slots__ = ('total', 'fraction', '_pool', '_bucket')
+
+    def __init__(self, pool: _Pool, constraints: Constraints, weighted: bool) -> None:
+        self._pool = pool
+        weights = pool.weights if weighted else None
+        candidates: typing.Iterable[int] = range(len(pool.names))
+
+        if constraints.initial is not None:
+            candidates = pool.name_prefix_index().lookup(constraints.initial)
+
+        if constraints.surname_prefix is not None:
+            surname_candidates = set(pool.surname_prefix_index().lookup(
+                constraints.surname_prefix))
+            candidates = [index for index in candidates if index in surname_candidates]
+
+        if constraints.alliterative:
+            name_letters = pool.name_letters()
+            surname_letters = pool.surname_letters()
+            candidates = [index for index in candidates
+                          if name_letters[index] == surname_letters[index]]
+
+        if constraints.max_length is not None:
+            name_lengths, surname_lengths, _ = pool.part_lengths(constraints.fmt,
+                                                                 constraints.with_middle_initial)
+            budget = constraints.max_length - _separator_length(constraints.fmt)
+            candidates = [index for index in candidates
+                          if name_lengths[index] + surname_lengths[index] <= budget]
+
+        self._bucket = _Bucket()
+
+        for index in candidates:
+            self._bucket.add(index, 1 if weights is None else weights[index])
+
+        self.total = self._bucket.total
+        all_total = len(pool.names) if weights is None else sum(weights)
+        self.fraction = self.total / all_total if all_total else 0
+
+    def draw(self, rng: random.Random) -> _Draw:
+        index = self._bucket.draw(rng)
+        return self._pool, index, -1, index, -1
+
 
 class NameGenerator:
     def __init__(self, surname_count: typing.Literal[1, 2] = 1, with_middle_name: bool = False,
                  gender: Gender | None = None,
-                 categories: frozenset[Category] = frozenset({Category.STD})) -> None:
+                 categories: frozenset[Category | CategoryFile] = frozenset({Category.STD}),
+                 weighted: bool = False,
+                 category_weights: typing.Mapping[Category | CategoryFile, float] | None = None,
+                 seed: int | None = None, rng: random.Random | None = None,
+                 constraints: Constraints | None = None) -> None:
+        if seed is not None and rng is not None:
+            raise ValueError('Cannot specify both a seed and a random number generator')
+
         self._surname_count = surname_count
         self._with_middle_name = with_middle_name
         self._gender = gender
-        self._cat_objs: dict[Category, list[FullName]] = {}
-        self._name_objs: list[PartialName] = []
-        self._surname_objs: list[PartialName] = []
-        self._create_objs(categories)
+        self._weighted = weighted
+        self._category_weights = category_weights
+        self._seed = seed
+        self._rng = random.Random(seed) if rng is None else rng
+        self._categories = tuple(sorted(categories, key=_category_sort_key))
+        self._cat_pools: dict[Category | CategoryFile, _Pool] = {}
+
+        # formatting tables don't apply to category files
+        self._has_cat_files = any(isinstance(cat, CategoryFile) for cat in categories)
+        self._cat_alias: _AliasTable | None = None
+
+        if category_weights is not None:
+            if not category_weights.keys() <= categories:
+                raise ValueError('Category weights must only refer to the requested categories')
+
+            self._cat_alias = _AliasTable([category_weights.get(cat, 1.0)
+                                           for cat in self._categories])
+
+        self._constraints = constraints
+        self._constrained: _Choice[_StdSampler | _CatSampler] | None = None
+
+        if constraints is not None and (constraints.initial is not None or
+                                        constraints.surname_prefix is not None or
+                                        constraints.alliterative or
+                                        constraints.max_length is not None):
+            self._constrained = self._constrained_sampler(constraints)
+
+    # Returns a generator with the same options, and sharing the same
+    # category data, of which the random number generator is seeded from
+    # this generator's seed (or from its random number generator) and
+    # `index`.
+    #
+    # Distinct indexes give statistically independent streams: parallel
+    # workers using one substream each produce reproducible output
+    # which doesn't overlap.
+    def substream(self, index: int) -> 'NameGenerator':
+        options = self._parallel_options()
+        options['seed'] = _derive_seed(options['seed'], index)
+        return NameGenerator(**options)
+
+    def substreams(self, count: int) -> list['NameGenerator']:
+        return [self.substream(index) for index in range(count)]
+
+    # picklable constructor arguments of a generator of which the
+    # substreams are the ones of this generator
+    def _parallel_options(self) -> dict[str, typing.Any]:
+        if self._seed is None:
+            self._seed = self._rng.getrandbits(128)
+
+        return {
+            'surname_count': self._surname_count,
+            'with_middle_name': self._with_middle_name,
+            'gender': self._gender,
+            'categories': frozenset(self._categories),
+            'weighted': self._weighted,
+            'category_weights': self._category_weights,
+            'seed': self._seed,
+            'constraints': self._constraints,
+        }
+
+    # Builds the samplers of all the categories now so that impossible
+    # constraints fail immediately.
+    def _constrained_sampler(self, constraints: Constraints) -> _Choice[_StdSampler | _CatSampler]:
+        if constraints.initial is not None and len(constraints.initial) != 1:
+            raise ValueError('The initial must be a single character')
+
+        if constraints.surname_prefix == '':
+            raise ValueError('The surname prefix must not be empty')
+
+        samplers: list[tuple[_StdSampler | _CatSampler, float]] = []
+
+        for cat in self._categories:
+            sampler: _StdSampler | _CatSampler
+            pool = self._pool(cat)
+
+            if not pool.paired:
+                sampler = _StdSampler(pool, constraints, self._weighted,
+                                      self._with_middle_name, self._surname_count)
+            else:
+                sampler = _CatSampler(pool, constraints, self._weighted)
+
+            cat_weight = (1.0 if self._category_weights is None
+                          else self._category_weights.get(cat, 1.0))
+
+            # like rejecting unconstrained draws: the weight of a category
+            # is scaled by the fraction of its names which are eligible
+            samplers.append((sampler, cat_weight * sampler.fraction))
+
+        choice = _Choice(samplers)
+
+        if choice.total == 0:
+            raise ValueError('No name satisfies the constraints')
+
+        return choice
+
+    # Loads the data of all the categories of this generator now instead
+    # of on first use, including the weight tables and, if
+    # `with_formatting` is true, the formatting tables.
+    #
+    # After this, drawing names with the Python backend doesn't modify
+    # any shared data (see `ThreadSafeNameGenerator`). The NumPy backend
+    # still converts a weight table to NumPy arrays on first use: threads
+    # racing to do so build equal arrays, and one of them is kept.
+    def preload(self, with_formatting: bool = True) -> None:
+        for cat in self._categories:
+            pool = self._pool(cat)
+
+            if self._weighted:
+                pool.alias()
+                pool.surname_alias()
+
+            if with_formatting:
+                pool.add_part_forms()
+
+    @functools.cached_property
+    def _std_pool(self) -> _Pool:
+        pool = _std_pool(self._gender)
+
+        if self._weighted:
+            self._check_weights(pool.weights, self._with_middle_name)
+            self._check_weights(pool.surname_weights, self._surname_count == 2)
+
+        return pool
+
+    @staticmethod
+    def _check_weights(weights: typing.Sequence[int] | None, distinct_pair: bool) -> None:
+        if weights is None:
+            return
+
+        # drawing two distinct entries requires two possible ones
+        if sum(1 for weight in weights if weight > 0) < (2 if distinct_pair else 1):
+            raise ValueError('Not enough entries with a positive weight')
+
+    def random_name_tuple(self) -> NameTuple:
+        stats = _stats
+        begin_ns = stats.clock() if stats is not None else 0
+        pool, name_index, middle_index, surname_index, second_index = self._random_draw()
+        surname = pool.surnames[surname_index]
+
+        if second_index >= 0:
+            surname += '-' + pool.surnames[second_index]
+
+        name_tuple = NameTuple(pool.names[name_index], surname, pool.gender_at(name_index),
+                               pool.names[middle_index] if middle_index >= 0 else None,
+                               pool.category)
+
+        if stats is not None:
+            stats.record('random_name_tuple', 'sample', begin_ns)
+
+        return name_tuple
+
+    # Draws a random name as indexes: see `_Draw`.
+    def _random_draw(self) -> _Draw:
+        if self._constrained is not None:
+            return self._constrained.draw(self._rng).draw(self._rng)
 
-    def random_full_name(self) -> FullName:
-        rand_cat = random.choice(list(self._cat_objs.keys()))
+        if self._cat_alias is None:
+            rand_cat = self._rng.choice(self._categories)
+        else:
+            rand_cat = self._categories[self._cat_alias.sample(self._rng)]
+
+        pool = self._pool(rand_cat)
+
+        if not pool.paired:
+            return self._random_std_draw(pool)
+
+        index = _draw(self._rng, len(pool.names), pool.alias() if self._weighted else None)
+        return pool, index, -1, index, -1
+
+    def random_full_name(self) -> 'FullName':
+        return self.random_name_tuple().to_full_name()
+
+    # Batch API.
+    #
+    # With `Backend.NUMPY`, all the indexes of a batch are drawn at once
+    # as NumPy arrays; only building the resulting objects or strings
+    # remains a Python loop. `Backend.AUTO` selects `Backend.NUMPY` when
+    # NumPy is available.
+    def random_name_tuples(self, count: int, backend: Backend = Backend.PYTHON) -> list[NameTuple]:
+        # constrained draws aren't vectorized
+        if self._constrained is None and _resolve_backend(backend) == Backend.NUMPY:
+            return self._np_random_name_tuples(count)
+
+        return [self.random_name_tuple() for _ in range(count)]
+
+    def random_full_names(self, count: int,
+                          backend: Backend = Backend.PYTHON) -> list['FullName']:
+        return [name_tuple.to_full_name()
+                for name_tuple in self.random_name_tuples(count, backend)]
+
+    def random_formatted_names(self, count: int, fmt: Format = Format.DEFAULT,
+                               with_middle_initial: bool = True,
+                               backend: Backend = Backend.PYTHON) -> list[str]:
+        self._prepare_formatting(fmt)
+        return [format_name(name_tuple, fmt, with_middle_initial)
+                for name_tuple in self.random_name_tuples(count, backend)]
+
+    def iter_full_names(self, count: int | None = None) -> typing.Iterator['FullName']:
+        if count is None:
+            while True:
+                yield self.random_full_name()
+
+        for _ in range(count):
+            yield self.random_full_name()
+
+    def iter_formatted_names(self, count: int | None = None, fmt: Format = Format.DEFAULT,
+                             with_middle_initial: bool = True,
+                             backend: Backend = Backend.PYTHON) -> typing.Iterator[str]:
+        self._prepare_formatting(fmt)
+
+        if self._constrained is None and _resolve_backend(backend) == Backend.NUMPY:
+            for batch_size in _batch_sizes(count, _NP_BATCH_SIZE):
+                yield from self.random_formatted_names(batch_size, fmt, with_middle_initial,
+                                                       Backend.NUMPY)
+
+            return
+
+        it = itertools.repeat(None) if count is None else itertools.repeat(None, count)
+
+        # the instrumented path gives the same names (see `_stats`)
+        if fmt == Format.DEFAULT or _stats is not None or self._has_cat_files:
+            rand_name_tuple = self.random_name_tuple
+
+            for _ in it:
+                yield format_name(rand_name_tuple(), fmt, with_middle_initial)
+
+            return
+
+        # join the precomputed forms of the drawn parts
+        random_draw = self._random_draw
+        form_index, sep = _FORMAT_SPECS[fmt]
+        camel = fmt == Format.CAMEL
+
+        for _ in it:
+            pool, name_index, middle_index, surname_index, second_index = random_draw()
+            name_forms, surname_forms, initial_forms = pool.form_columns(form_index)
+            parts = [name_forms[name_index]]
+
+            if middle_index >= 0:
+                parts.append((initial_forms if with_middle_initial else name_forms)[middle_index])
+
+            parts.append(surname_forms[surname_index])
+
+            if second_index >= 0:
+                parts.append(surname_forms[second_index])
+
+            name = sep.join(parts)
+            yield name[0].lower() + name[1:] if camel and name else name
+
+    # Asynchronous batch API.
+    #
+    # Yields lists of at most `batch_size` formatted names, `count` names
+    # in total (unbounded if `None`).
+    #
+    # A producer task generates the batches ahead of the consumer into a
+    # queue of at most `max_pending` batches: it waits while the queue is
+    # full, so that a slow consumer bounds the memory. The producer
+    # returns control to the event loop after each batch, and generates
+    # the batches of at least `offload_size` names in `executor` (the
+    # default executor of the running loop if `None`) so that they don't
+    # block the loop.
+    #
+    # `executor` must run its calls in this process (for example, a
+    # thread pool), and this generator must not be used otherwise until
+    # the iteration ends.
+    async def agenerate(self, count: int | None = None, batch_size: int = 1024,
+                        fmt: Format = Format.DEFAULT, with_middle_initial: bool = True,
+                        backend: Backend = Backend.PYTHON, max_pending: int = 2,
+                        executor: 'concurrent.futures.Executor | None' = None,
+                        offload_size: int = 16384) -> typing.AsyncIterator[list[str]]:
+        import asyncio
+
+        if batch_size < 1:
+            raise ValueError('The batch size must be positive')
+
+        if max_pending < 1:
+            raise ValueError('The maximum number of pending batches must be positive')
+
+        self._prepare_formatting(fmt)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[list[str] | Exception | None] = asyncio.Queue(max_pending)
+
+        # offloaded batch being generated, if any
+        offloaded: asyncio.Future[list[str]] | None = None
+
+        def batch(size: int) -> list[str]:
+            return list(self.iter_formatted_names(size, fmt, with_middle_initial, backend))
+
+        async def produce() -> None:
+            nonlocal offloaded
+
+            try:
+                for size in _batch_sizes(count, batch_size):
+                    if size >= offload_size:
+                        # cancelling the producer doesn't stop an executor
+                        # which already started the batch
+                        offloaded = loop.run_in_executor(executor, batch, size)
+                        names = await asyncio.shield(offloaded)
+                        offloaded = None
+                        await queue.put(names)
+                    else:
+                        await queue.put(batch(size))
+                        await asyncio.sleep(0)
+            except Exception as exc:
+                await queue.put(exc)
+                return
+
+            await queue.put(None)
+
+        producer = loop.create_task(produce())
 
-        if rand_cat == Category.STD:
-            return self._random_std_full_name()
+        try:
+            while True:
+                item = await queue.get()
+
+                if item is None:
+                    break
+
+                if isinstance(item, Exception):
+                    raise item
+
+                yield item
+        finally:
+            producer.cancel()
+
+            # the random number generator is in use until an offloaded
+            # batch completes
+            if offloaded is not None:
+                await asyncio.gather(offloaded, return_exceptions=True)
+
+    # Unique names.
+    #
+    # The combination space is the concatenation, in category order, of
+    # the entries of each non-std category and of the std combinations.
+    # A std combination index is a mixed-radix number of which the
+    # digits, from the least significant one, are the name, the middle
+    # name (excluding the name), the surname, and the second surname
+    # (excluding the first one).
+    #
+    # Uniqueness applies to combinations: the category data may contain
+    # the same name more than once.
+    def space_size(self) -> int:
+        self._check_unconstrained()
+        return sum(size for _, size in self._cat_spaces)
+
+    def name_tuple_at(self, index: int) -> NameTuple:
+        self._check_unconstrained()
+
+        if index < 0:
+            raise IndexError(index)
+
+        for pool, size in self._cat_spaces:
+            if index < size:
+                if not pool.paired:
+                    return self._std_name_tuple_at(index, pool)
+
+                return NameTuple(pool.names[index], pool.surnames[index], pool.gender_at(index),
+                                 category=pool.category)
+
+            index -= size
+
+        raise IndexError(index)
+
+    def name_at(self, index: int) -> 'FullName':
+        return self.name_tuple_at(index).to_full_name()
+
+    def iter_unique(self, seed: int | None = None) -> typing.Iterator['FullName']:
+        for name_tuple in self.iter_unique_name_tuples(seed):
+            yield name_tuple.to_full_name()
+
+    def iter_unique_name_tuples(self, seed: int | None = None) -> typing.Iterator[NameTuple]:
+        for index in self._iter_unique_indexes(seed):
+            yield self.name_tuple_at(index)
+
+    # Cross-run uniqueness.
+    #
+    # Like `iter_formatted_names()`, but never yields a name which
+    # `ledger` already holds, and records the yielded names in it. The
+    # ledger identifies a name by its default format (with a middle
+    # initial if `with_middle_initial` is true) so that changing `fmt`
+    # doesn't reissue a name.
+    #
+    # Names are recorded by batch, before being yielded: a consumer
+    # which stops early may leave recorded names unused.
+    #
+    # When `_LEDGER_MAX_REJECTED_COUNT` successive draws only give
+    # recorded names, raises `ValueError`, or stops if `count` is
+    # `None`.
+    def iter_ledger_names(self, ledger: 'Ledger', count: int | None = None,
+                          fmt: Format = Format.DEFAULT, with_middle_initial: bool = True,
+                          backend: Backend = Backend.PYTHON) -> typing.Iterator[str]:
+        self._prepare_formatting(fmt)
+        remaining = count
+        rejected_count = 0
+
+        while remaining is None or remaining > 0:
+            batch_size = (_LEDGER_BATCH_SIZE if remaining is None else
+                          min(remaining, _LEDGER_BATCH_SIZE))
+            name_tuples = self.random_name_tuples(batch_size, backend)
+            new_flags = ledger.claim([format_name(name_tuple, Format.DEFAULT, with_middle_initial)
+                                      for name_tuple in name_tuples])
+            names = [format_name(name_tuple, fmt, with_middle_initial)
+                     for name_tuple, new in zip(name_tuples, new_flags) if new]
+            rejected_count = 0 if names else rejected_count + batch_size
+
+            if rejected_count >= _LEDGER_MAX_REJECTED_COUNT:
+                if count is None:
+                    return
+
+                raise ValueError('Cannot find a name which the ledger doesn\'t already hold')
+
+            if remaining is not None:
+                remaining -= len(names)
+
+            yield from names
+
+    def _iter_unique_indexes(self, seed: int | None) -> typing.Iterator[int]:
+        if seed is None:
+            seed = self._rng.getrandbits(64)
+
+        perm = _FeistelPermutation(self.space_size(), seed)
+
+        for i in range(len(perm)):
+            yield perm[i]
+
+    def _check_unconstrained(self) -> None:
+        if self._constrained is not None:
+            raise ValueError('Unique names don\'t support constraints')
+
+    # Pool and combination space size of each category, in category
+    # order.
+    @functools.cached_property
+    def _cat_spaces(self) -> list[tuple[_Pool, int]]:
+        return [(self._pool(cat), self._cat_space_size(self._pool(cat)))
+                for cat in self._categories]
+
+    def _cat_space_size(self, pool: _Pool) -> int:
+        if pool.paired:
+            return len(pool.names)
+
+        name_count = len(pool.names)
+        surname_count = len(pool.surnames)
+        size = name_count * surname_count
+
+        if self._with_middle_name:
+            size *= name_count - 1
+
+        if self._surname_count == 2:
+            size *= surname_count - 1
+
+        return size
+
+    def _std_name_tuple_at(self, index: int, pool: _Pool) -> NameTuple:
+        names = pool.names
+        surnames = pool.surnames
+        index, name_index = divmod(index, len(names))
+        middle_name = None
+
+        if self._with_middle_name:
+            index, middle_index = divmod(index, len(names) - 1)
+            middle_name = names[middle_index + 1 if middle_index >= name_index else middle_index]
+
+        index, surname_index = divmod(index, len(surnames))
+        surname = surnames[surname_index]
+
+        if self._surname_count == 2:
+            second_index = index % (len(surnames) - 1)
+
+            if second_index >= surname_index:
+                second_index += 1
+
+            surname += '-' + surnames[second_index]
+
+        return NameTuple(names[name_index], surname, pool.gender_at(name_index), middle_name,
+                         pool.category)
+
+    def _random_std_draw(self, pool: _Pool) -> _Draw:
+        name_count = len(pool.names)
+        surname_count = len(pool.surnames)
+        name_alias = pool.alias() if self._weighted else None
+        surname_alias = pool.surname_alias() if self._weighted else None
+        rng = self._rng
+        name_index = _draw(rng, name_count, name_alias)
+        surname_index = _draw(rng, surname_count, surname_alias)
+        middle_index = -1
+        second_index = -1
+
+        if self._with_middle_name:
+            middle_index = _draw_except(rng, name_count, name_alias, name_index)
 
-        return random.choice(self._cat_objs[rand_cat])
+        if self._surname_count == 2:
+            second_index = _draw_except(rng, surname_count, surname_alias, surname_index)
 
-    def _random_std_full_name(self) -> FullName:
-        rand_name_objs = random.sample(self._name_objs, 2 if self._with_middle_name else 1)
-        rand_surname_objs = random.sample(self._surname_objs, self._surname_count)
-        surname = '-'.join(obj.name for obj in rand_surname_objs)
-        first = rand_name_objs[0]
+        return pool, name_index, middle_index, surname_index, second_index
 
-        return FullName(name=first.name, surname=surname, gender=first.gender or Gender.MALE,
-                        middle_name=rand_name_objs[1].name if self._with_middle_name else None)
+    # Adds the parts of all the pools of this generator to the formatting
+    # table, once per pool.
+    def _prepare_formatting(self, fmt: Format) -> None:
+        if fmt == Format.DEFAULT:
+            return
 
-    def _load_json_entries(self, cat_filename: str) -> list[JsonEntry]:
-        resource_path = f'cats/{cat_filename}.json'
+        for cat in self._categories:
+            self._pool(cat).add_part_forms()
 
-        try:
-            ref = importlib.resources.files('qngng').joinpath(resource_path)
-            content = ref.read_bytes()
-        except (FileNotFoundError, TypeError):
-            return []
+    @functools.cached_property
+    def _np_rng(self) -> 'numpy.random.Generator':
+        return _import_numpy().random.default_rng(self._rng.getrandbits(128))
+
+    def _np_random_name_tuples(self, count: int) -> list[NameTuple]:
+        np = _import_numpy()
+        stats = _stats
+        begin_ns = stats.clock() if stats is not None else 0
+        np_rng = self._np_rng
+
+        if self._cat_alias is None:
+            cat_indexes = np_rng.integers(0, len(self._categories), count)
+        else:
+            cat_indexes = self._cat_alias.sample_many(np_rng, count)
+
+        name_tuples: list[NameTuple | None] = [None] * count
+
+        for cat_index, cat in enumerate(self._categories):
+            positions = np.flatnonzero(cat_indexes == cat_index)
+
+            if positions.size == 0:
+                continue
+
+            pool = self._pool(cat)
+
+            if not pool.paired:
+                cat_name_tuples = self._np_random_std_name_tuples(np_rng, positions.size, pool)
+            else:
+                alias = pool.alias() if self._weighted else None
+                names = pool.names
+                surnames = pool.surnames
+                gender_at = pool.gender_at
+                category = pool.category
+                cat_name_tuples = [NameTuple(names[i], surnames[i], gender_at(i),
+                                             category=category)
+                                   for i in _np_draw(np_rng, len(names), alias,
+                                                     positions.size).tolist()]
 
-        return msgspec.json.decode(content, type=list[JsonEntry])
+            for position, name_tuple in zip(positions.tolist(), cat_name_tuples):
+                name_tuples[position] = name_tuple
 
-    def _get_cat_objs(self, cat: Category) -> list[FullName]:
-        objs: list[FullName] = []
+        if stats is not None:
+            stats.record('random_name_tuples', 'sample', begin_ns)
 
-        if self._gender is None or self._gender == Gender.MALE:
-            for entry in self._load_json_entries(f'{cat}-m'):
-                if entry.name and entry.surname:
-                    objs.append(FullName(name=entry.name, surname=entry.surname,
-                                         gender=Gender.MALE))
+        return typing.cast(list[NameTuple], name_tuples)
 
-        if self._gender is None or self._gender == Gender.FEMALE:
-            for entry in self._load_json_entries(f'{cat}-f'):
-                if entry.name and entry.surname:
-                    objs.append(FullName(name=entry.name, surname=entry.surname,
-                                gender=Gender.FEMALE))
+    def _np_random_std_name_tuples(self, np_rng: 'numpy.random.Generator', count: int,
+                                   pool: _Pool) -> list[NameTuple]:
+        names = pool.names
+        surnames = pool.surnames
+        name_alias = pool.alias() if self._weighted else None
+        surname_alias = pool.surname_alias() if self._weighted else None
+        name_indexes = _np_draw(np_rng, len(names), name_alias, count)
+        surname_indexes = _np_draw(np_rng, len(surnames), surname_alias, count)
+        firsts = [names[i] for i in name_indexes.tolist()]
+        genders = [pool.gender_at(i) for i in name_indexes.tolist()]
+        middles: list[str | None] = [None] * count
+        full_surnames = [surnames[i] for i in surname_indexes.tolist()]
 
-        return objs
+        if self._with_middle_name:
+            middles = [names[i] for i in _np_draw_except(np_rng, len(names), name_alias,
+                                                         name_indexes).tolist()]
 
-    def _create_std_objs(self) -> None:
-        if self._gender is None or self._gender == Gender.MALE:
-            for entry in self._load_json_entries('std-names-m'):
-                if entry.name:
-                    self._name_objs.append(PartialName(name=entry.name, gender=Gender.MALE))
+        if self._surname_count == 2:
+            second_indexes = _np_draw_except(np_rng, len(surnames), surname_alias, surname_indexes)
+            full_surnames = [f'{surname}-{surnames[i]}'
+                             for surname, i in zip(full_surnames, second_indexes.tolist())]
 
-        if self._gender is None or self._gender == Gender.FEMALE:
-            for entry in self._load_json_entries('std-names-f'):
-                if entry.name:
-                    self._name_objs.append(PartialName(name=entry.name, gender=Gender.FEMALE))
+        return list(map(NameTuple, firsts, full_surnames, genders, middles,
+                        itertools.repeat(pool.category)))
 
-        for entry in self._load_json_entries('std-surnames'):
-            if entry.surname:
-                self._surname_objs.append(PartialName(name=entry.surname))
+    def _pool(self, cat: Category | CategoryFile) -> _Pool:
+        return self._std_pool if cat == Category.STD else self._get_cat_pool(cat)
 
-    def _create_objs(self, categories: frozenset[Category]) -> None:
-        self._create_std_objs()
+    def _get_cat_pool(self, cat: Category | CategoryFile) -> _Pool:
+        pool = self._cat_pools.get(cat)
 
-        if Category.STD in categories:
-            self._cat_objs[Category.STD] = []
+        if pool is None:
+            if isinstance(cat, CategoryFile):
+                pool = _file_pool(cat, self._gender)
+            else:
+                pool = _cat_pool(cat, self._gender)
 
-        for cat in categories - {Category.STD}:
-            self._cat_objs[cat] = self._get_cat_objs(cat)
+            if self._weighted:
+                self._check_weights(pool.weights, not pool.paired and self._with_middle_name)
+
+                if not pool.paired:
+                    self._check_weights(pool.surname_weights, self._surname_count == 2)
+
+            self._cat_pools[cat] = pool
+
+        return pool
+
+
+# Thread-safe name generator.
+#
+# A `NameGenerator` isn't thread-safe: its random number generator is
+# mutable state. A thread-safe name generator gives each thread its own
+# substream of `generator` (see `NameGenerator.substream()`): the `i`th
+# thread to use it gets substream `i`.
+#
+# The category data is loaded up front (see `NameGenerator.preload()`),
+# and all the substreams share it without modifying it afterwards, so
+# that drawing names takes no lock and scales with the number of
+# threads on a free-threaded interpreter.
+#
+# Statistics (see `enable_stats()`) aren't thread-safe.
+class ThreadSafeNameGenerator:
+    def __init__(self, generator: NameGenerator, with_formatting: bool = True) -> None:
+        import threading
+
+        generator.preload(with_formatting)
+        self._generator = generator
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread_count = 0
+
+    # Name generator of the calling thread.
+    @property
+    def generator(self) -> NameGenerator:
+        try:
+            return self._local.generator
+        except AttributeError:
+            # creating a substream may fix the seed of `self._generator`
+            with self._lock:
+                generator = self._generator.substream(self._thread_count)
+                self._thread_count += 1
+
+            self._local.generator = generator
+            return generator
+
+    def random_name_tuple(self) -> NameTuple:
+        return self.generator.random_name_tuple()
+
+    def random_full_name(self) -> 'FullName':
+        return self.generator.random_full_name()
+
+    def random_name_tuples(self, count: int, backend: Backend = Backend.PYTHON) -> list[NameTuple]:
+        return self.generator.random_name_tuples(count, backend)
+
+    def random_full_names(self, count: int,
+                          backend: Backend = Backend.PYTHON) -> list['FullName']:
+        return self.generator.random_full_names(count, backend)
+
+    def random_formatted_names(self, count: int, fmt: Format = Format.DEFAULT,
+                               with_middle_initial: bool = True,
+                               backend: Backend = Backend.PYTHON) -> list[str]:
+        return self.generator.random_formatted_names(count, fmt, with_middle_initial, backend)
 
 
 def _strip_diacritics(s: str) -> str:
+    import unicodedata
+
     return unicodedata.normalize('NFKD', s).encode('ascii', 'ignore').decode('utf-8')
 
 
@@ -205,8 +1963,66 @@ def _normalize_name(name: str, sep: str, lower: bool = True) -> str:
     return ''.join(result)
 
 
-def format_name(fullname: FullName, fmt: Format = Format.DEFAULT,
+# Formatting tables.
+#
+# The forms of a name part are its `snake_case`, `kebab-case`, and
+# `CapitalizedCamelCase` normalized forms. Normalizing a part is
+# independent from its neighbours, so that formatting a name only
+# needs to join the forms of its parts.
+#
+# `_part_forms_table` holds the forms of all the parts of the pools
+# which name generators prepare for formatting; other parts go through
+# a bounded LRU cache.
+_PartForms = tuple[str, str, str]
+_part_forms_table: dict[str, _PartForms] = {}
+
+
+def _compute_part_forms(part: str) -> _PartForms:
+    return _normalize_name(part, '_'), _normalize_name(part, '-'), _normalize_name(part, '', False)
+
+
+@functools.lru_cache(maxsize=16384)
+def _cached_part_forms(part: str) -> _PartForms:
+    return _compute_part_forms(part)
+
+
+def _part_forms(part: str) -> _PartForms:
+    forms = _part_forms_table.get(part)
+
+    if forms is not None:
+        return forms
+
+    # a hyphen is a separator in all the forms, so that a
+    # double-barrelled surname doesn't need its own entry
+    left, hyphen, right = part.partition('-')
+
+    if hyphen:
+        left_forms = _part_forms(left)
+        right_forms = _part_forms(right)
+        return (f'{left_forms[0]}_{right_forms[0]}', f'{left_forms[1]}-{right_forms[1]}',
+                left_forms[2] + right_forms[2])
+
+    return _cached_part_forms(part)
+
+
+def _add_part_forms(parts: typing.Iterable[str]) -> None:
+    table = _part_forms_table
+    table.update({part: _compute_part_forms(part) for part in parts if part not in table})
+
+
+# format to index of the part form and separator
+_FORMAT_SPECS: dict[Format, tuple[int, str]] = {
+    Format.SNAKE: (0, '_'),
+    Format.KEBAB: (1, '-'),
+    Format.CAMEL: (2, ''),
+    Format.CAP_CAMEL: (2, ''),
+}
+
+
+def format_name(fullname: 'FullName | NameTuple', fmt: Format = Format.DEFAULT,
                 with_middle_initial: bool = True) -> str:
+    stats = _stats
+    begin_ns = stats.clock() if stats is not None else 0
     parts: list[str] = []
 
     if fullname.name:
@@ -226,170 +2042,195 @@ def format_name(fullname: FullName, fmt: Format = Format.DEFAULT,
     if fullname.surname:
         parts.append(fullname.surname)
 
-    raw_name = ' '.join(parts)
+    if fmt == Format.DEFAULT:
+        s = ' '.join(parts)
+    else:
+        form_index, sep = _FORMAT_SPECS[fmt]
+        table = _part_forms_table
+        s = sep.join([(table.get(part) or _part_forms(part))[form_index] for part in parts])
 
-    match fmt:
-        case Format.DEFAULT:
-            return raw_name
-        case Format.SNAKE:
-            return _normalize_name(raw_name, '_')
-        case Format.KEBAB:
-            return _normalize_name(raw_name, '-')
-        case Format.CAMEL:
-            s = _normalize_name(raw_name, '', False)
-            return s[0].lower() + s[1:] if s else s
-        case Format.CAP_CAMEL:
-            return _normalize_name(raw_name, '', False)
+        if fmt == Format.CAMEL and s:
+            s = s[0].lower() + s[1:]
 
+    if stats is not None:
+        stats.record('format_name', 'format', begin_ns)
 
-def _spin_wheel(generator: NameGenerator, fmt: Format, middle_initial: bool) -> None:
-    x = 0.0
-    prev_name_len = 0
+    return s
 
-    while True:
-        name = format_name(generator.random_full_name(), fmt, middle_initial)
-        sys.stdout.write('\r')
-        sys.stdout.write(' ' * prev_name_len)
-        sys.stdout.write('\r')
-        prev_name_len = len(name)
-        sys.stdout.write(name)
-        sys.stdout.flush()
-        dur = x**10 + 0.05
-        x += 0.02
-
-        if x <= 1.05:
-            time.sleep(dur)
+
+# Parallel engine.
+#
+# The count is split into chunks of `chunk_size` names. Worker processes
+# build their name generator once, then format whole chunks and send
+# them back as single strings.
+#
+# Chunk `i` comes from `substream(i)` of a generator seeded with the
+# root seed, so that the output only depends on the seed, the count,
+# and the chunk size, not on the number of jobs. In unique mode, chunk
+# `i` covers the positions of a keyed permutation of the combination
+# space instead.
+#
+# With a single job, this process formats the chunks itself.
+class _ParallelTask(typing.NamedTuple):
+    options: dict[str, typing.Any]
+    fmt: Format
+    with_middle_initial: bool
+    unique_key: int | None
+    output_format: OutputFormat = OutputFormat.TEXT
+    backend: Backend = Backend.PYTHON
+
+
+class _ParallelChunker:
+    def __init__(self, task: _ParallelTask):
+        self._task = task
+        self._generator = NameGenerator(**task.options)
+        self._perm: _FeistelPermutation | None = None
+        self._record_writer: 'qngng._output.RecordWriter | None' = None
+
+        if task.unique_key is not None:
+            self._perm = _FeistelPermutation(self._generator.space_size(), task.unique_key)
+
+        if task.output_format != OutputFormat.TEXT:
+            import qngng._output
+            self._record_writer = qngng._output.RecordWriter(task.output_format)
+
+    def chunk(self, chunk_index: int, begin: int, end: int) -> str | bytes:
+        task = self._task
+        generator = self._generator
+        perm = self._perm
+
+        if self._record_writer is not None:
+            if perm is None:
+                name_tuples = generator.substream(chunk_index).random_name_tuples(end - begin,
+                                                                                  task.backend)
+            else:
+                name_tuples = map(generator.name_tuple_at, map(perm.__getitem__,
+                                                               range(begin, end)))
+
+            return self._record_writer.encode(name_tuples)
+
+        if perm is None:
+            names = generator.substream(chunk_index).iter_formatted_names(end - begin, task.fmt,
+                                                                         task.with_middle_initial,
+                                                                         task.backend)
         else:
-            break
+            name_tuple_at = generator.name_tuple_at
+            names = (format_name(name_tuple_at(perm[i]), task.fmt, task.with_middle_initial)
+                     for i in range(begin, end))
 
-    print()
+        return '\n'.join(itertools.chain(names, ('',)))
 
 
-_app = typer.Typer(
-    name='qngng',
-    help=qngng.__description__,
-    add_completion=True,
-    pretty_exceptions_enable=False,
-)
+_worker_chunker: _ParallelChunker | None = None
 
 
-def _expand_categories(cats: list[Category] | None) -> frozenset[Category]:
-    if not cats:
-        return frozenset({Category.STD})
+def _init_parallel_worker(task: _ParallelTask) -> None:
+    global _worker_chunker
+    _worker_chunker = _ParallelChunker(task)
 
-    result: set[Category] = set()
 
-    for cat in cats:
-        match cat:
-            case Category.ALL:
-                result |= set(_UNIQUE_CATS)
-            case Category.UDA:
-                result |= {Category.UDA_ACTORS, Category.UDA_HOSTS, Category.UDA_SINGERS}
-            case _:
-                result.add(cat)
+def _parallel_chunk(chunk_index: int, begin: int, end: int) -> str | bytes:
+    assert _worker_chunker is not None
+    return _worker_chunker.chunk(chunk_index, begin, end)
 
-    return frozenset(result)
 
+def _parallel_chunk_ranges(count: int | None,
+                           chunk_size: int) -> typing.Iterator[tuple[int, int, int]]:
+    begins = itertools.count(0, chunk_size) if count is None else range(0, count, chunk_size)
 
-def _version_callback(value: bool) -> None:
-    if value:
-        print(f'qngng {qngng.__version__}')
-        raise typer.Exit()
-
-
-@_app.command()
-def _main(  # pyright: ignore[reportUnusedFunction]
-    gender: typing.Annotated[
-        Gender | None, typer.Option('--gender', '-g', help='Generate a male or female name'),
-    ] = None,
-    male: typing.Annotated[
-        bool, typer.Option('--male', '-m', help='Shorthand for `--gender=male`'),
-    ] = False,
-    female: typing.Annotated[
-        bool, typer.Option('--female', '-f', help='Shorthand for `--gender=female`'),
-    ] = False,
-    snake_case: typing.Annotated[
-        bool, typer.Option('--snake-case', '-s', help='Print name in `snake_case` format'),
-    ] = False,
-    kebab_case: typing.Annotated[
-        bool, typer.Option('--kebab-case', '-k', help='Print name in `kebab-case` format'),
-    ] = False,
-    camel_case: typing.Annotated[
-        bool, typer.Option('--camel-case', '-C', help='Print name in `camelCase` format'),
-    ] = False,
-    cap_camel_case: typing.Annotated[
-        bool, typer.Option('--cap-camel-case', help='Print name in `CapitalizedCamelCase` format'),
-    ] = False,
-    cat: typing.Annotated[
-        list[Category] | None, typer.Option('--cat', '-c', help='Category name (can be repeated)'),
-    ] = None,
-    double_surname: typing.Annotated[
-        bool, typer.Option('--double-surname', '-d',
-                           help='Create a double-barrelled surname (only for the `std` category)'),
-    ] = False,
-    middle_initial: typing.Annotated[
-        bool, typer.Option('--middle-initial', '-I',
-                           help='Generate a middle initial (only for `std` category)'),
-    ] = False,
-    middle_name: typing.Annotated[
-        bool, typer.Option('--middle-name', '-M',
-                           help='Generate a middle name (only for `std` category)'),
-    ] = False,
-    wheel: typing.Annotated[
-        bool, typer.Option('--wheel', '-w',
-                           help='Spin a wheel to find a name (interactive use only)'),
-    ] = False,
-    version: typing.Annotated[
-        bool, typer.Option('--version', '-V', callback=_version_callback, is_eager=True,
-                           help='Show version and exit'),
-    ] = False,
-) -> None:
-    gender_opts = sum([gender is not None, male, female])
-
-    if gender_opts > 1:
-        raise typer.BadParameter('Cannot specify more than one option amongst `--gender`, `--male`, and `--female`.')
-
-    if middle_name and middle_initial:
-        raise typer.BadParameter('Cannot specify both `--middle-initial` and `--middle-name`.')
-
-    if sum([snake_case, kebab_case, camel_case, cap_camel_case]) > 1:
-        raise typer.BadParameter('Cannot specify more than one format option.')
-
-    fmt = Format.DEFAULT
-
-    if snake_case:
-        fmt = Format.SNAKE
-    elif kebab_case:
-        fmt = Format.KEBAB
-    elif camel_case:
-        fmt = Format.CAMEL
-    elif cap_camel_case:
-        fmt = Format.CAP_CAMEL
-
-    resolved_gender: Gender | None = gender
-
-    if male:
-        resolved_gender = Gender.MALE
-    elif female:
-        resolved_gender = Gender.FEMALE
-    elif resolved_gender is None:
-        resolved_gender = random.choice([Gender.MALE, Gender.FEMALE])
-
-    categories = _expand_categories(cat)
-
-    if double_surname and Category.STD not in categories:
-        raise typer.BadParameter('Cannot specify `--double-surname` without the `std` category.')
-
-    if middle_name and Category.STD not in categories:
-        raise typer.BadParameter('Cannot specify `--middle-name` without the `std` category.')
-
-    if middle_initial and Category.STD not in categories:
-        raise typer.BadParameter('Cannot specify `--middle-initial` without the `std` category.')
-
-    generator = NameGenerator(2 if double_surname else 1, middle_name or middle_initial,
-                              resolved_gender, categories)
-
-    if wheel:
-        _spin_wheel(generator, fmt, middle_initial)
-    else:
-        print(format_name(generator.random_full_name(), fmt, with_middle_initial=middle_initial))
+    for chunk_index, begin in enumerate(begins):
+        end = begin + chunk_size
+        yield chunk_index, begin, end if count is None else min(end, count)
+
+
+def generate_parallel(generator: NameGenerator, count: int | None, jobs: int | None = None,
+                      fmt: Format = Format.DEFAULT, with_middle_initial: bool = True,
+                      unique: bool = False, ordered: bool = True,
+                      chunk_size: int = 16384,
+                      backend: Backend = Backend.PYTHON) -> typing.Iterator[str]:
+    return typing.cast(typing.Iterator[str],
+                       _generate_parallel(generator, count, jobs, fmt, with_middle_initial,
+                                          OutputFormat.TEXT, unique, ordered, chunk_size,
+                                          backend))
+
+
+# Like `generate_parallel()`, but yields chunks of records encoded by
+# workers with `qngng._output.RecordWriter` (without any CSV header).
+def generate_parallel_records(generator: NameGenerator, count: int | None,
+                              jobs: int | None = None,
+                              output_format: OutputFormat = OutputFormat.JSONL,
+                              unique: bool = False, ordered: bool = True,
+                              chunk_size: int = 16384,
+                              backend: Backend = Backend.PYTHON) -> typing.Iterator[bytes]:
+    if output_format == OutputFormat.TEXT:
+        raise ValueError('Use `generate_parallel()` for text output')
+
+    return typing.cast(typing.Iterator[bytes],
+                       _generate_parallel(generator, count, jobs, Format.DEFAULT, False,
+                                          output_format, unique, ordered, chunk_size,
+                                          backend))
+
+
+def _generate_parallel(generator: NameGenerator, count: int | None, jobs: int | None,
+                       fmt: Format, with_middle_initial: bool, output_format: OutputFormat,
+                       unique: bool, ordered: bool, chunk_size: int,
+                       backend: Backend) -> typing.Iterator[str | bytes]:
+    if unique:
+        space_size = generator.space_size()
+
+        if count is None:
+            count = space_size
+        elif count > space_size:
+            raise ValueError(f'Cannot generate {count} unique names: only {space_size} exist')
+
+    jobs = jobs or os.cpu_count() or 1
+    task = _ParallelTask(generator._parallel_options(), fmt, with_middle_initial,
+                         generator._rng.getrandbits(64) if unique else None, output_format,
+                         backend)
+    chunk_ranges = _parallel_chunk_ranges(count, chunk_size)
+
+    if jobs == 1:
+        chunker = _ParallelChunker(task)
+
+        for chunk_range in chunk_ranges:
+            yield chunker.chunk(*chunk_range)
+
+        return
+
+    import concurrent.futures
+
+    # bounding the in-flight chunks keeps the memory constant, even
+    # for an unbounded count
+    max_pending = jobs * 2
+
+    with concurrent.futures.ProcessPoolExecutor(jobs, initializer=_init_parallel_worker,
+                                                initargs=(task,)) as executor:
+        pending: collections.deque[concurrent.futures.Future[str | bytes]] = collections.deque()
+
+        try:
+            for chunk_range in chunk_ranges:
+                pending.append(executor.submit(_parallel_chunk, *chunk_range))
+
+                while len(pending) >= max_pending:
+                    yield from _pop_parallel_chunks(pending, ordered)
+
+            while pending:
+                yield from _pop_parallel_chunks(pending, ordered)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _pop_parallel_chunks(pending: 'collections.deque[concurrent.futures.Future[str | bytes]]',
+                         ordered: bool) -> typing.Iterator[str | bytes]:
+    import concurrent.futures
+
+    if ordered:
+        yield pending.popleft().result()
+        return
+
+    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+
+    for future in done:
+        pending.remove(future)
+        yield future.result()
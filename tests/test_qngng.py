@@ -21,8 +21,27 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import asyncio
+import collections
+import csv
+import io
+import itertools
+import json
+import pathlib
+import random
 import re
+import subprocess
+import sys
+import threading
+import typing
 import pytest
+import qngng
+import qngng._cli
+import qngng._ledger
+import qngng._output
+import qngng._pack
+import qngng._pseudo
+import qngng._server
 import qngng.qngng as q
 
 
@@ -148,3 +167,1499 @@ class TestFullNameModel:
 
         with pytest.raises(ValueError):
             _ = fullname.middle_initial
+
+
+class TestBulk:
+    def test_random_full_names(self):
+        gen = q.NameGenerator()
+        fullnames = gen.random_full_names(50)
+        assert len(fullnames) == 50
+        assert all(isinstance(fullname, q.FullName) for fullname in fullnames)
+
+    def test_iter_full_names_count(self):
+        gen = q.NameGenerator(gender=q.Gender.FEMALE)
+        fullnames = list(gen.iter_full_names(20))
+        assert len(fullnames) == 20
+        assert all(fullname.gender == q.Gender.FEMALE for fullname in fullnames)
+
+    def test_iter_full_names_unbounded(self):
+        gen = q.NameGenerator()
+        it = gen.iter_full_names()
+        assert len([next(it) for _ in range(100)]) == 100
+
+    def test_iter_formatted_names(self):
+        gen = q.NameGenerator(surname_count=2)
+        names = list(gen.iter_formatted_names(30, q.Format.SNAKE))
+        assert len(names) == 30
+        assert all(re.fullmatch(r'[a-z0-9_]+', name) for name in names)
+
+    def test_cli_count(self):
+        from typer.testing import CliRunner
+
+        result = CliRunner().invoke(qngng._cli._app, ['--count', '5000', '--kebab-case'])
+        assert result.exit_code == 0
+        names = result.stdout.splitlines()
+        assert len(names) == 5000
+        assert all(re.fullmatch(r'[a-z0-9\-]+', name) for name in names)
+
+
+class TestPack:
+    @pytest.fixture
+    def pack(self, tmp_path: pathlib.Path):
+        path = tmp_path / qngng._pack.FILENAME
+        qngng._pack.write_pack(pathlib.Path(q.__file__).parent / 'cats', qngng.__version__, path)
+        pack = qngng._pack.open_pack(path)
+        assert pack is not None
+        return pack
+
+    def test_columns_match_json(self, pack: qngng._pack.Pack):
+        cats_dir = pathlib.Path(q.__file__).parent / 'cats'
+
+        for path in cats_dir.glob('*.json'):
+            entries = json.loads(path.read_bytes())
+            columns = pack.columns(path.stem)
+            assert columns is not None
+
+            if columns.name is not None:
+                assert list(columns.name) == [entry.get('name') or '' for entry in entries]
+
+            if columns.surname is not None:
+                assert list(columns.surname) == [entry.get('surname') or '' for entry in entries]
+
+            if columns.weight is not None:
+                assert list(columns.weight) == [entry['weight'] for entry in entries]
+
+    def test_stale(self, pack: qngng._pack.Pack, tmp_path: pathlib.Path):
+        resource = tmp_path / 'std-surnames.json'
+        resource.write_text('[]')
+        assert q._is_pack_stale(pack, 'std-surnames', resource)
+        assert not q._is_pack_stale(pack, 'std-surnames', tmp_path / 'missing.json')
+
+        # same size, other content
+        content = (pathlib.Path(q.__file__).parent / 'cats' / 'std-surnames.json').read_bytes()
+        resource.write_bytes(content)
+        assert not q._is_pack_stale(pack, 'std-surnames', resource)
+        resource.write_bytes(content.replace(b'a', b'e', 1))
+        assert q._is_pack_stale(pack, 'std-surnames', resource)
+
+    def test_not_a_pack(self, tmp_path: pathlib.Path):
+        path = tmp_path / qngng._pack.FILENAME
+        path.write_bytes(b'{}')
+        assert qngng._pack.open_pack(path) is None
+
+
+class TestCategoryCache:
+    def test_lazy(self):
+        q._cat_pool.cache_clear()
+        q._std_pool.cache_clear()
+        q._std_surname_pool.cache_clear()
+        gen = q.NameGenerator(categories=frozenset({q.Category.UDA_HOSTS}))
+        assert q._cat_pool.cache_info().currsize == 0
+        gen.random_full_name()
+        assert q._cat_pool.cache_info().currsize > 0
+        assert q._std_pool.cache_info().currsize == 0
+
+    def test_shared(self):
+        cats = frozenset({q.Category.STD, q.Category.D31})
+        gen1 = q.NameGenerator(gender=q.Gender.FEMALE, categories=cats)
+        gen2 = q.NameGenerator(surname_count=2, gender=q.Gender.FEMALE, categories=cats)
+        assert gen1._get_cat_pool(q.Category.D31) is gen2._get_cat_pool(q.Category.D31)
+        assert gen1._std_pool is gen2._std_pool
+
+    def test_shared_std_surnames(self):
+        male_pool = q._std_pool(q.Gender.MALE)
+        female_pool = q._std_pool(q.Gender.FEMALE)
+        pool = q._std_pool(None)
+        assert male_pool.surnames is female_pool.surnames is pool.surnames
+        assert male_pool.surname_alias() is female_pool.surname_alias() is pool.surname_alias()
+        assert male_pool.surname_alias() is not None
+
+
+class TestUserCache:
+    @pytest.fixture
+    def cache_dir(self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setenv('QNGNG_CACHE_DIR', str(tmp_path))
+        q._cached_columns.cache_clear()
+        yield tmp_path
+        q._cached_columns.cache_clear()
+
+    def test_columns(self, cache_dir: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+        cats = q._cached_columns()
+        assert cats is not None
+        assert len(list(cache_dir.glob('cats-*.marshal'))) == 1
+
+        for stem, columns in cats.items():
+            source_columns = q._load_source_columns(stem)
+
+            for column, source_column in zip(columns, source_columns):
+                assert (column is None) == (source_column is None)
+                assert list(column or ()) == list(source_column or ())
+
+        # a second process reads the cache without decoding anything
+        def fail(cat_filename: str) -> qngng._pack.Columns:
+            raise AssertionError(cat_filename)
+
+        monkeypatch.setattr(q, '_load_source_columns', fail)
+        q._cached_columns.cache_clear()
+        assert q._cached_columns() == cats
+
+    def test_key(self, tmp_path: pathlib.Path):
+        import qngng._cache
+
+        cats_dir = tmp_path / 'cats'
+        cats_dir.mkdir()
+        (cats_dir / 'a-m.json').write_text('[{"name": "Jean", "surname": "Roy"}]')
+        path = qngng._cache.cache_path(tmp_path, cats_dir, '1.0')
+        assert path == qngng._cache.cache_path(tmp_path, cats_dir, '1.0')
+        assert path != qngng._cache.cache_path(tmp_path, cats_dir, '1.1')
+        (cats_dir / 'a-m.json').write_text('[{"name": "Jean", "surname": "Roi"}]')
+        assert path != qngng._cache.cache_path(tmp_path, cats_dir, '1.0')
+
+    def test_store(self, tmp_path: pathlib.Path):
+        import qngng._cache
+
+        cats: dict[str, qngng._cache.CachedColumns] = {'a-m': (('Jean',), ('Roy',), (3,))}
+        old_path = tmp_path / 'cats-1.0-00000000.marshal'
+        qngng._cache.store(old_path, cats)
+        path = tmp_path / 'cats-1.1-00000000.marshal'
+        qngng._cache.store(path, cats)
+        assert qngng._cache.load(path) == cats
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_index_eviction(self, tmp_path: pathlib.Path):
+        import os
+        import qngng._cache
+
+        def store(name: str) -> pathlib.Path:
+            path = qngng._cache.index_path(tmp_path, tmp_path / name)
+            qngng._cache.store_index(path, (name,), ())
+            return path
+
+        old_path = store('old.csv')
+        os.utime(old_path, (0, 0))
+        path = store('new.csv')
+        assert not old_path.exists()
+
+        # a loaded index is recently used
+        unused_path = store('unused.csv')
+        os.utime(path, (0, 0))
+        os.utime(unused_path, (0, 0))
+        assert qngng._cache.load_index(path, ('new.csv',)) == ()
+        store('other.csv')
+        assert path.exists()
+        assert not unused_path.exists()
+
+        for i in range(qngng._cache._MAX_INDEX_COUNT + 8):
+            last_path = store(f'{i}.csv')
+
+        index_paths = list(tmp_path.glob('index-*.marshal'))
+        assert len(index_paths) == qngng._cache._MAX_INDEX_COUNT
+        assert last_path in index_paths
+
+    def test_corrupt(self, cache_dir: pathlib.Path):
+        import marshal
+        import qngng._cache
+
+        path = cache_dir / 'cats-1.0-00000000.marshal'
+
+        for data in [b'', b'garbage', marshal.dumps({'a-m': ('Jean', None, None)})]:
+            path.write_bytes(data)
+            assert qngng._cache.load(path) is None
+
+        # rewritten
+        cats = q._cached_columns()
+        assert cats is not None
+        assert not path.exists()
+        path, = cache_dir.glob('cats-*.marshal')
+        assert qngng._cache.load(path) is not None
+
+    def test_dir(self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+        import qngng._cache
+
+        monkeypatch.delenv('QNGNG_CACHE_DIR', raising=False)
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+        assert qngng._cache.cache_dir() == tmp_path / 'qngng'
+        monkeypatch.setenv('XDG_CACHE_HOME', 'relative')
+        assert qngng._cache.cache_dir() == pathlib.Path.home() / '.cache' / 'qngng'
+        monkeypatch.setenv('QNGNG_CACHE_DIR', '')
+        assert qngng._cache.cache_dir() is None
+        q._cached_columns.cache_clear()
+
+        try:
+            assert q._cached_columns() is None
+            assert q._load_columns_impl('std-surnames').surname
+        finally:
+            q._cached_columns.cache_clear()
+
+
+class TestCategoryFile:
+    _CSV = ('Name,Surname,Gender,Weight\n'
+            'Jean,Tremblay,male,3\n'
+            '"Marie, Ève",Roy,FEMALE,1\n'
+            'Paul,,m,\n'
+            '\n'
+            'Lucie,Côté,f,0\r\n'
+            'Rémi,Caron,,2\n')
+
+    @pytest.fixture(autouse=True)
+    def cache_dir(self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+        cache_dir = tmp_path / 'cache'
+        monkeypatch.setenv('QNGNG_CACHE_DIR', str(cache_dir))
+        q._cat_file.cache_clear()
+        q._file_pool.cache_clear()
+        yield cache_dir
+        q._cat_file.cache_clear()
+        q._file_pool.cache_clear()
+
+    @staticmethod
+    def _write(tmp_path: pathlib.Path, name: str, content: str) -> q.CategoryFile:
+        path = tmp_path / name
+        path.write_text(content)
+        return q.CategoryFile(str(path))
+
+    @staticmethod
+    def _entries(gen: q.NameGenerator, count: int = 500) -> set[tuple[str, str, q.Gender]]:
+        return {(name_tuple.name, name_tuple.surname, name_tuple.gender)
+                for name_tuple in gen.random_name_tuples(count)}
+
+    def test_csv(self, tmp_path: pathlib.Path):
+        cat_file = self._write(tmp_path, 'people.csv', self._CSV)
+        gen = q.NameGenerator(categories=frozenset({cat_file}), seed=1)
+        assert self._entries(gen) == {('Jean', 'Tremblay', q.Gender.MALE),
+                                      ('Marie, Ève', 'Roy', q.Gender.FEMALE),
+                                      ('Lucie', 'Côté', q.Gender.FEMALE)}
+        assert gen.random_name_tuple().category == 'people'
+
+        # zero weight
+        gen = q.NameGenerator(categories=frozenset({cat_file}), weighted=True, seed=1)
+        counts = collections.Counter(name_tuple.name for name_tuple in gen.random_name_tuples(4000))
+        assert counts.keys() == {'Jean', 'Marie, Ève'}
+        assert counts['Jean'] == pytest.approx(3000, rel=0.1)
+
+        gen = q.NameGenerator(gender=q.Gender.FEMALE, categories=frozenset({cat_file}), seed=1)
+        assert self._entries(gen) == {('Marie, Ève', 'Roy', q.Gender.FEMALE),
+                                      ('Lucie', 'Côté', q.Gender.FEMALE)}
+
+    def test_jsonl(self, tmp_path: pathlib.Path):
+        # the records of `--output-format=jsonl` are valid entries
+        name_tuples = q.NameGenerator(categories=frozenset({q.Category.SN}),
+                                      seed=2).random_name_tuples(50)
+        path = tmp_path / 'sn.jsonl'
+        path.write_bytes(qngng._output.RecordWriter(q.OutputFormat.JSONL).encode(name_tuples))
+        gen = q.NameGenerator(categories=frozenset({q.CategoryFile(str(path))}), seed=3)
+        expected = {(name_tuple.name, name_tuple.surname, name_tuple.gender)
+                    for name_tuple in name_tuples}
+        assert self._entries(gen, 2000) == expected
+        assert gen.space_size() == len(name_tuples)
+        assert {(name_tuple.name, name_tuple.surname, name_tuple.gender)
+                for name_tuple in gen.iter_unique_name_tuples()} == expected
+
+    def test_pack(self, tmp_path: pathlib.Path):
+        src_dir = tmp_path / 'src'
+        src_dir.mkdir()
+        (src_dir / 'a-m.json').write_text('[{"name": "Jo", "surname": "Lavoie"}]')
+        (src_dir / 'a-f.json').write_text('[{"name": "Li", "surname": "Nadeau"}, '
+                                           '{"name": "", "surname": "Roy"}]')
+        path = tmp_path / 'a.pack'
+        qngng._pack.write_pack(src_dir, qngng.__version__, path)
+        gen = q.NameGenerator(categories=frozenset({q.CategoryFile(str(path))}), seed=4)
+        assert self._entries(gen, 100) == {('Jo', 'Lavoie', q.Gender.MALE),
+                                           ('Li', 'Nadeau', q.Gender.FEMALE)}
+
+    def test_surname_file(self, tmp_path: pathlib.Path):
+        cat_file = self._write(tmp_path, 'reg.csv', 'surname,weight\nOuellet,5\nBoucher,1\n'
+                                                      'Caron,1\n')
+        gen = q.NameGenerator(2, True, categories=frozenset({cat_file}), seed=5)
+        std_names = set(q._std_pool(None).names)
+
+        for name_tuple in gen.random_name_tuples(300):
+            assert name_tuple.name in std_names
+            assert name_tuple.middle_name in std_names
+            first, second = name_tuple.surname.split('-')
+            assert first != second
+            assert {first, second} <= {'Ouellet', 'Boucher', 'Caron'}
+
+        name_count = len(std_names)
+        assert gen.space_size() == name_count * (name_count - 1) * 3 * 2
+        assert gen.name_tuple_at(gen.space_size() - 1).category == 'reg'
+
+    def test_formats(self, tmp_path: pathlib.Path):
+        cat_file = self._write(tmp_path, 'people.csv', self._CSV)
+        gen = q.NameGenerator(categories=frozenset({cat_file, q.Category.SN}), seed=6)
+        names = set(gen.iter_formatted_names(500, q.Format.SNAKE))
+        assert {'jean_tremblay', 'lucie_cote'} <= names
+
+    def test_parallel(self, tmp_path: pathlib.Path):
+        cat_file = self._write(tmp_path, 'people.csv', self._CSV)
+        gen = q.NameGenerator(categories=frozenset({cat_file}), seed=7)
+        names = ''.join(q.generate_parallel(gen, 200, 2, chunk_size=64)).splitlines()
+        assert set(names) == {'Jean Tremblay', 'Marie, Ève Roy', 'Lucie Côté'}
+
+    def test_index_cache(self, tmp_path: pathlib.Path, cache_dir: pathlib.Path,
+                         monkeypatch: pytest.MonkeyPatch):
+        import qngng._catfile
+
+        cat_file = self._write(tmp_path, 'people.csv', self._CSV)
+        qngng._catfile.CatFile(cat_file.path)
+        assert len(list(cache_dir.glob('index-*.marshal'))) == 1
+        build_index = qngng._catfile._build_index
+
+        def fail(*args: typing.Any) -> typing.Any:
+            raise AssertionError
+
+        monkeypatch.setattr(qngng._catfile, '_build_index', fail)
+        male_names, _, _, _ = qngng._catfile.CatFile(cat_file.path).entries(q.Gender.MALE)
+        assert list(male_names) == ['Jean']
+
+        # a modified file is indexed again
+        pathlib.Path(cat_file.path).write_text(self._CSV + 'Marc,Roy,male,1\n')
+        monkeypatch.setattr(qngng._catfile, '_build_index', build_index)
+        male_names, _, _, _ = qngng._catfile.CatFile(cat_file.path).entries(q.Gender.MALE)
+        assert list(male_names) == ['Jean', 'Marc']
+
+    @pytest.mark.parametrize(('name', 'content'), [
+        ('people.txt', 'name,surname\n'),
+        ('people.csv', ''),
+        ('people.csv', 'name,surname,gender\nJean,,male\n'),
+        ('people.csv', 'name,gender\nJean,male\n'),
+        ('people.csv', 'surname,weight\nRoy,-2\n'),
+        ('people.jsonl', '{"name": "Jean",\n'),
+    ])
+    def test_invalid(self, tmp_path: pathlib.Path, name: str, content: str):
+        cat_file = self._write(tmp_path, name, content)
+
+        with pytest.raises(ValueError):
+            q.NameGenerator(categories=frozenset({cat_file})).random_name_tuple()
+
+    def test_numpy(self, tmp_path: pathlib.Path):
+        pytest.importorskip('numpy')
+        cat_file = self._write(tmp_path, 'people.csv', self._CSV)
+        gen = q.NameGenerator(categories=frozenset({cat_file}), weighted=True, seed=8)
+        name_tuples = gen.random_name_tuples(2000, q.Backend.NUMPY)
+        assert {name_tuple.name for name_tuple in name_tuples} == {'Jean', 'Marie, Ève'}
+
+    def test_cli(self, tmp_path: pathlib.Path):
+        from typer.testing import CliRunner
+
+        cat_file = self._write(tmp_path, 'people.csv', self._CSV)
+        result = CliRunner().invoke(qngng._cli._app, ['--cat-file', cat_file.path, '-n', '100',
+                                                     '--kebab-case'])
+        assert result.exit_code == 0
+        assert set(result.stdout.splitlines()) == {
+            q.format_name(q.NameTuple(name, surname, q.Gender.MALE), q.Format.KEBAB)
+            for name, surname in [('Jean', 'Tremblay'), ('Marie, Ève', 'Roy'), ('Lucie', 'Côté')]
+        }
+        result = CliRunner().invoke(qngng._cli._app, ['--cat-file', cat_file.path, '--cat', 'sn',
+                                                     '-n', '100', '--output-format', 'csv'])
+        assert result.exit_code == 0
+        rows = list(csv.DictReader(result.stdout.splitlines()))
+        assert {row['category'] for row in rows} == {'people', 'sn'}
+        bad_file = self._write(tmp_path, 'bad.csv', 'name,surname\nJean,Roy\n')
+        result = CliRunner().invoke(qngng._cli._app, ['--cat-file', bad_file.path])
+        assert result.exit_code != 0
+        assert 'gender' in result.output
+
+
+class TestNameTuple:
+    def test_random_name_tuple(self):
+        gen = q.NameGenerator(surname_count=2, with_middle_name=True, gender=q.Gender.MALE)
+        name_tuple = gen.random_name_tuple()
+        assert name_tuple.gender == q.Gender.MALE
+        assert name_tuple.middle_name is not None
+        assert name_tuple.middle_name != name_tuple.name
+
+    def test_to_full_name(self):
+        name_tuple = q.NameTuple('Jean', 'Tremblay', q.Gender.MALE, 'Pierre')
+        assert name_tuple.to_full_name() == q.FullName(name='Jean', surname='Tremblay',
+                                                       gender=q.Gender.MALE, middle_name='Pierre')
+
+    def test_format_name(self):
+        name_tuple = q.NameTuple('Éloïse', 'Côté-Roy', q.Gender.FEMALE, 'Anne')
+        assert q.format_name(name_tuple) == 'Éloïse A. Côté-Roy'
+        assert q.format_name(name_tuple, q.Format.SNAKE) == 'eloise_a_cote_roy'
+        assert q.format_name(name_tuple, q.Format.CAMEL, False) == 'eloiseAnneCoteRoy'
+
+    def test_cat_pool_genders(self):
+        pool = q._cat_pool(q.Category.UDA_HOSTS, None)
+        male = q._cat_pool(q.Category.UDA_HOSTS, q.Gender.MALE)
+        assert pool.gender_at(0) == q.Gender.MALE
+        assert pool.gender_at(len(male.names)) == q.Gender.FEMALE
+        assert len(pool.names) == len(pool.surnames)
+
+
+class TestWeighted:
+    def test_alias_table(self):
+        table = q._AliasTable([1, 0, 2, 7])
+        rng = random.Random(1)
+        counts = collections.Counter(table.sample(rng) for _ in range(100000))
+        assert counts[1] == 0
+        assert counts[0] == pytest.approx(10000, rel=0.1)
+        assert counts[2] == pytest.approx(20000, rel=0.1)
+        assert counts[3] == pytest.approx(70000, rel=0.1)
+
+    def test_alias_table_invalid(self):
+        with pytest.raises(ValueError):
+            q._AliasTable([0, 0])
+
+        with pytest.raises(ValueError):
+            q._AliasTable([1, -1])
+
+    def test_popular_surname(self):
+        gen = q.NameGenerator(weighted=True)
+        counts = collections.Counter(gen.random_name_tuple().surname for _ in range(20000))
+
+        # Tremblay has about 1.6 % of the total weight (versus 0.1 % when uniform)
+        assert counts['Tremblay'] > 150
+
+    def test_double_surname_distinct(self):
+        gen = q.NameGenerator(surname_count=2, weighted=True)
+        pool = q._std_pool(None)
+        surnames = set(pool.surnames)
+
+        for _ in range(1000):
+            surname = gen.random_name_tuple().surname
+            parts = [(surname[:i], surname[i + 1:]) for i, c in enumerate(surname) if c == '-']
+            assert any(a in surnames and b in surnames and a != b for a, b in parts)
+
+    def test_category_weights(self):
+        gen = q.NameGenerator(gender=q.Gender.MALE,
+                              categories=frozenset({q.Category.STD, q.Category.LBL}),
+                              category_weights={q.Category.STD: 0, q.Category.LBL: 1})
+        lbl_names = set(q._cat_pool(q.Category.LBL, q.Gender.MALE).names)
+        assert all(gen.random_name_tuple().name in lbl_names for _ in range(100))
+
+    def test_category_weights_unknown_category(self):
+        with pytest.raises(ValueError):
+            q.NameGenerator(category_weights={q.Category.LBL: 1})
+
+
+class TestUnique:
+    def test_permutation(self):
+        for size in (1, 2, 3, 100, 1025):
+            perm = q._FeistelPermutation(size, 42)
+            assert sorted(perm[i] for i in range(size)) == list(range(size))
+
+    def test_permutation_keyed(self):
+        perm1 = q._FeistelPermutation(10000, 1)
+        perm2 = q._FeistelPermutation(10000, 2)
+        assert [perm1[i] for i in range(100)] != [perm2[i] for i in range(100)]
+
+    def test_space_size(self):
+        gen = q.NameGenerator(surname_count=2, with_middle_name=True, gender=q.Gender.FEMALE,
+                              categories=frozenset({q.Category.STD, q.Category.SN}))
+        pool = q._std_pool(q.Gender.FEMALE)
+        names = len(pool.names)
+        surnames = len(pool.surnames)
+        sn = len(q._cat_pool(q.Category.SN, q.Gender.FEMALE).names)
+        assert gen.space_size() == names * (names - 1) * surnames * (surnames - 1) + sn
+
+    def test_name_at_distinct(self):
+        gen = q.NameGenerator(with_middle_name=True, gender=q.Gender.MALE,
+                              categories=frozenset({q.Category.STD, q.Category.LBL}))
+        size = gen.space_size()
+        indexes = list(range(5000)) + list(range(size - 5000, size))
+        name_tuples = [gen.name_tuple_at(index) for index in indexes]
+        assert len(set(name_tuples)) == len(name_tuples)
+        assert all(name_tuple.middle_name != name_tuple.name for name_tuple in name_tuples)
+
+        with pytest.raises(IndexError):
+            gen.name_at(size)
+
+    def test_iter_unique(self):
+        gen = q.NameGenerator(categories=frozenset({q.Category.LBL, q.Category.DUG}))
+        fullnames = list(gen.iter_unique(7))
+        assert len(fullnames) == gen.space_size()
+        assert {(f.name, f.surname) for f in fullnames} == {(f.name, f.surname)
+                                                            for f in map(gen.name_at,
+                                                                         range(gen.space_size()))}
+        assert fullnames == list(gen.iter_unique(7))
+
+    def test_cli_unique(self):
+        from typer.testing import CliRunner
+
+        result = CliRunner().invoke(qngng._cli._app, ['--unique', '--count', '0', '--cat', 'sn'])
+        assert result.exit_code == 0
+        names = result.stdout.splitlines()
+        assert len(names) == len(set(names)) == 9
+
+        result = CliRunner().invoke(qngng._cli._app, ['--unique', '--count', '10', '--cat', 'sn'])
+        assert result.exit_code != 0
+
+
+class TestSeed:
+    _CATS = frozenset({q.Category.STD, q.Category.UDA_ACTORS})
+
+    def test_reproducible(self):
+        gen1 = q.NameGenerator(2, True, categories=self._CATS, seed=42)
+        gen2 = q.NameGenerator(2, True, categories=self._CATS, seed=42)
+        assert gen1.random_full_names(200) == gen2.random_full_names(200)
+
+    def test_weighted_reproducible(self):
+        gen1 = q.NameGenerator(2, weighted=True, seed=42)
+        gen2 = q.NameGenerator(2, weighted=True, seed=42)
+        assert gen1.random_full_names(200) == gen2.random_full_names(200)
+
+    def test_rng(self):
+        gen1 = q.NameGenerator(rng=random.Random(7))
+        gen2 = q.NameGenerator(rng=random.Random(7))
+        assert gen1.random_full_names(50) == gen2.random_full_names(50)
+
+    def test_seed_and_rng(self):
+        with pytest.raises(ValueError):
+            q.NameGenerator(seed=1, rng=random.Random(1))
+
+    def test_substreams(self):
+        gen = q.NameGenerator(2, True, seed=42)
+        streams = gen.substreams(3)
+        names = [stream.random_full_names(100) for stream in streams]
+        assert names[0] != names[1] != names[2]
+        assert names == [stream.random_full_names(100)
+                         for stream in q.NameGenerator(2, True, seed=42).substreams(3)]
+
+    def test_unique_seed(self):
+        gen = q.NameGenerator(categories=frozenset({q.Category.D31}))
+        assert list(gen.iter_unique(3)) == list(gen.iter_unique(3))
+
+    def test_cli_seed(self):
+        from typer.testing import CliRunner
+
+        args = ['--seed', '1234', '--count', '100', '--cat', 'all']
+        result1 = CliRunner().invoke(qngng._cli._app, args)
+        result2 = CliRunner().invoke(qngng._cli._app, args)
+        assert result1.exit_code == 0
+        assert result1.stdout == result2.stdout
+
+    @pytest.mark.parametrize('extra_args', [[], ['--unique'], ['--output-format', 'jsonl']])
+    def test_cli_seed_jobs(self, extra_args):
+        from typer.testing import CliRunner
+
+        def names(jobs: int):
+            args = ['--seed', '7', '--count', '40000', '--jobs', str(jobs), *extra_args]
+            result = CliRunner().invoke(qngng._cli._app, args)
+            assert result.exit_code == 0
+            return result.stdout
+
+        assert names(1) == names(2)
+
+
+class TestParallel:
+    def test_count(self):
+        gen = q.NameGenerator(surname_count=2)
+        chunks = list(q.generate_parallel(gen, 1000, 2, q.Format.SNAKE, chunk_size=128))
+        names = ''.join(chunks).splitlines()
+        assert len(chunks) == 8
+        assert len(names) == 1000
+        assert all(re.fullmatch(r'[a-z0-9_]+', name) for name in names)
+
+    def test_deterministic(self):
+        def names(jobs: int, ordered: bool = True):
+            gen = q.NameGenerator(with_middle_name=True, seed=99)
+            return ''.join(q.generate_parallel(gen, 500, jobs, ordered=ordered, chunk_size=64))
+
+        assert names(1) == names(3)
+        assert sorted(names(2, False).splitlines()) == sorted(names(1).splitlines())
+
+    def test_unique(self):
+        gen = q.NameGenerator(categories=frozenset({q.Category.UDA_HOSTS}), seed=5)
+        names = ''.join(q.generate_parallel(gen, None, 2, unique=True, chunk_size=100)).splitlines()
+        assert len(names) == gen.space_size()
+        assert sorted(names) == sorted(q.format_name(gen.name_at(i))
+                                       for i in range(gen.space_size()))
+
+        with pytest.raises(ValueError):
+            list(q.generate_parallel(gen, gen.space_size() + 1, 2, unique=True))
+
+    def test_unbounded(self):
+        gen = q.NameGenerator()
+        chunks = q.generate_parallel(gen, None, 2, chunk_size=10)
+        assert len(''.join(itertools.islice(chunks, 50)).splitlines()) == 500
+        chunks.close()
+
+
+class TestThreadSafe:
+    _THREAD_COUNT = 8
+
+    @pytest.fixture(autouse=True)
+    def switch_often(self):
+        # maximize the interleaving of the threads under the GIL
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        yield
+        sys.setswitchinterval(interval)
+
+    @staticmethod
+    def _draw(gen: q.NameGenerator | q.ThreadSafeNameGenerator) -> list[object]:
+        names: list[object] = []
+
+        for _ in range(20):
+            names.append(gen.random_name_tuple())
+            names.extend(gen.random_formatted_names(50, q.Format.SNAKE))
+            names.extend(gen.random_full_names(10))
+
+        return names
+
+    def _run(self, target: typing.Callable[[int], list[object]]) -> list[list[object]]:
+        barrier = threading.Barrier(self._THREAD_COUNT)
+        results: list[list[object]] = [[] for _ in range(self._THREAD_COUNT)]
+        errors: list[BaseException] = []
+
+        def run(index: int):
+            try:
+                barrier.wait()
+                results[index] = target(index)
+            except BaseException as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=run, args=(index,))
+                   for index in range(self._THREAD_COUNT)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        return results
+
+    @pytest.mark.parametrize('kwargs', [
+        {},
+        {'surname_count': 2, 'with_middle_name': True},
+        {'categories': frozenset(q._UNIQUE_CATS), 'weighted': True},
+        {'constraints': q.Constraints(initial='m')},
+    ])
+    def test_substreams(self, kwargs: dict[str, typing.Any]):
+        gen = q.NameGenerator(seed=3, **kwargs)
+        safe_gen = q.ThreadSafeNameGenerator(gen)
+        results = self._run(lambda _: self._draw(safe_gen))
+
+        # each thread gets its own substream, whatever the interleaving
+        expected = [self._draw(gen.substream(index)) for index in range(self._THREAD_COUNT)]
+        assert sorted(map(repr, results)) == sorted(map(repr, expected))
+
+    def test_thread_generator(self):
+        safe_gen = q.ThreadSafeNameGenerator(q.NameGenerator())
+        gens = self._run(lambda _: [safe_gen.generator, safe_gen.generator])
+        assert all(first is second for first, second in gens)
+        assert len({id(first) for first, _ in gens}) == self._THREAD_COUNT
+
+    def test_cold_caches(self):
+        cats = frozenset(q._UNIQUE_CATS)
+        expected = [self._draw(q.NameGenerator(categories=cats, seed=index))
+                    for index in range(self._THREAD_COUNT)]
+        q._cat_pool.cache_clear()
+        q._std_pool.cache_clear()
+        q._std_surname_pool.cache_clear()
+        results = self._run(lambda index: self._draw(q.NameGenerator(categories=cats,
+                                                                     seed=index)))
+        assert results == expected
+
+
+class TestAsync:
+    @staticmethod
+    def _collect(gen: q.NameGenerator, *args: typing.Any, **kwargs: typing.Any) -> list[list[str]]:
+        async def run():
+            return [batch async for batch in gen.agenerate(*args, **kwargs)]
+
+        return asyncio.run(run())
+
+    @pytest.mark.parametrize('offload_size', [1, 16384])
+    def test_batches(self, offload_size: int):
+        gen = q.NameGenerator(surname_count=2, seed=8)
+        batches = self._collect(gen, 2500, 1000, q.Format.KEBAB, offload_size=offload_size)
+        assert [len(batch) for batch in batches] == [1000, 1000, 500]
+
+        # same names as the synchronous API
+        expected = q.NameGenerator(surname_count=2, seed=8).random_formatted_names(2500,
+                                                                                  q.Format.KEBAB)
+        assert list(itertools.chain.from_iterable(batches)) == expected
+
+    def test_empty(self):
+        assert self._collect(q.NameGenerator(), 0) == []
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            self._collect(q.NameGenerator(), 10, 0)
+
+        with pytest.raises(ValueError):
+            self._collect(q.NameGenerator(), 10, max_pending=0)
+
+    def test_backpressure(self, monkeypatch: pytest.MonkeyPatch):
+        gen = q.NameGenerator(seed=1)
+        batch_count = 0
+        iter_formatted_names = gen.iter_formatted_names
+
+        def counting_iter_formatted_names(*args: typing.Any) -> typing.Iterator[str]:
+            nonlocal batch_count
+            batch_count += 1
+            return iter_formatted_names(*args)
+
+        monkeypatch.setattr(gen, 'iter_formatted_names', counting_iter_formatted_names)
+
+        async def run():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            ticker = asyncio.create_task(tick())
+            batches = gen.agenerate(None, 10, max_pending=2)
+            await anext(batches)
+
+            # a slow consumer: the producer may only fill the queue
+            for _ in range(100):
+                await asyncio.sleep(0)
+
+            produced = batch_count
+            await batches.aclose()
+            ticker.cancel()
+            await asyncio.sleep(0)
+            return produced, ticks, len(asyncio.all_tasks())
+
+        produced, ticks, task_count = asyncio.run(run())
+
+        # one consumed batch, two queued ones, and one waiting to be
+        # queued
+        assert produced <= 4
+        assert ticks >= 100
+        assert task_count == 1
+
+    def test_close_waits_for_offloaded_batch(self):
+        import concurrent.futures
+
+        gen = q.NameGenerator(seed=2)
+        futures: list[concurrent.futures.Future[typing.Any]] = []
+
+        class Executor(concurrent.futures.ThreadPoolExecutor):
+            def submit(self, *args: typing.Any, **kwargs: typing.Any):
+                future = super().submit(*args, **kwargs)
+                futures.append(future)
+                return future
+
+        async def run():
+            with Executor(1) as executor:
+                batches = gen.agenerate(None, 50000, max_pending=1, executor=executor,
+                                        offload_size=1)
+                await anext(batches)
+                await batches.aclose()
+                return all(future.done() for future in futures)
+
+        assert asyncio.run(run())
+
+
+class TestPseudonymize:
+    _CSV = ('id,name,note,boss\r\n'
+            '1,Jean Tremblay,"a, b",Marie Roy\r\n'
+            '2,"Jean\nTremblay","multi\nline ""quoted""",\r\n'
+            '3,Marie Roy,,Jean Tremblay\r\n')
+
+    @staticmethod
+    def _run(data: bytes, columns: tuple[str, ...], key: bytes = b'secret',
+             input_format: q.InputFormat | None = None, jobs: int = 1,
+             block_size: int = qngng._pseudo.BLOCK_SIZE, **kwargs: typing.Any) -> bytes:
+        out = io.BytesIO()
+        qngng._pseudo.pseudonymize(io.BytesIO(data), out,
+                                   qngng._pseudo.Options(key, columns, **kwargs),
+                                   input_format, jobs, block_size)
+        return out.getvalue()
+
+    def test_csv(self):
+        out = self._run(self._CSV.encode(), ('name', 'boss'))
+        rows = list(csv.reader(io.StringIO(out.decode(), newline='')))
+        assert out.startswith(b'id,name,note,boss\r\n')
+        assert [row[0] for row in rows] == ['id', '1', '2', '3']
+        assert rows[1][2] == 'a, b'
+        assert rows[2][2] == 'multi\nline "quoted"'
+        assert rows[2][3] == ''
+
+        # same value, same name, whatever the column
+        assert rows[1][1] == rows[3][3] != 'Jean Tremblay'
+        assert rows[1][3] == rows[3][1] != 'Marie Roy'
+        assert rows[2][1] not in ('Jean\nTremblay', rows[1][1])
+
+    def test_key(self):
+        data = ''.join(f'{{"name": "Person {i}"}}\n' for i in range(100)).encode()
+        assert self._run(data, ('name',)) == self._run(data, ('name',))
+        assert self._run(data, ('name',)) != self._run(data, ('name',), b'other')
+
+    def test_jsonl(self):
+        data = ('{"name": "Jean Tremblay", "n": 1}\r\n'
+                '\n'
+                '{"other": "Jean Tremblay"}\n'
+                '{"name": null, "id": 2}\n'
+                '{"n\\u0061me": "Jean Tremblay"}').encode()
+        lines = self._run(data, ('name',), fmt=q.Format.SNAKE).splitlines(keepends=True)
+        name = json.loads(lines[0])['name']
+        assert re.fullmatch(r'[a-z0-9_]+', name)
+        assert json.loads(lines[0])['n'] == 1
+        assert lines[0].endswith(b'\r\n')
+        assert lines[1:4] == [b'\n', b'{"other": "Jean Tremblay"}\n', b'{"name": null, "id": 2}\n']
+        assert lines[4] == f'{{"name":"{name}"}}'.encode()
+
+    def test_names(self):
+        data = ''.join(f'{{"name": "Person {i}"}}\n' for i in range(200)).encode()
+        gen = q.NameGenerator(gender=q.Gender.FEMALE, categories=frozenset({q.Category.SN}))
+        expected = {q.format_name(gen.name_tuple_at(i), q.Format.KEBAB)
+                    for i in range(gen.space_size())}
+        out = self._run(data, ('name',), fmt=q.Format.KEBAB, gender=q.Gender.FEMALE,
+                        categories=frozenset({q.Category.SN}))
+        names = {json.loads(line)['name'] for line in out.splitlines()}
+        assert names <= expected
+        assert len(names) > 1
+        out = self._run(data, ('name',), surname_count=2, with_middle_name=True)
+        assert all(len(json.loads(line)['name'].split()) == 3 for line in out.splitlines())
+
+    @pytest.mark.parametrize('input_format', [q.InputFormat.CSV,
+                                              q.InputFormat.JSONL])
+    def test_blocks(self, input_format: q.InputFormat):
+        if input_format == q.InputFormat.CSV:
+            data = ('name,note\n' + ''.join(f'Person {i},"x\ny ""{i}"""\n'
+                                            for i in range(500))).encode()
+        else:
+            data = ''.join(f'{{"name": "Person {i}"}}\n' for i in range(500)).encode()
+
+        expected = self._run(data, ('name',))
+        assert self._run(data, ('name',), input_format=input_format, block_size=7) == expected
+        assert self._run(data, ('name',), jobs=2, block_size=512) == expected
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            self._run(self._CSV.encode(), ('nope',))
+
+        with pytest.raises(ValueError):
+            self._run(b'{"name": "Jean"\n', ('name',))
+
+        with pytest.raises(ValueError):
+            self._run(b'{"name": "Jean"}\n', ('name',), categories=frozenset())
+
+    def test_cli(self):
+        from typer.testing import CliRunner
+
+        result = CliRunner().invoke(qngng._cli._app,
+                                    ['pseudonymize', '--column', 'name', '--kebab-case'],
+                                    input=self._CSV, env={'QNGNG_PSEUDONYMIZE_KEY': 'secret'})
+        assert result.exit_code == 0
+        rows = list(csv.DictReader(io.StringIO(result.stdout, newline='')))
+        assert [row['boss'] for row in rows] == ['Marie Roy', '', 'Jean Tremblay']
+        assert all(re.fullmatch(r'[a-z0-9-]+', row['name']) for row in rows)
+        result = CliRunner().invoke(qngng._cli._app, ['pseudonymize', '--column', 'name'],
+                                    input=self._CSV)
+        assert result.exit_code != 0
+
+
+class TestLedger:
+    _CLAIM_CODE = """
+import random, sys
+from qngng._ledger import Ledger
+names = [f'Name {i}' for i in range(2000)]
+random.Random(int(sys.argv[2])).shuffle(names)
+with Ledger(sys.argv[1]) as ledger:
+    print(sum(sum(ledger.claim(names[i:i + 50])) for i in range(0, len(names), 50)))
+"""
+
+    def test_claim(self, tmp_path: pathlib.Path):
+        with qngng.Ledger(tmp_path / 'ledger') as ledger:
+            assert ledger.claim(['Jean Roy', 'Marie Côté', 'Jean Roy']) == [True, True, False]
+            assert ledger.claim(['Marie Côté', 'Paul Caron']) == [False, True]
+            assert len(ledger) == 3
+            assert 'Marie Côté' in ledger
+            assert 'Marie Cote' not in ledger
+            assert ledger.claim([]) == []
+
+            with pytest.raises(ValueError):
+                ledger.claim(['Jean\nRoy'])
+
+        assert (tmp_path / 'ledger').read_text() == 'Jean Roy\nMarie Côté\nPaul Caron\n'
+
+    def test_growth(self, tmp_path: pathlib.Path):
+        names = [f'Name {i}' for i in range(20000)]
+
+        with qngng.Ledger(tmp_path / 'ledger') as ledger:
+            for i in range(0, len(names), 1000):
+                assert all(ledger.claim(names[i:i + 1000]))
+
+            assert not any(ledger.claim(names))
+            assert len(ledger) == len(names)
+
+        # the index grew past its initial size
+        assert (tmp_path / 'ledger.index').stat().st_size > qngng._ledger._MIN_SLOT_COUNT * 9
+
+    def test_recovery(self, tmp_path: pathlib.Path):
+        path = tmp_path / 'ledger'
+
+        with qngng.Ledger(path) as ledger:
+            ledger.claim(['Jean Roy', 'Marie Côté'])
+
+        # a missing or corrupted index is rebuilt from the log
+        (tmp_path / 'ledger.index').unlink()
+
+        with qngng.Ledger(path) as ledger:
+            assert ledger.claim(['Jean Roy', 'Paul Caron']) == [False, True]
+
+        (tmp_path / 'ledger.index').write_bytes(b'nope')
+
+        # an interrupted append leaves an incomplete last line
+        with open(path, 'a') as f:
+            f.write('Lucie\nRémi Ca')
+
+        with qngng.Ledger(path) as ledger:
+            assert len(ledger) == 4
+            assert 'Lucie' in ledger
+            assert ledger.claim(['Rémi Ca', 'Paul Caron']) == [True, False]
+
+        assert path.read_text().endswith('Lucie\nRémi Ca\n')
+
+    def test_concurrent_writers(self, tmp_path: pathlib.Path):
+        path = tmp_path / 'ledger'
+        procs = [subprocess.Popen([sys.executable, '-c', self._CLAIM_CODE, str(path), str(i)],
+                                  stdout=subprocess.PIPE, text=True)
+                 for i in range(4)]
+        new_counts = [int(proc.communicate()[0]) for proc in procs]
+        assert all(proc.returncode == 0 for proc in procs)
+
+        # each name is new for exactly one writer
+        assert sum(new_counts) == 2000
+        assert sorted(path.read_text().splitlines()) == sorted(f'Name {i}' for i in range(2000))
+
+    def test_generator(self, tmp_path: pathlib.Path):
+        cats = frozenset({q.Category.SN})
+        space_size = q.NameGenerator(categories=cats).space_size()
+        names: list[str] = []
+
+        # many runs never reissue a name, whatever the format
+        for seed, fmt in enumerate([q.Format.DEFAULT, q.Format.SNAKE, q.Format.DEFAULT]):
+            with qngng.Ledger(tmp_path / 'ledger') as ledger:
+                gen = q.NameGenerator(categories=cats, seed=seed)
+                run_names = list(gen.iter_ledger_names(ledger, 2, fmt))
+                assert len(run_names) == 2
+
+                if fmt == q.Format.DEFAULT:
+                    names.extend(run_names)
+
+        with qngng.Ledger(tmp_path / 'ledger') as ledger:
+            assert len(ledger) == 6
+            gen = q.NameGenerator(categories=cats, seed=9)
+            names.extend(gen.iter_ledger_names(ledger))
+            assert len(names) == len(set(names)) == space_size - 2
+            assert len(ledger) == space_size
+
+            with pytest.raises(ValueError):
+                list(gen.iter_ledger_names(ledger, 1))
+
+    def test_cli(self, tmp_path: pathlib.Path):
+        from typer.testing import CliRunner
+
+        args = ['--ledger', str(tmp_path / 'ledger'), '--count', '50', '--double-surname']
+        first = CliRunner().invoke(qngng._cli._app, args)
+        second = CliRunner().invoke(qngng._cli._app, [*args, '--kebab-case'])
+        assert first.exit_code == second.exit_code == 0
+        first_names = first.stdout.splitlines()
+        assert len(first_names) == len(second.stdout.splitlines()) == 50
+
+        # the second run only recorded new names
+        issued = (tmp_path / 'ledger').read_text().splitlines()
+        assert len(set(issued)) == 100
+        assert issued[:50] == first_names
+        result = CliRunner().invoke(qngng._cli._app, [*args, '--unique'])
+        assert result.exit_code != 0
+
+
+class TestNumpyBackend:
+    @pytest.fixture(autouse=True)
+    def numpy(self):
+        return pytest.importorskip('numpy')
+
+    def test_category_field(self):
+        cats = frozenset({q.Category.STD, q.Category.ICIP})
+        name_tuples = q.NameGenerator(categories=cats, seed=2).random_name_tuples(500,
+                                                                                q.Backend.NUMPY)
+        assert {name_tuple.category for name_tuple in name_tuples} == cats
+
+    def test_std_constraints(self):
+        gen = q.NameGenerator(surname_count=2, with_middle_name=True, gender=q.Gender.FEMALE,
+                              seed=1)
+        pool = q._std_pool(q.Gender.FEMALE)
+        surnames = set(pool.surnames)
+        name_tuples = gen.random_name_tuples(5000, q.Backend.NUMPY)
+        assert len(name_tuples) == 5000
+
+        for name_tuple in name_tuples:
+            assert name_tuple.gender == q.Gender.FEMALE
+            assert name_tuple.middle_name in pool.names
+            assert name_tuple.middle_name != name_tuple.name
+            parts = [(name_tuple.surname[:i], name_tuple.surname[i + 1:])
+                     for i, c in enumerate(name_tuple.surname) if c == '-']
+            assert any(a in surnames and b in surnames and a != b for a, b in parts)
+
+    def test_weighted_constraints(self):
+        gen = q.NameGenerator(with_middle_name=True, weighted=True, seed=1)
+        name_tuples = gen.random_name_tuples(5000, q.Backend.NUMPY)
+        assert all(name_tuple.middle_name != name_tuple.name for name_tuple in name_tuples)
+        assert sum(name_tuple.surname == 'Tremblay' for name_tuple in name_tuples) > 30
+
+    def test_categories(self):
+        cats = frozenset({q.Category.STD, q.Category.UDA_SINGERS, q.Category.D31})
+        gen = q.NameGenerator(gender=q.Gender.MALE, categories=cats, seed=1)
+        full_names = {full_name for cat in cats - {q.Category.STD}
+                      for full_name in zip(q._cat_pool(cat, q.Gender.MALE).names,
+                                           q._cat_pool(cat, q.Gender.MALE).surnames)}
+        name_tuples = gen.random_name_tuples(3000, q.Backend.NUMPY)
+        from_cats = sum((n.name, n.surname) in full_names for n in name_tuples)
+        assert 1500 < from_cats < 2500
+        assert all(n.gender == q.Gender.MALE for n in name_tuples)
+
+    def test_reproducible(self):
+        def names():
+            gen = q.NameGenerator(2, True, seed=3)
+            return gen.random_formatted_names(100, q.Format.KEBAB, backend=q.Backend.NUMPY)
+
+        assert names() == names()
+
+    def test_iter_formatted_names(self):
+        gen = q.NameGenerator()
+        names = list(gen.iter_formatted_names(q._NP_BATCH_SIZE + 10, q.Format.SNAKE,
+                                              backend=q.Backend.AUTO))
+        assert len(names) == q._NP_BATCH_SIZE + 10
+        assert all(re.fullmatch(r'[a-z0-9_]+', name) for name in names)
+
+
+class TestFormattingTables:
+    @staticmethod
+    def _reference(name_tuple: q.NameTuple, fmt: q.Format, with_middle_initial: bool) -> str:
+        raw_name = q.format_name(name_tuple, q.Format.DEFAULT, with_middle_initial)
+
+        if with_middle_initial and name_tuple.middle_name:
+            raw_name = raw_name.replace(f' {name_tuple.middle_initial}. ',
+                                        f' {name_tuple.middle_initial} ')
+
+        match fmt:
+            case q.Format.SNAKE:
+                return q._normalize_name(raw_name, '_')
+            case q.Format.KEBAB:
+                return q._normalize_name(raw_name, '-')
+            case q.Format.CAMEL:
+                s = q._normalize_name(raw_name, '', False)
+                return s[0].lower() + s[1:]
+            case _:
+                return q._normalize_name(raw_name, '', False)
+
+    @pytest.mark.parametrize('fmt', [q.Format.SNAKE, q.Format.KEBAB, q.Format.CAMEL,
+                                     q.Format.CAP_CAMEL])
+    @pytest.mark.parametrize('with_middle_initial', [False, True])
+    def test_same_as_normalizing(self, fmt: q.Format, with_middle_initial: bool):
+        gen = q.NameGenerator(2, True, categories=frozenset(q._UNIQUE_CATS), seed=8)
+        gen._prepare_formatting(fmt)
+
+        for name_tuple in gen.random_name_tuples(2000):
+            assert (q.format_name(name_tuple, fmt, with_middle_initial) ==
+                    self._reference(name_tuple, fmt, with_middle_initial))
+
+    @pytest.mark.parametrize('fmt', list(q.Format))
+    @pytest.mark.parametrize('with_middle_initial', [False, True])
+    def test_iter_formatted_names(self, fmt: q.Format, with_middle_initial: bool):
+        cats = frozenset({q.Category.STD, q.Category.ICIP})
+        gen1 = q.NameGenerator(2, True, categories=cats, seed=4)
+        gen2 = q.NameGenerator(2, True, categories=cats, seed=4)
+        assert list(gen1.iter_formatted_names(2000, fmt, with_middle_initial)) == [
+            q.format_name(name_tuple, fmt, with_middle_initial)
+            for name_tuple in gen2.random_name_tuples(2000)
+        ]
+
+    def test_unknown_parts(self):
+        fullname = q.FullName(name='Zoë_Ann', surname="D'Artagnan-Côté-Ébert", gender=q.Gender.FEMALE,
+                              middle_name='Ève')
+        assert q.format_name(fullname, q.Format.SNAKE, False) == 'zoe_ann_eve_d_artagnan_cote_ebert'
+        assert q.format_name(fullname, q.Format.KEBAB) == 'zoe_ann-e-d-artagnan-cote-ebert'
+        assert q.format_name(fullname, q.Format.CAMEL) == 'zoe_AnnEDArtagnanCoteEbert'
+
+
+class TestStartup:
+    @staticmethod
+    def _loaded_modules(code: str) -> set[str]:
+        result = subprocess.run([sys.executable, '-c', f'{code}\nimport sys\nprint(*sys.modules)'],
+                                check=True, capture_output=True, text=True)
+        return set(result.stdout.split())
+
+    @pytest.mark.parametrize('module', ['qngng', 'qngng.qngng'])
+    def test_import_is_light(self, module: str):
+        modules = self._loaded_modules(f'import {module}')
+        assert not modules & {'typer', 'pydantic', 'msgspec', 'concurrent.futures', 'numpy'}
+
+    def test_name_tuples_skip_pydantic(self):
+        modules = self._loaded_modules('import qngng\n'
+                                       'qngng.NameGenerator(seed=1).random_name_tuples(10)')
+        assert 'pydantic' not in modules
+
+    def test_lazy_public_names(self):
+        assert qngng.FullName is q.FullName
+        assert set(qngng.__all__) <= set(dir(q)) | {'FullName', 'Ledger', 'PartialName'}
+
+        with pytest.raises(AttributeError):
+            qngng.nope  # pyright: ignore[reportAttributeAccessIssue]
+
+    def test_version_fast_path(self):
+        code = 'import sys\nsys.argv[1:] = ["--version"]\nimport qngng.__main__\nqngng.__main__.main()'
+        result = subprocess.run([sys.executable, '-c', f'{code}\nprint(*sys.modules)'],
+                                check=True, capture_output=True, text=True)
+        version_line, modules = result.stdout.split('\n', 1)
+        assert version_line == f'qngng {qngng.__version__}'
+        assert not set(modules.split()) & {'typer', 'qngng.qngng'}
+
+
+class TestServer:
+    @staticmethod
+    async def _get(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                   target: str) -> tuple[int, bytes]:
+        writer.write(f'GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+        status = int((await reader.readline()).split()[1])
+        length = 0
+
+        while (line := await reader.readline()) != b'\r\n':
+            name, _, value = line.decode().partition(':')
+
+            if name.lower() == 'content-length':
+                length = int(value)
+
+        return status, await reader.readexactly(length)
+
+    @staticmethod
+    def _run(targets: list[str], unix_path: pathlib.Path | None = None) -> list[tuple[int, bytes]]:
+        async def run():
+            server = qngng._server.NameServer(seed=1)
+
+            if unix_path is None:
+                aio_server = await server.start_tcp()
+                reader, writer = await asyncio.open_connection(*aio_server.sockets[0].getsockname()[:2])
+            else:
+                aio_server = await server.start_unix(unix_path)
+                reader, writer = await asyncio.open_unix_connection(str(unix_path))
+
+            async with aio_server:
+                # one keep-alive connection for all the requests
+                responses = [await TestServer._get(reader, writer, target) for target in targets]
+                writer.close()
+                return responses
+
+        return asyncio.run(run())
+
+    def test_names_json(self):
+        [(status, body)] = self._run(['/names?count=50&cat=std,icip&format=kebab'])
+        assert status == 200
+        names = json.loads(body)['names']
+        assert len(names) == 50
+        assert all(re.fullmatch(r'[a-z0-9_-]+', name) for name in names)
+
+    def test_names_text(self, tmp_path: pathlib.Path):
+        [(status, body)] = self._run(['/names?count=5&output=text&middle-initial&gender=female'],
+                                     tmp_path / 'qngng.sock')
+        assert status == 200
+        lines = body.decode().splitlines()
+        assert len(lines) == 5
+        assert all(re.fullmatch(r'\S+ [A-ZÉ]\. .+', line) for line in lines)
+
+    def test_large_count(self):
+        [(status, body)] = self._run(['/names?count=10000&cat=all'])
+        assert status == 200
+        assert len(json.loads(body)['names']) == 10000
+
+    def test_errors(self):
+        responses = self._run(['/names?count=-1', '/names?cat=nope', '/names?cat=sn&double-surname',
+                               '/names?color=red', '/nope', '/health'])
+        assert [status for status, _ in responses] == [400, 400, 400, 400, 404, 200]
+        assert json.loads(responses[-1][1])['version'] == qngng.__version__
+
+    @pytest.mark.parametrize('content_length', ['abc', '-1', '+1', ''])
+    def test_invalid_content_length(self, content_length: str):
+        async def run():
+            server = qngng._server.NameServer()
+            aio_server = await server.start_tcp()
+
+            async with aio_server:
+                reader, writer = await asyncio.open_connection(*aio_server.sockets[0].getsockname()[:2])
+                writer.write(f'GET /health HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n'.encode())
+                status_line = await reader.readline()
+                writer.close()
+                return int(status_line.split()[1])
+
+        assert asyncio.run(run()) == 400
+
+    def test_request_body(self):
+        async def run():
+            server = qngng._server.NameServer()
+            aio_server = await server.start_tcp()
+
+            async with aio_server:
+                reader, writer = await asyncio.open_connection(*aio_server.sockets[0].getsockname()[:2])
+                body = b'x' * 100000
+                writer.write(b'POST /health HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(body) + body)
+
+                # the body is skipped: the next request on the connection works
+                responses = [await self._get(reader, writer, '/health') for _ in range(2)]
+                writer.close()
+                return responses
+
+        # the first response is the one to the POST request
+        assert [status for status, _ in asyncio.run(run())] == [405, 200]
+
+    def test_concurrent_clients(self):
+        async def run():
+            server = qngng._server.NameServer()
+            aio_server = await server.start_tcp()
+            address = aio_server.sockets[0].getsockname()[:2]
+
+            async def client():
+                reader, writer = await asyncio.open_connection(*address)
+                responses = [await self._get(reader, writer, '/names?count=10') for _ in range(20)]
+                writer.close()
+                return responses
+
+            async with aio_server:
+                return await asyncio.gather(*(client() for _ in range(20)))
+
+        for responses in asyncio.run(run()):
+            assert all(status == 200 and len(json.loads(body)['names']) == 10
+                       for status, body in responses)
+
+
+class TestStats:
+    @pytest.fixture(autouse=True)
+    def _disable_stats(self):
+        yield
+        q.disable_stats()
+
+    def test_disabled_by_default(self):
+        assert q.get_stats() is None
+
+    def test_counts(self):
+        q._cat_pool.cache_clear()
+        q._std_pool.cache_clear()
+        q._std_surname_pool.cache_clear()
+        stats = q.enable_stats()
+        assert q.get_stats() is stats
+        gen = q.NameGenerator(categories=frozenset({q.Category.STD, q.Category.ICIP}), seed=1)
+        names = list(gen.iter_formatted_names(100, q.Format.SNAKE))
+        assert len(names) == 100
+        assert stats.calls['random_name_tuple'] == 100
+        assert stats.calls['format_name'] == 100
+        assert stats.entries['std-names-m'] > 0
+        assert stats.entries['icip-f'] > 0
+        assert stats.entries['std-surnames'] == len(q._std_pool(None).surnames)
+        assert stats.calls['load_category'] == 5
+        assert {'read', 'build', 'sample', 'format'} <= stats.phase_ns.keys()
+        assert all(ns >= 0 for ns in stats.phase_ns.values())
+        assert q.disable_stats() is stats
+        assert q.get_stats() is None
+        gen.random_full_name()
+        assert stats.calls['random_name_tuple'] == 100
+
+    def test_callback(self):
+        records: list[tuple[str, str, int]] = []
+        q.enable_stats(lambda kind, key, value: records.append((kind, key, value)))
+        q.NameGenerator(seed=1).random_full_name()
+        assert ('call', 'random_name_tuple', 1) in records
+        assert ('call', 'to_full_name', 1) in records
+        assert {key for kind, key, _ in records if kind == 'ns'} >= {'sample', 'construct'}
+
+    @pytest.mark.parametrize('fmt', list(q.Format))
+    def test_same_names(self, fmt: q.Format):
+        expected = list(q.NameGenerator(2, True, seed=5).iter_formatted_names(500, fmt))
+        q.enable_stats()
+        assert list(q.NameGenerator(2, True, seed=5).iter_formatted_names(500, fmt)) == expected
+
+    def test_cli(self):
+        from typer.testing import CliRunner
+
+        result = CliRunner().invoke(qngng._cli._app, ['--count', '10', '--stats'])
+        assert result.exit_code == 0
+        assert 'random_name_tuple: 10' in result.stderr
+        assert len(result.stdout.splitlines()) == 10
+        assert q.get_stats() is None
+
+
+class TestOutputFormat:
+    _CATS = frozenset({q.Category.STD, q.Category.SN})
+
+    def _name_tuples(self) -> list[q.NameTuple]:
+        return q.NameGenerator(1, True, categories=self._CATS, seed=8).random_name_tuples(200)
+
+    @staticmethod
+    def _record(name_tuple: q.NameTuple) -> dict[str, str | None]:
+        return {
+            'name': name_tuple.name,
+            'middle_name': name_tuple.middle_name,
+            'surname': name_tuple.surname,
+            'gender': name_tuple.gender,
+            'category': name_tuple.category,
+        }
+
+    def test_category(self):
+        name_tuples = self._name_tuples()
+        assert {name_tuple.category for name_tuple in name_tuples} == self._CATS
+        gen = q.NameGenerator(categories=self._CATS)
+        assert {gen.name_tuple_at(i).category for i in range(gen.space_size())} == self._CATS
+        assert name_tuples[0].to_full_name().category == name_tuples[0].category
+
+    def test_jsonl(self):
+        name_tuples = self._name_tuples()
+        writer = qngng._output.RecordWriter(q.OutputFormat.JSONL)
+        assert writer.header() == b''
+
+        # the writer is reusable
+        for _ in range(2):
+            lines = writer.encode(name_tuples).decode().splitlines()
+            assert [json.loads(line) for line in lines] == [self._record(name_tuple)
+                                                            for name_tuple in name_tuples]
+
+    def test_csv(self):
+        name_tuples = self._name_tuples()
+        writer = qngng._output.RecordWriter(q.OutputFormat.CSV)
+        text = (writer.header() + writer.encode(name_tuples)).decode()
+        rows = list(csv.DictReader(text.splitlines()))
+        assert rows == [{key: value or '' for key, value in self._record(name_tuple).items()}
+                        for name_tuple in name_tuples]
+
+    def test_msgpack(self):
+        import msgspec
+
+        name_tuples = self._name_tuples()
+        writer = qngng._output.RecordWriter(q.OutputFormat.MSGPACK)
+        encoded = [writer.encode([name_tuple]) for name_tuple in name_tuples]
+        assert writer.encode(name_tuples) == b''.join(encoded)
+        assert [msgspec.msgpack.decode(data) for data in encoded] == [
+            self._record(name_tuple) for name_tuple in name_tuples
+        ]
+
+    def test_text_has_no_records(self):
+        with pytest.raises(ValueError):
+            qngng._output.RecordWriter(q.OutputFormat.TEXT)
+
+    def test_parallel(self):
+        def chunks(jobs: int) -> bytes:
+            gen = q.NameGenerator(categories=self._CATS, seed=3)
+            return b''.join(q.generate_parallel_records(gen, 300, jobs, q.OutputFormat.JSONL,
+                                                        chunk_size=64))
+
+        data = chunks(2)
+        assert data == chunks(1)
+        assert len(data.splitlines()) == 300
+
+    def test_cli(self):
+        from typer.testing import CliRunner
+
+        result = CliRunner().invoke(qngng._cli._app, ['--count', '5000', '--output-format', 'csv',
+                                                     '--cat', 'all'])
+        assert result.exit_code == 0
+        rows = list(csv.DictReader(result.stdout.splitlines()))
+        assert len(rows) == 5000
+        assert all(row['category'] in set(q.Category) for row in rows)
+        result = CliRunner().invoke(qngng._cli._app, ['--unique', '--count', '0', '--cat', 'sn',
+                                                     '--output-format', 'jsonl'])
+        assert result.exit_code == 0
+        assert len(result.stdout.splitlines()) == q.NameGenerator(
+            categories=frozenset({q.Category.SN})).space_size()
+        result = CliRunner().invoke(qngng._cli._app, ['--output-format', 'jsonl', '--snake-case'])
+        assert result.exit_code != 0
+
+
+class TestConstraints:
+    @staticmethod
+    def _key(s: str) -> str:
+        return q._strip_diacritics(s).casefold()
+
+    def _check(self, name_tuple: q.NameTuple, constraints: q.Constraints) -> None:
+        name = self._key(name_tuple.name)
+        surname = self._key(name_tuple.surname)
+
+        if constraints.initial is not None:
+            assert name.startswith(self._key(constraints.initial))
+
+        if constraints.surname_prefix is not None:
+            assert surname.startswith(self._key(constraints.surname_prefix))
+
+        if constraints.alliterative:
+            assert name[:1] == surname[:1]
+
+        if constraints.max_length is not None:
+            assert len(q.format_name(name_tuple, constraints.fmt,
+                                     constraints.with_middle_initial)) <= constraints.max_length
+
+    @pytest.mark.parametrize('kwargs', [
+        {},
+        {'surname_count': 2},
+        {'with_middle_name': True},
+        {'weighted': True},
+        {'gender': q.Gender.FEMALE, 'surname_count': 2, 'with_middle_name': True},
+        {'categories': frozenset({q.Category.STD, q.Category.UDA_HOSTS, q.Category.SN})},
+    ])
+    @pytest.mark.parametrize('constraints', [
+        q.Constraints(initial='é'),
+        q.Constraints(surname_prefix='Tr'),
+        q.Constraints(alliterative=True, fmt=q.Format.SNAKE),
+        q.Constraints(max_length=11, fmt=q.Format.CAMEL),
+        q.Constraints(initial='M', max_length=16, with_middle_initial=False),
+    ])
+    def test_satisfied(self, kwargs: dict[str, typing.Any], constraints: q.Constraints):
+        gen = q.NameGenerator(constraints=constraints, seed=5, **kwargs)
+
+        for name_tuple in gen.random_name_tuples(300):
+            self._check(name_tuple, constraints)
+
+            if 'gender' in kwargs:
+                assert name_tuple.gender == kwargs['gender']
+
+    def test_distribution(self):
+        # every eligible surname shows up, not only the first ones
+        constraints = q.Constraints(surname_prefix='ga')
+        gen = q.NameGenerator(constraints=constraints, seed=2)
+        surnames = {name_tuple.surname for name_tuple in gen.random_name_tuples(5000)}
+        expected = {surname for surname in q._std_pool(None).surnames
+                    if self._key(surname).startswith('ga')}
+        assert surnames == expected
+
+    def test_impossible(self):
+        with pytest.raises(ValueError):
+            q.NameGenerator(constraints=q.Constraints(initial='q', surname_prefix='qq'))
+
+        with pytest.raises(ValueError):
+            q.NameGenerator(constraints=q.Constraints(max_length=3))
+
+        with pytest.raises(ValueError):
+            q.NameGenerator(constraints=q.Constraints(initial='ab'))
+
+    def test_reproducible(self):
+        constraints = q.Constraints(alliterative=True)
+        names = [q.NameGenerator(constraints=constraints, seed=4).random_name_tuples(50)
+                 for _ in range(2)]
+        assert names[0] == names[1]
+
+    def test_parallel(self):
+        constraints = q.Constraints(initial='a', max_length=12, fmt=q.Format.KEBAB)
+        gen = q.NameGenerator(constraints=constraints, seed=6)
+        names = ''.join(q.generate_parallel(gen, 400, 2, q.Format.KEBAB,
+                                            chunk_size=64)).splitlines()
+        assert len(names) == 400
+        assert all(name.startswith('a') and len(name) <= 12 for name in names)
+
+    def test_unique(self):
+        gen = q.NameGenerator(constraints=q.Constraints(initial='a'))
+
+        with pytest.raises(ValueError):
+            gen.space_size()
+
+    def test_cli(self):
+        from typer.testing import CliRunner
+
+        result = CliRunner().invoke(qngng._cli._app, ['--count', '100', '--initial', 'b',
+                                                     '--max-length', '12', '--kebab-case'])
+        assert result.exit_code == 0
+        names = result.stdout.splitlines()
+        assert len(names) == 100
+        assert all(name.startswith('b') and len(name) <= 12 for name in names)
+        result = CliRunner().invoke(qngng._cli._app, ['--initial', 'q', '--surname-prefix', 'qq'])
+        assert result.exit_code != 0
+        result = CliRunner().invoke(qngng._cli._app, ['--unique', '--alliterative'])
+        assert result.exit_code != 0